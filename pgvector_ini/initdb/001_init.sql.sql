@@ -1,5 +1,10 @@
 CREATE EXTENSION IF NOT EXISTS vector;
 
+DROP TABLE IF EXISTS extraction_jobs;
+DROP TABLE IF EXISTS documents;
+DROP TABLE IF EXISTS entity_alias;
+DROP TABLE IF EXISTS triple_provenance;
+DROP TABLE IF EXISTS triples;
 DROP TABLE IF EXISTS relation_types;
 DROP TABLE IF EXISTS entity;
 
@@ -17,10 +22,79 @@ CREATE TABLE IF NOT EXISTS entity (
   embedding VECTOR(896) NOT NULL
 );
 
-CREATE INDEX ON relation_types
-  USING hnsw (embedding vector_cosine_ops)
+-- Embeddings are stored L2-normalized, so inner product ranks like cosine
+-- without recomputing norms on every comparison.
+CREATE INDEX relation_types_embedding_idx ON relation_types
+  USING hnsw (embedding vector_ip_ops)
   WITH (m = 16, ef_construction = 64);
 
-CREATE INDEX ON entity
-  USING hnsw (embedding vector_cosine_ops)
+CREATE INDEX entity_embedding_idx ON entity
+  USING hnsw (embedding vector_ip_ops)
   WITH (m = 16, ef_construction = 64);
+
+CREATE TABLE IF NOT EXISTS triples (
+  id            TEXT PRIMARY KEY,  -- hash_id("T", subject_id, predicate_id, object_id)
+  subject_id    BIGINT NOT NULL REFERENCES entity(id),
+  predicate_id  BIGINT NOT NULL REFERENCES relation_types(id),
+  object_id     BIGINT REFERENCES entity(id),  -- NULL for literal objects
+  object_type   TEXT NOT NULL DEFAULT 'entity',  -- entity | date | phone | email | integer
+  object_value  TEXT,
+  object_date   DATE,
+  object_int    BIGINT,
+  CONSTRAINT triples_object_kind CHECK ((object_id IS NULL) = (object_type <> 'entity'))
+);
+
+CREATE INDEX IF NOT EXISTS triples_subject_predicate_idx ON triples (subject_id, predicate_id);
+CREATE INDEX IF NOT EXISTS triples_object_idx ON triples (object_id);
+CREATE INDEX IF NOT EXISTS triples_predicate_idx ON triples (predicate_id);
+CREATE INDEX IF NOT EXISTS triples_literal_idx ON triples (object_type, object_value)
+  WHERE object_id IS NULL;
+
+-- One row per (triple, source document); re-ingesting a document is a no-op.
+CREATE TABLE IF NOT EXISTS triple_provenance (
+  triple_id  TEXT NOT NULL REFERENCES triples(id) ON DELETE CASCADE,
+  document   TEXT NOT NULL,
+  evidence   TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (triple_id, document)
+);
+
+CREATE INDEX IF NOT EXISTS triple_provenance_document_idx ON triple_provenance (document);
+
+CREATE TABLE IF NOT EXISTS entity_alias (
+  kind      TEXT NOT NULL,  -- 'exact' or 'ascii' (diacritic-stripped), see utils/normalize.py
+  key       TEXT NOT NULL,
+  entity_id BIGINT NOT NULL REFERENCES entity(id) ON DELETE CASCADE,
+  PRIMARY KEY (kind, key, entity_id)
+);
+
+-- Build manifest for incremental re-runs (see builder.KnowledgeGraphBuilder.run).
+CREATE TABLE IF NOT EXISTS documents (
+  path             TEXT PRIMARY KEY,
+  content_hash     TEXT NOT NULL,
+  pipeline_version TEXT NOT NULL,
+  config_hash      TEXT NOT NULL,
+  triple_ids       TEXT[] NOT NULL DEFAULT '{}',
+  updated_at       TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Work queue for distributed extraction workers (src/worker.py).
+CREATE TABLE IF NOT EXISTS extraction_jobs (
+  id               BIGSERIAL PRIMARY KEY,
+  document         TEXT NOT NULL,
+  status           TEXT NOT NULL DEFAULT 'pending',  -- pending | running | done | failed
+  attempts         INTEGER NOT NULL DEFAULT 0,
+  worker           TEXT,
+  lease_expires_at TIMESTAMPTZ,
+  heartbeat_at     TIMESTAMPTZ,
+  enqueued_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+  started_at       TIMESTAMPTZ,
+  finished_at      TIMESTAMPTZ,
+  error            TEXT,
+  result           JSONB
+);
+
+CREATE INDEX IF NOT EXISTS extraction_jobs_pending_idx ON extraction_jobs (id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS extraction_jobs_lease_idx ON extraction_jobs (lease_expires_at) WHERE status = 'running';
+CREATE UNIQUE INDEX IF NOT EXISTS extraction_jobs_active_document_idx ON extraction_jobs (document)
+  WHERE status IN ('pending', 'running');
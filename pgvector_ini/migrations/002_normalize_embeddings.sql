@@ -0,0 +1,20 @@
+-- Move existing databases to the normalized-embedding contract:
+-- normalize stored vectors once and rebuild the HNSW indexes with inner-product ops.
+-- Requires pgvector >= 0.7 for l2_normalize().
+BEGIN;
+
+DROP INDEX IF EXISTS relation_types_embedding_idx;
+DROP INDEX IF EXISTS entity_embedding_idx;
+
+UPDATE relation_types SET embedding = l2_normalize(embedding);
+UPDATE entity SET embedding = l2_normalize(embedding);
+
+CREATE INDEX relation_types_embedding_idx ON relation_types
+  USING hnsw (embedding vector_ip_ops)
+  WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX entity_embedding_idx ON entity
+  USING hnsw (embedding vector_ip_ops)
+  WITH (m = 16, ef_construction = 64);
+
+COMMIT;
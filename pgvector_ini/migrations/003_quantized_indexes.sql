@@ -0,0 +1,25 @@
+-- Optional quantized search indexes (see VECTOR_STORAGE in models/db_engine.py).
+-- Full-precision vectors stay in the heap for re-ranking; only the index shrinks.
+-- Create the variant matching ENTITY_VECTOR_STORAGE / RELATION_VECTOR_STORAGE,
+-- then drop the full-precision index of that table to reclaim its memory.
+
+-- halfvec: 2 bytes per dimension (about half the index size).
+CREATE INDEX IF NOT EXISTS entity_embedding_halfvec_idx ON entity
+  USING hnsw ((embedding::halfvec(896)) halfvec_ip_ops)
+  WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS relation_types_embedding_halfvec_idx ON relation_types
+  USING hnsw ((embedding::halfvec(896)) halfvec_ip_ops)
+  WITH (m = 16, ef_construction = 64);
+
+-- binary: 1 bit per dimension (32x smaller); needs a larger RERANK_CANDIDATES.
+-- CREATE INDEX IF NOT EXISTS entity_embedding_binary_idx ON entity
+--   USING hnsw ((binary_quantize(embedding)::bit(896)) bit_hamming_ops)
+--   WITH (m = 16, ef_construction = 64);
+--
+-- CREATE INDEX IF NOT EXISTS relation_types_embedding_binary_idx ON relation_types
+--   USING hnsw ((binary_quantize(embedding)::bit(896)) bit_hamming_ops)
+--   WITH (m = 16, ef_construction = 64);
+
+-- DROP INDEX IF EXISTS entity_embedding_idx;
+-- DROP INDEX IF EXISTS relation_types_embedding_idx;
@@ -0,0 +1,23 @@
+-- Canonical triples keyed by content hash, plus per-document provenance.
+
+CREATE TABLE IF NOT EXISTS triples (
+  id            TEXT PRIMARY KEY,  -- hash_id("T", subject_id, predicate_id, object_id)
+  subject_id    BIGINT NOT NULL REFERENCES entity(id),
+  predicate_id  BIGINT NOT NULL REFERENCES relation_types(id),
+  object_id     BIGINT NOT NULL REFERENCES entity(id)
+);
+
+CREATE INDEX IF NOT EXISTS triples_subject_predicate_idx ON triples (subject_id, predicate_id);
+CREATE INDEX IF NOT EXISTS triples_object_idx ON triples (object_id);
+CREATE INDEX IF NOT EXISTS triples_predicate_idx ON triples (predicate_id);
+
+-- One row per (triple, source document); re-ingesting a document is a no-op.
+CREATE TABLE IF NOT EXISTS triple_provenance (
+  triple_id  TEXT NOT NULL REFERENCES triples(id) ON DELETE CASCADE,
+  document   TEXT NOT NULL,
+  evidence   TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (triple_id, document)
+);
+
+CREATE INDEX IF NOT EXISTS triple_provenance_document_idx ON triple_provenance (document);
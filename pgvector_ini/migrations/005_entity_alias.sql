@@ -0,0 +1,8 @@
+-- Normalization keys resolved to canonical entities before any embedding lookup.
+
+CREATE TABLE IF NOT EXISTS entity_alias (
+  kind      TEXT NOT NULL,  -- 'exact' or 'ascii' (diacritic-stripped), see utils/normalize.py
+  key       TEXT NOT NULL,
+  entity_id BIGINT NOT NULL REFERENCES entity(id) ON DELETE CASCADE,
+  PRIMARY KEY (kind, key, entity_id)
+);
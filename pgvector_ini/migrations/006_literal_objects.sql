@@ -0,0 +1,13 @@
+-- Typed literal objects (dates, phones, emails, integers) stored on the triple
+-- instead of as embedded entities; see utils/literals.py.
+
+ALTER TABLE triples ALTER COLUMN object_id DROP NOT NULL;
+ALTER TABLE triples ADD COLUMN IF NOT EXISTS object_type TEXT NOT NULL DEFAULT 'entity';
+ALTER TABLE triples ADD COLUMN IF NOT EXISTS object_value TEXT;
+ALTER TABLE triples ADD COLUMN IF NOT EXISTS object_date DATE;
+ALTER TABLE triples ADD COLUMN IF NOT EXISTS object_int BIGINT;
+ALTER TABLE triples ADD CONSTRAINT triples_object_kind
+  CHECK ((object_id IS NULL) = (object_type <> 'entity'));
+
+CREATE INDEX IF NOT EXISTS triples_literal_idx ON triples (object_type, object_value)
+  WHERE object_id IS NULL;
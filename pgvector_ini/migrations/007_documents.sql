@@ -0,0 +1,11 @@
+-- Build manifest for incremental re-runs: unchanged documents are skipped and
+-- changed ones only insert/delete the difference in triple ids.
+
+CREATE TABLE IF NOT EXISTS documents (
+  path             TEXT PRIMARY KEY,
+  content_hash     TEXT NOT NULL,
+  pipeline_version TEXT NOT NULL,
+  config_hash      TEXT NOT NULL,
+  triple_ids       TEXT[] NOT NULL DEFAULT '{}',
+  updated_at       TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,23 @@
+-- Work queue shared by extraction workers on several hosts (src/worker.py).
+-- Jobs are claimed with FOR UPDATE SKIP LOCKED and held by a lease that the
+-- worker extends with heartbeats; expired leases are requeued.
+
+CREATE TABLE IF NOT EXISTS extraction_jobs (
+  id               BIGSERIAL PRIMARY KEY,
+  document         TEXT NOT NULL,
+  status           TEXT NOT NULL DEFAULT 'pending',  -- pending | running | done | failed
+  attempts         INTEGER NOT NULL DEFAULT 0,
+  worker           TEXT,
+  lease_expires_at TIMESTAMPTZ,
+  heartbeat_at     TIMESTAMPTZ,
+  enqueued_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+  started_at       TIMESTAMPTZ,
+  finished_at      TIMESTAMPTZ,
+  error            TEXT,
+  result           JSONB
+);
+
+CREATE INDEX IF NOT EXISTS extraction_jobs_pending_idx ON extraction_jobs (id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS extraction_jobs_lease_idx ON extraction_jobs (lease_expires_at) WHERE status = 'running';
+CREATE UNIQUE INDEX IF NOT EXISTS extraction_jobs_active_document_idx ON extraction_jobs (document)
+  WHERE status IN ('pending', 'running');
@@ -4,17 +4,26 @@ import asyncio
 import json
 
 from pathlib import Path
-from typing import Dict, Set, Any
+
+import numpy as np
+from typing import Dict, List, Optional, Set, Any
 from KG_builder.extract.extract_stage import TripleExtraction, Stage
 from KG_builder.embedding.load.free import QwenEmbedding
+from KG_builder.embedding.load.remote import RemoteEmbedding
 from KG_builder.utils.llm_utils import load_async_model
-from KG_builder.config import SECTIONS_DEFINITION
+from KG_builder.config import CPU_QUANTIZE, LOCAL_PROFILE, PIPELINE_VERSION, SECTIONS_DEFINITION
+from KG_builder.llm.free.cpu import resolve_profile
 from KG_builder.prompts.prompts import DEFINITION_PROMPT
 from KG_builder.utils.chunking import extract_specific_sections
 from KG_builder.utils.llm_utils import load_model
 from KG_builder.utils.clean_data import clean_vn_text
 from KG_builder.extract.definition import async_collect_definition
-from KG_builder.models.ops import RelationTypeService, EntityService
+from KG_builder.models.dao import DocumentRecord
+from KG_builder.models.store import PgVectorStore, SQLiteStore
+from KG_builder.utils.clustering import cluster_embeddings
+from KG_builder.utils.literals import Literal, detect_literals
+from KG_builder.utils.normalize import normalize_key
+from KG_builder.utils.utils import config_hash, content_hash
 from KG_builder.triple_models import TripleList
 
 
@@ -25,21 +34,119 @@ class KnowledgeGraphBuilder:
                 threhold: float = 0.2,
                 definition_model: str = "gemini-2.0-flash",
                 llm_model: str = "gemini-2.0-flash",
-                embedding_model: str = "Qwen/Qwen2.5-0.5B-Instruct"):
+                embedding_model: str = "Qwen/Qwen2.5-0.5B-Instruct",
+                embedding_backend: str = "torch",
+                entity_index_path: Optional[str] = None,
+                predicate_index_path: Optional[str] = None,
+                db_path: Optional[str] = None,
+                strip_diacritics: bool = False):
         self.threshold = threhold
         self.response_format = response_format
         self.builder = triple_extraction
         self.llm = load_model(llm_model)
         self.definition_model = load_async_model(definition_model)
         self.embedding_name = embedding_model
-        if "qwen" in self.embedding_name.lower():
-            self.embed_model = QwenEmbedding(model_name=self.embedding_name)            
+        if self.embedding_name.startswith("unix://"):
+            self.embed_model = RemoteEmbedding(socket_path=self.embedding_name[len("unix://"):])
+        elif "qwen" in self.embedding_name.lower():
+            if embedding_backend == "onnx":
+                # onnxruntime is only needed (and imported) for this backend.
+                from KG_builder.embedding.load.onnx_model import OnnxQwenEmbedding
+                self.embed_model = OnnxQwenEmbedding(model_name=self.embedding_name)
+            else:
+                self.embed_model = QwenEmbedding(model_name=self.embedding_name)
+
+        # Anything that changes the triples a document produces; see run().
+        settings = {
+            "llm_model": llm_model,
+            "definition_model": definition_model,
+            "embedding_model": embedding_model,
+            "embedding_backend": embedding_backend,
+            "threshold": threhold,
+            "strip_diacritics": strip_diacritics,
+            "response_format": {
+                key: value.model_json_schema() if hasattr(value, "model_json_schema") else value
+                for key, value in response_format.items()
+            },
+            "sections": SECTIONS_DEFINITION,
+            "definition_prompt": DEFINITION_PROMPT,
+        }
+        if any("qwen" in name.lower() for name in (llm_model, definition_model, embedding_model)):
+            # Local weights load differently per profile (float16, bf16/fp32, int8).
+            settings["local_profile"] = resolve_profile(LOCAL_PROFILE)
+            settings["cpu_quantize"] = CPU_QUANTIZE
+        self.config_hash = config_hash(settings)
+
+        if db_path:
+            self.store = SQLiteStore(
+                db_path,
+                entity_index_path=entity_index_path,
+                predicate_index_path=predicate_index_path,
+                strip_diacritics=strip_diacritics,
+            )
+        else:
+            self.store = PgVectorStore(
+                entity_index_path=entity_index_path,
+                predicate_index_path=predicate_index_path,
+                strip_diacritics=strip_diacritics,
+            )
+
+    def _resolve_entities(self, entities: List[str]) -> Dict[str, str]:
+        """
+        Resolve names through the alias index first; only the remaining names
+        are embedded, one representative per normalization key. Near-duplicate
+        embeddings within the batch are clustered under ``threshold`` and only
+        one name per cluster is sent to the store.
+        """
+        map_entities = self.store.lookup_entities(entities)
+
+        representatives: Dict[str, str] = {}
+        for entity in entities:
+            if entity not in map_entities:
+                representatives.setdefault(normalize_key(entity), entity)
+
+        unresolved = list(representatives.values())
+        if unresolved:
+            entities_embed = self.embed_model.encode_sync(unresolved)
+            roots = cluster_embeddings(entities_embed, self.threshold)
+            heads = np.unique(roots)
+            resolved = self.store.resolve_entities(
+                [unresolved[i] for i in heads], entities_embed[heads], self.threshold
+            )
+            cluster_of = {name: resolved[unresolved[root]] for name, root in zip(unresolved, roots)}
+            for entity in entities:
+                if entity not in map_entities:
+                    map_entities[entity] = cluster_of[representatives[normalize_key(entity)]]
+            self.store.remember_entities(map_entities)
+        return map_entities
 
     def run(self, *,
             input_path: str,
-            output_path: str):
+            output_path: str,
+            force: bool = False) -> Optional[Dict[str, List[str]]]:
+        """
+        Extract, resolve and store the triples of one document.
+
+        The store keeps a manifest of every document's content hash, pipeline
+        version and config hash. Unless ``force`` is set, a document whose
+        manifest entry still matches is skipped (returns None). Otherwise only
+        the triple ids that differ from the previous run are inserted or
+        deleted. The delta is returned and written to the output file, where
+        ``export.neo4j`` applies the deletions.
+        """
         with open(input_path, "r", encoding="utf-8") as f:
             text = f.read()
+
+        text_hash = content_hash(text)
+        previous = self.store.get_document(input_path)
+        if not force and previous is not None \
+                and previous.is_current(text_hash, PIPELINE_VERSION, self.config_hash):
+            print(f"{input_path} is unchanged since the last build; skipping.")
+            return None
+        previous_ids = set(previous.triple_ids) if previous is not None else set()
+
+        # The extractor is reused across documents (e.g. by src/worker.py).
+        self.builder.stages.clear()
         # text = clean_vn_text(text)
         for section in SECTIONS_DEFINITION:
             # print(section)
@@ -61,6 +168,7 @@ class KnowledgeGraphBuilder:
         
         entities: Set[str] = set()
         predicates: Set[str] = set()
+        objects: Set[str] = set()
         
         # print(result)
         
@@ -73,9 +181,17 @@ class KnowledgeGraphBuilder:
                 _subject = triple.get("subject", None)
                 _predicate = triple.get("predicate", None)
                 _object = triple.get("object", None)
+                if not (_subject and _predicate and _object):
+                    continue
                 entities.add(_subject)
                 predicates.add(_predicate)
-                entities.add(_object)
+                objects.add(_object)
+
+        # Dates, phones, emails and numbers are stored as typed values; they
+        # never go through embedding or ANN matching.
+        objects = list(objects)
+        literals: Dict[str, Optional[Literal]] = dict(zip(objects, detect_literals(objects)))
+        entities.update(obj for obj, literal in literals.items() if literal is None)
         
         
         print(predicates)
@@ -98,54 +214,67 @@ class KnowledgeGraphBuilder:
         #     # print(definition)
         #     definition_embed.append(self.embed_model.encode_sync([definition]))
         
-        entities_embed = self.embed_model.encode_sync(entities)
-        
-        map_predicates: Dict[str, str] = {}
-        map_entities: Dict[str, str] = {}
-        
-        for i, (entity, embed) in enumerate(zip(entities, entities_embed)):
-            ans = EntityService.query(embed=embed, top_k=1)
-            if len(ans) == 0 or ans[0][1] > self.threshold:
-               EntityService.add(
-                   name = entity,
-                   embedding=embed
-               ) 
-               map_entities[entity] = entity
-               continue
-           
-            map_entities[entity] = ans[0][0].name
-            
-        for i, ((relation, definition), embed) in enumerate(zip(zip(predicates, definitions), definition_embed)):
-            ans = RelationTypeService.query(embed=embed, top_k=1)
-            if len(ans) == 0 or ans[0][1] > self.threshold:
-                RelationTypeService.add(
-                    type=relation,
-                    definition=definition,
-                    embedding=embed
-                )
-                map_predicates[relation] = relation
-                continue
-            
-            map_predicates[relation] = ans[0][0].type
+        map_entities = self._resolve_entities(entities)
+        map_predicates = self.store.resolve_predicates(predicates, definitions, definition_embed, self.threshold)
 
-        
+        canonical: List[Dict[str, Any]] = []
+        stored_objects: List[Any] = []
         for stage in result:
-            if not isinstance(stage, list):
+            if not isinstance(stage, dict):
                 continue
-            for triple in stage["striple"]:
-                if not isinstance(triple, dict):
+            for triple in stage["triples"]:
+                if not isinstance(triple, dict) or triple.get("subject") not in map_entities \
+                        or triple.get("predicate") not in map_predicates:
+                    continue
+                literal = literals.get(triple.get("object"))
+                if literal is None and triple.get("object") not in map_entities:
                     continue
                 
                 triple["subject"] = map_entities[triple["subject"]]
                 triple["predicate"] = map_predicates[triple["predicate"]]
-                triple["object"] = map_entities[triple["object"]]
-                
+                if literal is None:
+                    triple["object"] = map_entities[triple["object"]]
+                    stored_objects.append(triple["object"])
+                else:
+                    triple["object_type"], triple["object_value"] = literal
+                    stored_objects.append(literal)
+                canonical.append(triple)
+
+        stored = self.store.add_triples(
+            [(triple["subject"], triple["predicate"], obj) for triple, obj in zip(canonical, stored_objects)],
+            document=input_path,
+            evidence=[(triple.get("metadata") or {}).get("source") for triple in canonical],
+            skip=previous_ids,
+        )
+        for triple, ids in zip(canonical, stored):
+            triple.update(ids)
+
+        triple_ids = list(dict.fromkeys(ids["triple_id"] for ids in stored))
+        removed = sorted(previous_ids.difference(triple_ids))
+        # Triples still supported by another document keep their row.
+        delta = {
+            "inserted": [row_id for row_id in triple_ids if row_id not in previous_ids],
+            "deleted": self.store.remove_triples(input_path, removed) if removed else [],
+        }
+        self.store.save_document(DocumentRecord(
+            path=input_path,
+            content_hash=text_hash,
+            pipeline_version=PIPELINE_VERSION,
+            config_hash=self.config_hash,
+            triple_ids=triple_ids,
+        ))
+        print(
+            f"{input_path}: {len(delta['inserted'])} triples inserted, {len(removed)} dropped "
+            f"({len(delta['deleted'])} deleted), {len(triple_ids) - len(delta['inserted'])} unchanged"
+        )
         
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump({
-                "stages": result                
+                "stages": result,
+                "delta": delta,
             }, f, ensure_ascii=False, indent=2)
+        return delta
                 
                 
         
@@ -4,11 +4,40 @@ from KG_builder.prompts.prompts import (
     EXTRACT_TRIPLE_USER_PROMPT,
 )
 
+# Bump when extraction or resolution logic changes so that every document in
+# the build manifest is re-processed on the next run.
+PIPELINE_VERSION = "2"
+
 # Qwen parameters
 DEVICE_MAP = "auto"
 MAX_NEW_TOKENS = 3000
+# Draft model for speculative decoding, e.g. "Qwen/Qwen2.5-0.5B-Instruct" under
+# a larger Qwen2.5; it must share the target's tokenizer. None disables it.
+DRAFT_MODEL_NAME = None
 TEMPERATURE = 0.7
 REPETITION_PENALTY = 1.2
+# Batched generation: prompts per generate() call, and the padded token budget
+# (batch size x longest prompt) of one call.
+GENERATION_BATCH_SIZE = 8
+GENERATION_BATCH_TOKENS = 16384
+# System prompts whose past key/values QwenModel keeps (LRU); 0 disables reuse.
+PREFIX_CACHE_SIZE = 8
+# Constrain JSON responses to their response_schema (needs lm-format-enforcer;
+# without it generation still stops when the JSON closes).
+CONSTRAINED_DECODING = True
+# Local model loading: "gpu" (float16 on DEVICE_MAP), "cpu" (bfloat16/float32,
+# optionally int8 and compiled), or "auto" (cpu when CUDA is unavailable).
+LOCAL_PROFILE = "gpu"
+CPU_QUANTIZE = True  # int8 dynamic quantization of the Linear layers
+CPU_COMPILE = False  # torch.compile; pays off only on long runs
+CPU_THREADS = 0  # intra-op threads; 0 = one per physical core
+
+# ONNX embedding parameters
+ONNX_CACHE_DIR = ".cache/onnx"
+ONNX_OPSET = 17
+
+# Shared embedding server
+EMBED_SERVER_SOCKET = "/tmp/kg-embed.sock"
 
 # Relation with definition
 SECTION_PREDICATES_1 = {
@@ -4,7 +4,21 @@ from typing import List
 from numpy.typing import NDArray
 import numpy as np
 
+
+def l2_normalize(vectors: NDArray[np.float32]) -> NDArray[np.float32]:
+    """Scale each row to unit length so inner product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.size == 0:
+        return vectors
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
 class BaseEmbed(ABC):
+    """
+    Embedding models return float32 rows that are already L2-normalized, so stores
+    can search with inner product instead of recomputing norms per comparison.
+    """
     @abstractmethod
     async def encode(self, context: List[str]) -> NDArray[np.float32]: ...
     
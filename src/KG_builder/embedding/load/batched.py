@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+from numpy.typing import NDArray
+
+from KG_builder.embedding.load.base import BaseEmbed
+from KG_builder.utils.batching import MicroBatcher
+
+
+class BatchedEmbedding(BaseEmbed):
+    """
+    Async front end that merges concurrent ``encode`` calls into one forward pass.
+
+    Wraps any embedding model exposing ``encode_sync`` (``QwenEmbedding``,
+    ``OnnxQwenEmbedding``, ...).
+    """
+
+    def __init__(self, model: BaseEmbed, *, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.model = model
+        self.batcher: MicroBatcher[str, NDArray[np.float32]] = MicroBatcher(
+            self.model.encode_sync,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+        )
+
+    def encode_sync(self, context: List[str]) -> NDArray[np.float32]:
+        return self.model.encode_sync(context)
+
+    async def encode(self, context: List[str]) -> NDArray[np.float32]:
+        if not context:
+            return np.empty((0, 0), dtype=np.float32)
+        return await self.batcher.submit(list(context))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.batcher.stats()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from KG_builder.embedding.load.free import QwenEmbedding
+    from KG_builder.utils.utils import perf
+
+    model = BatchedEmbedding(QwenEmbedding(model_name="Qwen/Qwen2.5-0.5B-Instruct"))
+
+    @perf
+    async def concurrent_encode():
+        tasks = [model.encode([f"entity {i}", f"entity {i + 1}"]) for i in range(64)]
+        return await asyncio.gather(*tasks)
+
+    asyncio.run(concurrent_encode())
+    print(model.stats())
@@ -1,70 +1,143 @@
-from KG_builder.embedding.load.base import BaseEmbed
+from KG_builder.embedding.load.base import BaseEmbed, l2_normalize
 from typing import List
 from numpy.typing import NDArray
 import numpy as np
-from google import genai
+from KG_builder.llm.credentials import gemini_pool
 import asyncio
+import logging
+import random
+import re
 from time import perf_counter, sleep
-import os
 
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+_SIZE_MESSAGE = re.compile(r"too (large|long|many)|exceed|payload size|request size", re.IGNORECASE)
+
+
+def _estimate_tokens(text: str) -> int:
+    # Estimate without calling the tokenizer, not a bound: ~2 characters per
+    # token. Vietnamese syllables often split into several tokens, so the usual
+    # 4-bytes-per-token rule undercounts them. Batches the API still finds too
+    # large are split on the error.
+    return max(1, len(text) // 2)
+
+
+def _plan_batches(context: List[str], max_items: int, max_tokens: int) -> List[List[str]]:
+    """Split ``context`` into ordered batches bounded by item count and estimated tokens."""
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in context:
+        tokens = _estimate_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Throttling, server errors and dropped connections; never bad requests or bugs."""
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+
+def _is_payload_error(error: Exception) -> bool:
+    """413, or a 400 whose message says the request is too big (not a bad key or model)."""
+    code = getattr(error, "code", None)
+    return code == 413 or (code == 400 and bool(_SIZE_MESSAGE.search(str(error))))
+
+
 class GeminiEmbedModel(BaseEmbed):
     MAX_BATCH = 100
+    MAX_BATCH_TOKENS = 16000
+    MAX_RETRIES = 4
 
     def __init__(
         self,
         *,
         model_name: str = "gemini-embedding-001",
         requests_per_minute: int | None = None,
+        max_concurrency: int = 8,
     ):
-        self.model = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+        self.pool = gemini_pool()
         self.model_name = model_name
+        # Only guards the reservation of request slots, never a request itself.
         self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
         self._rpm = requests_per_minute
         if self._rpm and self._rpm > 0:
             self._min_interval = 60.0 / self._rpm
         else:
             self._min_interval = 0.0
-        self._last_request: float = 0.0
+        self._next_slot: float = 0.0
 
     async def encode(self, context: List[str]) -> NDArray[np.float32]:
         if not context:
             return np.empty((0, 0), dtype=np.float32)
 
-        loop = asyncio.get_event_loop()
-        vectors: List[np.ndarray] = []
+        batches = _plan_batches(list(context), self.MAX_BATCH, self.MAX_BATCH_TOKENS)
+        # gather keeps batch order, so rows line up with ``context``.
+        results = await asyncio.gather(*[self._embed_batch(batch) for batch in batches])
+        vectors = [vector for batch_vectors in results for vector in batch_vectors]
+
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
 
-        for start in range(0, len(context), self.MAX_BATCH):
-            batch = context[start : start + self.MAX_BATCH]
+        return l2_normalize(np.vstack(vectors))
 
-            def _embed_items(items: List[str] = batch):
-                response = self.model.models.embed_content(
-                    model=self.model_name,
-                    contents=items,
-                )
-                return [np.asarray(embedding.values, dtype=np.float32) for embedding in response.embeddings]
+    def _embed_items(self, items: List[str]) -> List[np.ndarray]:
+        response = self.pool.call(
+            lambda client: client.models.embed_content(
+                model=self.model_name,
+                contents=items,
+            )
+        )
+        return [np.asarray(embedding.values, dtype=np.float32) for embedding in response.embeddings]
 
-            async with self._lock:
+    async def _embed_batch(self, batch: List[str]) -> List[np.ndarray]:
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.MAX_RETRIES + 1):
+            async with self._semaphore:
                 await self._respect_rate_limit()
-                batch_vectors = await loop.run_in_executor(None, _embed_items)
-                self._last_request = perf_counter()
-            vectors.extend(batch_vectors)
+                try:
+                    return await loop.run_in_executor(None, self._embed_items, batch)
+                except Exception as e:
+                    error = e
+
+            if _is_payload_error(error) and len(batch) > 1:
+                # Request too large for the API: halve it and retry both sides.
+                middle = len(batch) // 2
+                left, right = await asyncio.gather(
+                    self._embed_batch(batch[:middle]),
+                    self._embed_batch(batch[middle:]),
+                )
+                return left + right
 
-        if not vectors:
-            return np.empty((0, 0), dtype=np.float32)
+            if not _is_retryable(error) or attempt == self.MAX_RETRIES:
+                raise error
 
-        return np.vstack(vectors)
+            backoff = min(2 ** attempt, 30) + random.uniform(0, 1)
+            logging.warning(f"Embedding batch failed ({error}); retrying in {backoff:.1f}s")
+            await asyncio.sleep(backoff)
 
     async def _respect_rate_limit(self) -> None:
         if self._min_interval <= 0:
             return
-        now = perf_counter()
-        elapsed = now - self._last_request
-        wait_time = self._min_interval - elapsed
+        async with self._lock:
+            now = perf_counter()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._min_interval
+        wait_time = slot - now
         if wait_time > 0:
             await asyncio.sleep(wait_time)
 
@@ -78,7 +151,7 @@ class NonAsyncGeminiEmbedModel:
         model_name: str = "gemini-embedding-001",
         requests_per_minute: int | None = None,
     ):
-        self.model = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+        self.pool = gemini_pool()
         self.model_name = model_name
         self._rpm = requests_per_minute
         if self._rpm and self._rpm > 0:
@@ -92,12 +165,13 @@ class NonAsyncGeminiEmbedModel:
             return np.empty((0, 0), dtype=np.float32)
 
         vectors: List[np.ndarray] = []
-        for start in range(0, len(context), self.MAX_BATCH):
-            batch = context[start : start + self.MAX_BATCH]
+        for batch in _plan_batches(list(context), self.MAX_BATCH, GeminiEmbedModel.MAX_BATCH_TOKENS):
             self._respect_rate_limit_sync()
-            response = self.model.models.embed_content(
-                model=self.model_name,
-                contents=batch,
+            response = self.pool.call(
+                lambda client: client.models.embed_content(
+                    model=self.model_name,
+                    contents=batch,
+                )
             )
             vectors.extend(np.asarray(embedding.values, dtype=np.float32) for embedding in response.embeddings)
             self._last_request = perf_counter()
@@ -105,7 +179,7 @@ class NonAsyncGeminiEmbedModel:
         if not vectors:
             return np.empty((0, 0), dtype=np.float32)
 
-        return np.vstack(vectors)
+        return l2_normalize(np.vstack(vectors))
 
     async def _respect_rate_limit(self) -> None:
         if self._min_interval <= 0:
@@ -9,12 +9,19 @@ import numpy as np
 import torch
 from numpy.typing import NDArray
 
-from KG_builder.embedding.load.base import BaseEmbed
+from KG_builder.embedding.load.base import BaseEmbed, l2_normalize
 from KG_builder.llm.free.free_model import QwenModel
 
 
 class QwenEmbedding(BaseEmbed):
     def __init__(self, **args):
+        self.normalize = args.pop("normalize", True)
+        # int8 activations shift the mean-pooled vectors; keep float weights
+        # unless asked, so embeddings match what the stores already hold.
+        args.setdefault("quantize", False)
+        # Only the hidden states are used: no draft model, no decoding constraints.
+        args.setdefault("draft_model_name", None)
+        args.setdefault("constrained_decoding", False)
         self.model = QwenModel(**args)
         self.model.instance.model.eval()
         self.device = self.model.instance.device
@@ -40,8 +47,10 @@ class QwenEmbedding(BaseEmbed):
         mask = toks["attention_mask"].unsqueeze(-1)
         summed = (hidden * mask).sum(dim=1)
         counts = mask.sum(dim=1).clamp(min=1)
-        embeddings = summed / counts
-        return embeddings.detach().cpu().numpy().astype(np.float32)
+        embeddings = (summed / counts).detach().cpu().float().numpy()
+        if self.normalize:
+            return l2_normalize(embeddings)
+        return embeddings.astype(np.float32)
 
     async def encode(self, context: List[str]) -> NDArray[np.float32]:
         if not context:
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import onnxruntime as ort
+import torch
+from numpy.typing import NDArray
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from KG_builder.config import ONNX_CACHE_DIR, ONNX_OPSET
+from KG_builder.embedding.load.base import BaseEmbed, l2_normalize
+
+
+class _EncoderWrapper(torch.nn.Module):
+    """Expose only the decoder stack so the exported graph returns hidden states."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        # transformers builds its causal mask with vmap, which the TorchScript
+        # tracer cannot follow; a ready 4D additive mask is used as-is.
+        positions = torch.cumsum(torch.ones_like(input_ids[0]), dim=0)
+        allowed = (positions[None, :] <= positions[:, None])[None, None] & attention_mask[:, None, None, :].bool()
+        mask = torch.zeros(allowed.shape, dtype=torch.float32).masked_fill(~allowed, torch.finfo(torch.float32).min)
+        outputs = self.model(
+            input_ids=input_ids,
+            attention_mask=mask,
+            use_cache=False,
+        )
+        return outputs.last_hidden_state
+
+
+def model_cache_dir(model_name: str, cache_dir: str = ONNX_CACHE_DIR) -> Path:
+    return Path(cache_dir) / model_name.replace("/", "--")
+
+
+def export_onnx(
+    model_name: str,
+    *,
+    cache_dir: str = ONNX_CACHE_DIR,
+    quantize: bool = False,
+    opset: int = ONNX_OPSET,
+) -> Path:
+    """
+    Export the encoder of ``model_name`` to ONNX once and return the cached path.
+
+    The float32 graph is always written; with ``quantize`` an int8 dynamically
+    quantized copy is derived from it. Existing files are reused.
+    """
+    target_dir = model_cache_dir(model_name, cache_dir)
+    fp32_path = target_dir / "model.onnx"
+    int8_path = target_dir / "model.int8.onnx"
+
+    if not fp32_path.exists():
+        target_dir.mkdir(parents=True, exist_ok=True)
+        causal_lm = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            dtype=torch.float32,
+            attn_implementation="eager",
+        )
+        encoder = _EncoderWrapper(causal_lm.model).eval()
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        dummy = tokenizer(["export", "onnx encoder"], return_tensors="pt", padding=True)
+
+        with torch.inference_mode():
+            torch.onnx.export(
+                encoder,
+                (dummy["input_ids"], dummy["attention_mask"]),
+                str(fp32_path),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "last_hidden_state": {0: "batch", 1: "sequence"},
+                },
+                opset_version=opset,
+                dynamo=False,
+            )
+        tokenizer.save_pretrained(target_dir)
+
+    if not quantize:
+        return fp32_path
+
+    if not int8_path.exists():
+        quantize_dynamic(
+            model_input=str(fp32_path),
+            model_output=str(int8_path),
+            weight_type=QuantType.QInt8,
+            use_external_data_format=True,
+        )
+    return int8_path
+
+
+def mean_pool(hidden: NDArray[np.float32], attention_mask: NDArray[np.int64]) -> NDArray[np.float32]:
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (hidden * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1.0, None)
+    return (summed / counts).astype(np.float32)
+
+
+class OnnxQwenEmbedding(BaseEmbed):
+    """
+    CPU embedding backend that runs the exported Qwen encoder through ONNX Runtime.
+
+    Produces the same mean-pooled vectors as ``QwenEmbedding`` without loading torch
+    weights at inference time.
+    """
+
+    def __init__(
+        self,
+        *,
+        model_name: str = "Qwen/Qwen2.5-0.5B-Instruct",
+        quantize: bool = True,
+        cache_dir: str = ONNX_CACHE_DIR,
+        max_length: int = 512,
+        num_threads: int | None = None,
+        normalize: bool = True,
+    ):
+        self.model_name = model_name
+        self.normalize = normalize
+        self.max_length = max_length
+        self.model_path = export_onnx(model_name, cache_dir=cache_dir, quantize=quantize)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_path.parent)
+        if self.tokenizer.pad_token_id is None:
+            self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(self.model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+
+    def encode_sync(self, context: List[str]) -> NDArray[np.float32]:
+        toks = self.tokenizer(
+            context,
+            return_tensors="np",
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+        )
+        feeds = {
+            "input_ids": toks["input_ids"].astype(np.int64),
+            "attention_mask": toks["attention_mask"].astype(np.int64),
+        }
+        (hidden,) = self.session.run(["last_hidden_state"], feeds)
+        embeddings = mean_pool(hidden, feeds["attention_mask"])
+        if self.normalize:
+            return l2_normalize(embeddings)
+        return embeddings
+
+    async def encode(self, context: List[str]) -> NDArray[np.float32]:
+        if not context:
+            return np.empty((0, 0), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.encode_sync, list(context))
+
+
+def check_parity(
+    onnx_model: OnnxQwenEmbedding,
+    torch_model: BaseEmbed,
+    context: List[str],
+) -> Dict[str, float]:
+    """
+    Compare ONNX embeddings against the torch path on the same inputs.
+
+    Returns the largest absolute element difference and the smallest cosine
+    similarity between matching rows.
+    """
+    expected = torch_model.encode_sync(context)
+    actual = onnx_model.encode_sync(context)
+
+    cosine = (l2_normalize(expected) * l2_normalize(actual)).sum(axis=1)
+
+    return {
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+        "min_cosine": float(cosine.min()),
+    }
+
+
+if __name__ == "__main__":
+    from KG_builder.embedding.load.free import QwenEmbedding
+    from KG_builder.utils.utils import perf
+
+    samples = ["NGUYỄN VĂN TUẤN", "Trường Đại học Bách khoa Hà Nội", "18 - 11 - 1975"] * 32
+
+    onnx_model = OnnxQwenEmbedding(model_name="Qwen/Qwen2.5-0.5B-Instruct", quantize=True)
+    torch_model = QwenEmbedding(model_name="Qwen/Qwen2.5-0.5B-Instruct")
+
+    @perf
+    def onnx_encode():
+        return onnx_model.encode_sync(samples)
+
+    @perf
+    def torch_encode():
+        return torch_model.encode_sync(samples)
+
+    onnx_encode()
+    torch_encode()
+    print(check_parity(onnx_model, torch_model, samples[:3]))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import struct
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List
+
+import numpy as np
+from numpy.typing import NDArray
+
+from KG_builder.config import EMBED_SERVER_SOCKET
+from KG_builder.embedding.load.base import BaseEmbed
+
+# Frames are a 4-byte big-endian length followed by a UTF-8 JSON body.
+_HEADER = struct.Struct(">I")
+
+
+class EmbeddingServerError(Exception):
+    """Raised when the embedding server reports a failure"""
+    pass
+
+
+def encode_frame(payload: Dict[str, Any]) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(size - len(chunks))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        chunks.extend(chunk)
+    return bytes(chunks)
+
+
+def recv_frame(sock: socket.socket) -> Dict[str, Any]:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return json.loads((await reader.readexactly(size)).decode("utf-8"))
+
+
+def create_shared_matrix(matrix: NDArray[np.float32]) -> str:
+    """
+    Copy ``matrix`` into a fresh shared-memory block and return its name.
+
+    The block is detached from this process' resource tracker; the reader owns
+    it and unlinks it after attaching. Blocks nobody attaches to are removed
+    with ``release_shared_matrix``.
+    """
+    try:
+        shm = SharedMemory(create=True, size=max(matrix.nbytes, 1), track=False)
+    except TypeError:
+        # Python < 3.13 has no ``track`` flag.
+        shm = SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        resource_tracker.unregister(shm._name, "shared_memory")
+    np.ndarray(matrix.shape, dtype=np.float32, buffer=shm.buf)[:] = matrix
+    name = shm.name
+    shm.close()
+    return name
+
+
+def attach_shared_matrix(response: Dict[str, Any]) -> NDArray[np.float32]:
+    if response.get("error"):
+        raise EmbeddingServerError(response["error"])
+
+    shape = tuple(response["shape"])
+    if not response.get("shm"):
+        return np.empty(shape, dtype=np.float32)
+
+    shm = SharedMemory(name=response["shm"])
+    try:
+        return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def release_shared_matrix(name: str) -> bool:
+    """Unlink the block ``name`` if it still exists; False when it was already claimed."""
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()
+    return True
+
+
+class RemoteEmbedding(BaseEmbed):
+    """
+    Client for ``KG_builder.embedding.server``.
+
+    Sends texts over a Unix socket and reads the float32 matrix back from shared
+    memory, so every worker on a host shares the server's model weights. The
+    matrix is claimed before the connection closes: the server unlinks any
+    block still left once the client has gone, e.g. after a timeout.
+    """
+
+    def __init__(self, *, socket_path: str = EMBED_SERVER_SOCKET, timeout: float | None = None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def encode_sync(self, context: List[str]) -> NDArray[np.float32]:
+        if not context:
+            return np.empty((0, 0), dtype=np.float32)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(encode_frame({"texts": list(context)}))
+            return attach_shared_matrix(recv_frame(sock))
+
+    async def encode(self, context: List[str]) -> NDArray[np.float32]:
+        if not context:
+            return np.empty((0, 0), dtype=np.float32)
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        try:
+            writer.write(encode_frame({"texts": list(context)}))
+            await writer.drain()
+            response = await asyncio.wait_for(read_frame(reader), self.timeout)
+            return attach_shared_matrix(response)
+        finally:
+            writer.close()
+            await writer.wait_closed()
@@ -0,0 +1,219 @@
+"""
+Local embedding server shared by every builder process on a host.
+
+One server loads N model replicas in worker processes pinned to disjoint CPU
+sets. Builders connect through ``RemoteEmbedding`` over a Unix socket; results
+come back as float32 matrices in shared memory instead of over the socket.
+
+    python -m KG_builder.embedding.server --replicas 2 --threads 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import multiprocessing as mp
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from KG_builder.config import EMBED_SERVER_SOCKET
+from KG_builder.embedding.load.remote import (
+    create_shared_matrix,
+    encode_frame,
+    read_frame,
+    release_shared_matrix,
+)
+
+
+def _load_model(model_name: str, backend: str, threads: int):
+    if backend == "onnx":
+        from KG_builder.embedding.load.onnx_model import OnnxQwenEmbedding
+
+        return OnnxQwenEmbedding(model_name=model_name, num_threads=threads)
+
+    import torch
+    from KG_builder.embedding.load.free import QwenEmbedding
+
+    torch.set_num_threads(threads)
+    return QwenEmbedding(model_name=model_name)
+
+
+def _replica_main(
+    index: int,
+    cpus: List[int],
+    model_name: str,
+    backend: str,
+    tasks: mp.Queue,
+    results: mp.Queue,
+) -> None:
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    model = _load_model(model_name, backend, max(len(cpus), 1))
+    print(f"Embedding replica {index} ready on cpus {cpus}")
+
+    while True:
+        job = tasks.get()
+        if job is None:
+            break
+        request_id, texts = job
+        try:
+            matrix = np.ascontiguousarray(model.encode_sync(texts), dtype=np.float32)
+            results.put((request_id, create_shared_matrix(matrix), list(matrix.shape), None))
+        except Exception as e:
+            results.put((request_id, None, None, f"{type(e).__name__}: {e}"))
+
+
+class EmbeddingServer:
+    def __init__(
+        self,
+        *,
+        socket_path: str = EMBED_SERVER_SOCKET,
+        model_name: str = "Qwen/Qwen2.5-0.5B-Instruct",
+        replicas: int = 1,
+        threads_per_replica: Optional[int] = None,
+        backend: str = "torch",
+    ):
+        if replicas <= 0:
+            raise ValueError("replicas must be positive.")
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.replicas = replicas
+        self.threads_per_replica = threads_per_replica
+        self.backend = backend
+
+        ctx = mp.get_context("spawn")
+        self._ctx = ctx
+        self._tasks: mp.Queue = ctx.Queue()
+        self._results: mp.Queue = ctx.Queue()
+        self._processes: List[mp.Process] = []
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def cpu_sets(self) -> List[List[int]]:
+        """Split the CPUs available to this process into one block per replica."""
+        if hasattr(os, "sched_getaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+        else:
+            cpus = list(range(os.cpu_count() or 1))
+        per_replica = self.threads_per_replica or max(len(cpus) // self.replicas, 1)
+        return [
+            cpus[i * per_replica : (i + 1) * per_replica] or cpus[:per_replica]
+            for i in range(self.replicas)
+        ]
+
+    def start(self) -> None:
+        for index, cpus in enumerate(self.cpu_sets()):
+            process = self._ctx.Process(
+                target=_replica_main,
+                args=(index, cpus, self.model_name, self.backend, self._tasks, self._results),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self) -> None:
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+        self._results.put(None)
+        self._processes.clear()
+
+    async def serve_forever(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        threading.Thread(target=self._drain_results, daemon=True).start()
+
+        Path(self.socket_path).unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        print(f"Embedding server listening on {self.socket_path} with {self.replicas} replica(s)")
+        async with server:
+            await server.serve_forever()
+
+    def _drain_results(self) -> None:
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            self._loop.call_soon_threadsafe(self._resolve, item)
+
+    def _resolve(self, item) -> None:
+        request_id, shm_name, shape, error = item
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            # Nobody is waiting for this matrix any more; free the block ourselves.
+            if shm_name:
+                release_shared_matrix(shm_name)
+            return
+        future.set_result({"shm": shm_name, "shape": shape, "error": error})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # A client attaches to its matrix before it sends again or disconnects,
+        # so a block that still exists by then was abandoned (client timeout).
+        unclaimed: Optional[str] = None
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                finally:
+                    if unclaimed:
+                        release_shared_matrix(unclaimed)
+                        unclaimed = None
+
+                texts = request.get("texts") or []
+                if not texts:
+                    response = {"shm": None, "shape": [0, 0], "error": None}
+                else:
+                    request_id = next(self._ids)
+                    future = self._loop.create_future()
+                    self._pending[request_id] = future
+                    self._tasks.put((request_id, list(texts)))
+                    response = await future
+
+                unclaimed = response["shm"]
+                writer.write(encode_frame(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if unclaimed:
+                release_shared_matrix(unclaimed)
+            writer.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve embeddings to local builder processes.")
+    parser.add_argument("--socket", default=EMBED_SERVER_SOCKET)
+    parser.add_argument("--model", default="Qwen/Qwen2.5-0.5B-Instruct")
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads pinned to each replica.")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    server = EmbeddingServer(
+        socket_path=args.socket,
+        model_name=args.model,
+        replicas=args.replicas,
+        threads_per_replica=args.threads,
+        backend=args.backend,
+    )
+    server.start()
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+from KG_builder.embedding.storages.entity_storage import EntityStorage
+from KG_builder.embedding.storages.predicate_storage import PredicateStorage
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Set, Tuple
+
+import faiss
+import numpy as np
+from numpy.typing import NDArray
+
+# Rebuild the graph once more than this share of stored vectors is tombstoned.
+COMPACT_RATIO = 0.2
+# Write the index file after this many added or removed vectors without a flush.
+SAVE_EVERY = 10000
+
+
+class FaissStorage(ABC):
+    """
+    In-process HNSW index over L2-normalized embeddings keyed by int64 ids.
+
+    Search uses inner product and reports ``1 - <a, b>``, the same cosine
+    distance the pgvector services return. HNSW graphs cannot delete nodes, so
+    ``remove`` tombstones ids and the graph is rebuilt from the live vectors once
+    tombstones pass ``COMPACT_RATIO``.
+
+    With ``index_path`` the index (and a ``.deleted.npy`` tombstone sidecar) is
+    loaded on start and written on the first change, then by ``flush`` (or after
+    ``SAVE_EVERY`` changed vectors); ``None`` keeps it in memory.
+    """
+
+    def __init__(
+        self,
+        index_path: str | None = None,
+        d: int = 896,
+        M: int = 32,
+        efConstruction: int = 200,
+        efSearch: int = 64,
+    ):
+        self.index_path = Path(index_path) if index_path else None
+        self.d = d
+        self.M = M
+        self.efConstruction = efConstruction
+        self.efSearch = efSearch
+
+        self._deleted: Set[int] = set()
+        self._unsaved = 0
+        if self.index_path and self.index_path.exists():
+            self.index = faiss.read_index(str(self.index_path))
+            if self.index.d != d:
+                raise ValueError(f"Index at {self.index_path} has dimension {self.index.d}, expected {d}.")
+            if self._deleted_path.exists():
+                self._deleted = set(np.load(self._deleted_path).tolist())
+        else:
+            self.index = self._new_index()
+        self._ids: Set[int] = set(faiss.vector_to_array(self.index.id_map).tolist())
+        self.set_efSearch(efSearch)
+
+    @property
+    def _deleted_path(self) -> Path:
+        return self.index_path.with_name(self.index_path.name + ".deleted.npy")
+
+    def _new_index(self) -> faiss.IndexIDMap2:
+        hnsw = faiss.IndexHNSWFlat(self.d, self.M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = self.efConstruction
+        return faiss.IndexIDMap2(hnsw)
+
+    def _hnsw(self) -> faiss.IndexHNSWFlat:
+        return faiss.downcast_index(self.index.index)
+
+    def set_efSearch(self, efSearch: int) -> None:
+        self.efSearch = efSearch
+        self._hnsw().hnsw.efSearch = efSearch
+
+    def count(self) -> int:
+        return self.index.ntotal - len(self._deleted)
+
+    def add(self, embeddings: NDArray[np.float32], ids: NDArray[np.int64]) -> None:
+        """
+        Insert vectors under ``ids``. Ids that are already stored keep their
+        vector (database embeddings never change); tombstoned ones are revived.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1, self.d)
+        ids = np.ascontiguousarray(ids, dtype=np.int64).reshape(-1)
+        if len(embeddings) != len(ids):
+            raise ValueError("embeddings and ids must have the same length.")
+
+        revived = self._deleted.intersection(ids.tolist())
+        self._deleted.difference_update(revived)
+        _, first = np.unique(ids, return_index=True)
+        new = np.asarray([i for i in np.sort(first) if int(ids[i]) not in self._ids], dtype=np.int64)
+        if len(new):
+            self.index.add_with_ids(embeddings[new], ids[new])
+            self._ids.update(ids[new].tolist())
+        self._changed(len(new) + len(revived))
+
+    def remove(self, ids: NDArray[np.int64]) -> int:
+        """Tombstone ``ids`` and return how many live vectors were removed."""
+        live = (self._ids - self._deleted).intersection(np.asarray(ids, dtype=np.int64).reshape(-1).tolist())
+        if not live:
+            return 0
+        self._deleted.update(live)
+        if len(self._deleted) > COMPACT_RATIO * self.index.ntotal:
+            self._compact()
+        self._changed(len(live))
+        return len(live)
+
+    def search(self, queries: NDArray[np.float32], k: int) -> Tuple[NDArray[np.float32], NDArray[np.int64]]:
+        """
+        Return ``(D, I)`` of shape ``(n, k)`` sorted by cosine distance.
+
+        Rows with fewer than ``k`` live neighbours are padded with ``inf`` / ``-1``.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.d)
+        D = np.full((len(queries), k), np.inf, dtype=np.float32)
+        I = np.full((len(queries), k), -1, dtype=np.int64)
+        if self.index.ntotal == 0 or len(queries) == 0:
+            return D, I
+
+        # Over-fetch so that k live results remain after dropping tombstones.
+        fetch = min(k + len(self._deleted), self.index.ntotal)
+        scores, labels = self.index.search(queries, fetch)
+        for row, (row_scores, row_labels) in enumerate(zip(scores, labels)):
+            keep = [
+                (1.0 - score, label)
+                for score, label in zip(row_scores, row_labels)
+                if label >= 0 and label not in self._deleted
+            ][:k]
+            for col, (distance, label) in enumerate(keep):
+                D[row, col] = distance
+                I[row, col] = label
+        return D, I
+
+    def _compact(self) -> None:
+        live = np.asarray(sorted(self._ids - self._deleted), dtype=np.int64)
+        vectors = (
+            np.vstack([self.index.reconstruct(int(i)) for i in live])
+            if len(live) else np.empty((0, self.d), dtype=np.float32)
+        )
+        self.index = self._new_index()
+        self.set_efSearch(self.efSearch)
+        if len(live):
+            self.index.add_with_ids(vectors, live)
+        self._ids = set(live.tolist())
+        self._deleted.clear()
+
+    def _changed(self, n: int) -> None:
+        self._unsaved += n
+        first_write = self.index_path is not None and not self.index_path.exists()
+        if n and (first_write or self._unsaved >= SAVE_EVERY):
+            self.save()
+
+    def flush(self) -> None:
+        """Write the index if anything changed since it was last saved."""
+        if self._unsaved:
+            self.save()
+
+    def save(self) -> None:
+        self._unsaved = 0
+        if self.index_path is None:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        faiss.write_index(self.index, str(tmp_path))
+        os.replace(tmp_path, self.index_path)
+        if self._deleted:
+            np.save(self._deleted_path, np.asarray(sorted(self._deleted), dtype=np.int64))
+        else:
+            self._deleted_path.unlink(missing_ok=True)
+
+    def reset(self) -> None:
+        self.index = self._new_index()
+        self.set_efSearch(self.efSearch)
+        self._ids.clear()
+        self._deleted.clear()
+        self._unsaved = 0
+
+    @abstractmethod
+    def _db_model(self):
+        """Return the ORM model whose ``embedding`` column this index mirrors."""
+
+    def sync_from_db(self, batch_size: int = 10000) -> int:
+        """Rebuild the index from the pgvector table backing this storage."""
+        import sqlalchemy as sa
+        from KG_builder.models.db_engine import SessionLocal
+
+        model = self._db_model()
+        self.index = self._new_index()
+        self.set_efSearch(self.efSearch)
+        self._ids.clear()
+        self._deleted.clear()
+
+        with SessionLocal() as session:
+            rows = session.execute(
+                sa.select(model.id, model.embedding).where(model.embedding.is_not(None))
+                .execution_options(yield_per=batch_size)
+            )
+            for chunk in rows.partitions():
+                ids = np.asarray([row[0] for row in chunk], dtype=np.int64)
+                vectors = np.asarray([row[1] for row in chunk], dtype=np.float32)
+                self.index.add_with_ids(vectors, ids)
+                self._ids.update(ids.tolist())
+
+        self.save()
+        return self.count()
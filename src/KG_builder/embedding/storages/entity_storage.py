@@ -0,0 +1,10 @@
+from KG_builder.embedding.storages.base import FaissStorage
+
+
+class EntityStorage(FaissStorage):
+    """FAISS mirror of the ``entity`` table, keyed by ``Entity.id``."""
+
+    def _db_model(self):
+        from KG_builder.models.db_engine import Entity
+
+        return Entity
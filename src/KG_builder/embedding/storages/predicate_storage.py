@@ -0,0 +1,10 @@
+from KG_builder.embedding.storages.base import FaissStorage
+
+
+class PredicateStorage(FaissStorage):
+    """FAISS mirror of the ``relation_types`` table, keyed by ``RelationType.id``."""
+
+    def _db_model(self):
+        from KG_builder.models.db_engine import RelationType
+
+        return RelationType
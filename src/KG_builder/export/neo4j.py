@@ -0,0 +1,332 @@
+"""
+Bulk export of canonical triples into Neo4j.
+
+Triples come from builder JSON output or from the ``triples`` table (SQLite
+``--db-path`` or Postgres ``DB_URI``). ``load`` streams them into a running
+server with parameterized ``UNWIND`` batches; ``csv`` writes files for the
+initial ``neo4j-admin database import``.
+
+Entity objects become ``:Entity`` nodes; typed literal objects (dates, phones,
+emails, numbers) become ``:Literal`` nodes keyed by ``(type, value)``, so
+values never masquerade as entities.
+
+    python -m KG_builder.export.neo4j load --json output/*.json
+    python -m KG_builder.export.neo4j load --db-path kg.db --batch-size 5000
+    python -m KG_builder.export.neo4j csv --pg --out-dir import/
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from neo4j import GraphDatabase
+
+from KG_builder.utils.literals import ENTITY
+from KG_builder.utils.utils import hash_id
+
+BATCH_SIZE = 5000
+# neo4j-admin splits array properties on this character; evidence sentences
+# routinely contain ';' (the tool's default), so use the unit separator.
+ARRAY_DELIMITER = "\x1f"
+
+CONSTRAINTS = [
+    "CREATE CONSTRAINT entity_name_unique IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE",
+    "CREATE CONSTRAINT rel_id_unique IF NOT EXISTS FOR ()-[r:REL]-() REQUIRE r.id IS UNIQUE",
+    "CREATE CONSTRAINT literal_value_unique IF NOT EXISTS FOR (l:Literal) REQUIRE (l.type, l.value) IS UNIQUE",
+]
+
+MERGE_NODES = """
+UNWIND $names AS name
+MERGE (:Entity {name: name})
+"""
+
+MERGE_RELATIONSHIPS = """
+UNWIND $rows AS row
+MATCH (s:Entity {name: row.subject})
+MATCH (o:Entity {name: row.object})
+MERGE (s)-[r:REL {id: row.id}]->(o)
+ON CREATE SET r.predicate = row.predicate, r.sources = row.sources
+ON MATCH SET r.sources = r.sources + [x IN row.sources WHERE NOT x IN r.sources]
+"""
+
+MERGE_LITERAL_RELATIONSHIPS = """
+UNWIND $rows AS row
+MATCH (s:Entity {name: row.subject})
+MERGE (o:Literal {type: row.object_type, value: row.object})
+MERGE (s)-[r:REL {id: row.id}]->(o)
+ON CREATE SET r.predicate = row.predicate, r.sources = row.sources
+ON MATCH SET r.sources = r.sources + [x IN row.sources WHERE NOT x IN r.sources]
+"""
+
+DELETE_RELATIONSHIPS = """
+UNWIND $ids AS id
+MATCH ()-[r:REL {id: id}]->()
+DELETE r
+"""
+
+
+@dataclass
+class TripleRow:
+    id: str
+    subject: str
+    predicate: str
+    object: str
+    sources: List[str] = field(default_factory=list)
+    # ENTITY, or the literal type of ``object`` (then its normalized value).
+    object_type: str = ENTITY
+
+    @property
+    def is_literal(self) -> bool:
+        return self.object_type != ENTITY
+
+    def as_param(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "subject": self.subject,
+            "predicate": self.predicate,
+            "object": self.object,
+            "object_type": self.object_type,
+            "sources": self.sources,
+        }
+
+
+def iter_json_triples(paths: Sequence[str]) -> Iterator[TripleRow]:
+    """Triples from builder output files (``{"stages": [{"triples": [...]}]}``)."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for stage in data.get("stages", []):
+            if not isinstance(stage, dict):
+                continue
+            for triple in stage.get("triples", []):
+                subject, predicate, obj = (triple.get(k) for k in ("subject", "predicate", "object"))
+                if not (subject and predicate and obj):
+                    continue
+                source = (triple.get("metadata") or {}).get("source")
+                object_type = triple.get("object_type") or ENTITY
+                yield TripleRow(
+                    id=triple.get("triple_id") or hash_id("T", subject, predicate, obj),
+                    subject=subject,
+                    predicate=predicate,
+                    object=(triple.get("object_value") or obj) if object_type != ENTITY else obj,
+                    sources=[source] if source else [],
+                    object_type=object_type,
+                )
+
+
+def iter_json_deleted(paths: Sequence[str]) -> Iterator[str]:
+    """Triple ids an incremental build deleted from the store (``"delta"`` of the output)."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield from (data.get("delta") or {}).get("deleted", [])
+
+
+_TRIPLES_SQL = """
+SELECT t.id, s.{name} AS subject, p.{type} AS predicate, COALESCE(o.{name}, t.object_value) AS object,
+       t.object_type, pr.evidence
+FROM triples t
+JOIN {entity} s ON s.id = t.subject_id
+LEFT JOIN {entity} o ON o.id = t.object_id
+JOIN {predicate} p ON p.id = t.predicate_id
+LEFT JOIN triple_provenance pr ON pr.triple_id = t.id
+ORDER BY t.id
+"""
+
+
+def _group_rows(rows: Iterable[Sequence]) -> Iterator[TripleRow]:
+    for triple_id, group in itertools.groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        _, subject, predicate, obj, object_type, _ = group[0]
+        sources = list(dict.fromkeys(row[5] for row in group if row[5]))
+        yield TripleRow(id=triple_id, subject=subject, predicate=predicate, object=obj, sources=sources,
+                        object_type=object_type)
+
+
+def iter_sqlite_triples(db_path: str) -> Iterator[TripleRow]:
+    from KG_builder.models.db import DB
+
+    db = DB(db_path)
+    try:
+        sql = _TRIPLES_SQL.format(name="name", type="name", entity="entities", predicate="predicates")
+        yield from _group_rows(db.execute(sql))
+    finally:
+        db.close()
+
+
+def iter_pg_triples(batch_size: int = BATCH_SIZE) -> Iterator[TripleRow]:
+    import sqlalchemy as sa
+    from KG_builder.models.db_engine import engine
+
+    sql = _TRIPLES_SQL.format(name="name", type="type", entity="entity", predicate="relation_types")
+    with engine.connect() as conn:
+        rows = conn.execution_options(yield_per=batch_size).execute(sa.text(sql))
+        yield from _group_rows(rows)
+
+
+def batched(rows: Iterable[TripleRow], size: int) -> Iterator[List[TripleRow]]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _write_batch(tx, batch: List[TripleRow]) -> None:
+    entity_rows = [row for row in batch if not row.is_literal]
+    literal_rows = [row for row in batch if row.is_literal]
+    names = list(dict.fromkeys(
+        [row.subject for row in batch] + [row.object for row in entity_rows]
+    ))
+    tx.run(MERGE_NODES, names=names).consume()
+    if entity_rows:
+        tx.run(MERGE_RELATIONSHIPS, rows=[row.as_param() for row in entity_rows]).consume()
+    if literal_rows:
+        tx.run(MERGE_LITERAL_RELATIONSHIPS, rows=[row.as_param() for row in literal_rows]).consume()
+
+
+def _delete_batch(tx, ids: List[str]) -> None:
+    tx.run(DELETE_RELATIONSHIPS, ids=ids).consume()
+
+
+def load(
+    rows: Iterable[TripleRow],
+    *,
+    uri: str,
+    user: str,
+    password: str,
+    database: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+    deleted: Iterable[str] = (),
+) -> Dict[str, float]:
+    """
+    Stream ``rows`` into Neo4j, one write transaction per batch, after
+    removing the relationships whose triple ids are in ``deleted``.
+    """
+    total = 0
+    start = perf_counter()
+    with GraphDatabase.driver(uri, auth=(user, password)) as driver:
+        with driver.session(database=database) as session:
+            for constraint in CONSTRAINTS:
+                session.run(constraint).consume()
+            for batch in batched(deleted, batch_size):
+                session.execute_write(_delete_batch, batch)
+            for batch in batched(rows, batch_size):
+                session.execute_write(_write_batch, batch)
+                total += len(batch)
+                elapsed = perf_counter() - start
+                print(f"{total} triples loaded ({total / elapsed:.0f} rows/sec)")
+    elapsed = perf_counter() - start
+    return {"rows": total, "seconds": elapsed, "rows_per_sec": total / elapsed if elapsed else 0.0}
+
+
+def write_import_csv(rows: Iterable[TripleRow], out_dir: str) -> Dict[str, float]:
+    """
+    Write ``entities.csv``, ``literals.csv`` and their relationship files for
+    ``neo4j-admin database import``; nodes and triple ids are de-duplicated
+    while streaming.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    seen_names: set = set()
+    seen_literals: set = set()
+    seen_ids: set = set()
+    total = 0
+    start = perf_counter()
+
+    with open(out / "entities.csv", "w", encoding="utf-8", newline="") as nodes_file, \
+            open(out / "literals.csv", "w", encoding="utf-8", newline="") as literals_file, \
+            open(out / "relationships.csv", "w", encoding="utf-8", newline="") as rels_file, \
+            open(out / "literal_relationships.csv", "w", encoding="utf-8", newline="") as literal_rels_file:
+        nodes = csv.writer(nodes_file)
+        literals = csv.writer(literals_file)
+        rels = csv.writer(rels_file)
+        literal_rels = csv.writer(literal_rels_file)
+        nodes.writerow(["name:ID(Entity)", ":LABEL"])
+        literals.writerow(["key:ID(Literal)", "type", "value", ":LABEL"])
+        rels.writerow([":START_ID(Entity)", ":END_ID(Entity)", ":TYPE", "id", "predicate", "sources:string[]"])
+        literal_rels.writerow([":START_ID(Entity)", ":END_ID(Literal)", ":TYPE", "id", "predicate", "sources:string[]"])
+
+        for row in rows:
+            if row.id in seen_ids:
+                continue
+            seen_ids.add(row.id)
+            for name in (row.subject,) if row.is_literal else (row.subject, row.object):
+                if name not in seen_names:
+                    seen_names.add(name)
+                    nodes.writerow([name, "Entity"])
+            end = row.object
+            if row.is_literal:
+                # Same "type:value" key the triple ids hash (utils.literals.triple_id).
+                end = f"{row.object_type}:{row.object}"
+                if end not in seen_literals:
+                    seen_literals.add(end)
+                    literals.writerow([end, row.object_type, row.object, "Literal"])
+            (literal_rels if row.is_literal else rels).writerow([
+                row.subject, end, "REL", row.id, row.predicate,
+                ARRAY_DELIMITER.join(source.replace(ARRAY_DELIMITER, " ") for source in row.sources),
+            ])
+            total += 1
+
+    elapsed = perf_counter() - start
+    print(
+        f"Wrote {len(seen_names)} entities, {len(seen_literals)} literals and {total} relationships to {out} "
+        f"({total / elapsed if elapsed else 0.0:.0f} rows/sec). Import with:\n"
+        f"  neo4j-admin database import full --array-delimiter=U+001F "
+        f"--nodes={out / 'entities.csv'} --nodes={out / 'literals.csv'} "
+        f"--relationships={out / 'relationships.csv'} --relationships={out / 'literal_relationships.csv'} <database>"
+    )
+    return {"rows": total, "seconds": elapsed, "rows_per_sec": total / elapsed if elapsed else 0.0}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export canonical triples to Neo4j.")
+    parser.add_argument("mode", choices=["load", "csv"], help="Load into a live server or write neo4j-admin CSVs.")
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--json", nargs="+", help="Builder output files.")
+    source.add_argument("--db-path", help="SQLite database written by the builder.")
+    source.add_argument("--pg", action="store_true", help="Read the triples table at DB_URI.")
+
+    parser.add_argument("--uri", default=os.getenv("NEO4J_URI", "neo4j://localhost:7687"))
+    parser.add_argument("--user", default=os.getenv("NEO4J_USER", "neo4j"))
+    parser.add_argument("--password", default=os.getenv("NEO4J_PASSWORD", ""))
+    parser.add_argument("--database", default=os.getenv("NEO4J_DATABASE"))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--out-dir", default="import")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    deleted: Iterable[str] = ()
+    if args.json:
+        rows = iter_json_triples(args.json)
+        deleted = iter_json_deleted(args.json)
+    elif args.db_path:
+        rows = iter_sqlite_triples(args.db_path)
+    else:
+        rows = iter_pg_triples(args.batch_size)
+
+    if args.mode == "csv":
+        stats = write_import_csv(rows, args.out_dir)
+    else:
+        stats = load(
+            rows,
+            uri=args.uri,
+            user=args.user,
+            password=args.password,
+            database=args.database,
+            batch_size=args.batch_size,
+            deleted=deleted,
+        )
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
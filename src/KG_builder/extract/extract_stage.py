@@ -32,13 +32,14 @@ class Stage:
         if not self.main_subject:
             self.main_subject = ""
             
+        # System prompt first: it is the prefix local models cache across calls.
         messages = [
+            {"role": "system", "content": self.system_instruction},
             {"role": "user", "content": self.context.format(
                 main_subject=self.main_subject,
                 predicates=self.predicates,
                 text=self.text
-            )},
-            {"role": "system", "content": self.system_instruction}
+            )}
         ]
         return messages
     
@@ -1,6 +1,6 @@
 
 from KG_builder.llm.base.async_base_mode import AsyncBaseLLM
-from google import genai
+from KG_builder.llm.credentials import gemini_pool
 from google.genai.types import GenerateContentConfig
 # from openai import OpenAI
 import asyncio
@@ -19,7 +19,7 @@ class AsyncCostModel(AsyncBaseLLM):
 class AsyncGeminiModel(AsyncCostModel):
     def __init__(self, **args):
         super().__init__(**args)
-        self.instance = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+        self.pool = gemini_pool()
         
         
     async def generate_response(self, context: str, **args):
@@ -27,15 +27,12 @@ class AsyncGeminiModel(AsyncCostModel):
             system_instruction=args.get("system"),
         )
         
-        event_loop = asyncio.get_event_loop()
-        
-        response = await event_loop.run_in_executor(
-            None,
-            lambda: self.instance.models.generate_content(
-                    model=self.name,
-                    contents=context, 
-                    config=config
-                )
+        response = await self.pool.acall(
+            lambda client: client.models.generate_content(
+                model=self.name,
+                contents=context,
+                config=config
+            )
         )
         
         return response.text
@@ -1,9 +1,8 @@
 from KG_builder.llm.base.base_model import BaseLLM
-from google import genai
+from KG_builder.llm.credentials import NoCredentialError, gemini_pool
 from google.genai import types
 from google.genai.types import GenerateContentConfig
 # from openai import OpenAI
-import os
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -46,16 +45,10 @@ def _reformat_messages(messages: list):
 class GeminiModel(CostModel):
     def __init__(self, **args):
         super().__init__(**args)
-        self.api_key = os.environ["GEMINI_API_KEY"]
-        
-        if not self.api_key:
-            raise ValueError("Set api key in .env file of pass an valid api key")
-        
-        try: 
-            self.instance = genai.Client(api_key=self.api_key)
-        
-        except Exception as e:
-            raise CostModelAPIError(f"Failed to connect to Gemini: {str(e)}")
+        try:
+            self.pool = gemini_pool()
+        except NoCredentialError:
+            raise ValueError("Set GEMINI_API_KEYS or GEMINI_API_KEY in the .env file")
 
 
     def generate_response(self, messages: list, **args):
@@ -79,10 +72,12 @@ class GeminiModel(CostModel):
         config = GenerateContentConfig(**config_params)
         
         try:
-            response = self.instance.models.generate_content(
-                model=self.name,
-                contents=context, 
-                config=config
+            response = self.pool.call(
+                lambda client: client.models.generate_content(
+                    model=self.name,
+                    contents=context,
+                    config=config
+                )
             )
             # check if text in response format
             if hasattr(response, "text"):
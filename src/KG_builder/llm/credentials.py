@@ -0,0 +1,260 @@
+"""
+Pool of Gemini API keys shared by every Gemini client in the process.
+
+Keys come from, in order of precedence:
+
+- ``GEMINI_API_KEYS_FILE``: a JSON list of ``{"key", "project", "rpm"}``
+  objects, or a text file with one ``key[@project][:rpm]`` entry per line;
+- ``GEMINI_API_KEYS``: comma-separated ``key[@project][:rpm]`` entries;
+- ``GEMINI_API_KEY``: a single key.
+
+``GEMINI_KEY_RPM`` is the requests-per-minute budget of keys that do not set
+their own (0 disables pacing). Each request goes to the key whose next
+request slot comes first; throttled keys (429) sit out an exponentially
+growing cooldown and keys rejected as invalid (401/403) are dropped. Set
+``GEMINI_USAGE_PATH`` to write per-key usage as JSON when the process exits.
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+from google import genai
+
+load_dotenv()
+
+T = TypeVar("T")
+
+COOLDOWN_SECONDS = 30.0
+MAX_COOLDOWN_SECONDS = 600.0
+
+
+class NoCredentialError(Exception):
+    pass
+
+
+def _status(error: Exception) -> Optional[int]:
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+@dataclass
+class KeyState:
+    key: str
+    project: Optional[str] = None
+    rpm: int = 0
+    client: Optional[genai.Client] = field(default=None, repr=False)
+
+    next_slot: float = 0.0
+    last_used: int = 0
+    cooldown_until: float = 0.0
+    consecutive_throttles: int = 0
+    disabled: bool = False
+
+    requests: int = 0
+    successes: int = 0
+    throttled: int = 0
+    errors: int = 0
+    last_error: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        masked = f"...{self.key[-4:]}"
+        return f"{self.project}/{masked}" if self.project else masked
+
+    def usage(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "key": self.label,
+            "rpm": self.rpm,
+            "requests": self.requests,
+            "successes": self.successes,
+            "throttled": self.throttled,
+            "errors": self.errors,
+            "disabled": self.disabled,
+            "cooldown_seconds": round(max(0.0, self.cooldown_until - now), 1),
+            "last_error": self.last_error,
+        }
+
+
+def parse_entry(entry: str, default_rpm: int = 0) -> KeyState:
+    """``key[@project][:rpm]``."""
+    entry = entry.strip()
+    rpm = default_rpm
+    if ":" in entry:
+        entry, rpm_text = entry.rsplit(":", 1)
+        rpm = int(rpm_text)
+    key, _, project = entry.partition("@")
+    return KeyState(key=key, project=project or None, rpm=rpm)
+
+
+def load_keys(environ: Optional[Dict[str, str]] = None) -> List[KeyState]:
+    environ = os.environ if environ is None else environ
+    default_rpm = int(environ.get("GEMINI_KEY_RPM", 0))
+
+    path = environ.get("GEMINI_API_KEYS_FILE")
+    if path:
+        text = Path(path).read_text(encoding="utf-8")
+        if path.endswith(".json"):
+            return [
+                KeyState(key=item["key"], project=item.get("project"), rpm=int(item.get("rpm", default_rpm)))
+                for item in json.loads(text)
+            ]
+        return [
+            parse_entry(line, default_rpm)
+            for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+    if environ.get("GEMINI_API_KEYS"):
+        return [parse_entry(entry, default_rpm) for entry in environ["GEMINI_API_KEYS"].split(",") if entry.strip()]
+    if environ.get("GEMINI_API_KEY"):
+        return [KeyState(key=environ["GEMINI_API_KEY"], rpm=default_rpm)]
+    return []
+
+
+class CredentialPool:
+    """Spreads requests over several API keys, pacing and cooling each one."""
+
+    def __init__(self, keys: List[KeyState], *,
+                 cooldown: float = COOLDOWN_SECONDS,
+                 max_cooldown: float = MAX_COOLDOWN_SECONDS,
+                 client_factory: Callable[[str], Any] = lambda key: genai.Client(api_key=key)):
+        if not keys:
+            raise NoCredentialError("No Gemini API key configured; set GEMINI_API_KEYS or GEMINI_API_KEY.")
+        self.keys = keys
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._client_factory = client_factory
+        self._lock = threading.Lock()
+        self._uses = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _reserve(self) -> Tuple[Optional[KeyState], float]:
+        """Book the earliest request slot; returns the key (None if all cool down) and the wait."""
+        with self._lock:
+            now = time.monotonic()
+            active = [state for state in self.keys if not state.disabled]
+            if not active:
+                raise NoCredentialError("Every Gemini API key was rejected.")
+            ready = [state for state in active if state.cooldown_until <= now]
+            if not ready:
+                return None, min(state.cooldown_until for state in active) - now
+
+            # Earliest slot first, least recently used among equals (round-robin).
+            state = min(ready, key=lambda s: (max(now, s.next_slot), s.last_used))
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + (60.0 / state.rpm if state.rpm > 0 else 0.0)
+            self._uses += 1
+            state.last_used = self._uses
+            state.requests += 1
+            if state.client is None:
+                state.client = self._client_factory(state.key)
+            return state, slot - now
+
+    def acquire(self) -> KeyState:
+        while True:
+            state, wait = self._reserve()
+            if wait > 0:
+                time.sleep(wait)
+            if state is not None:
+                return state
+
+    async def acquire_async(self) -> KeyState:
+        while True:
+            state, wait = self._reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if state is not None:
+                return state
+
+    def report(self, state: KeyState, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            if error is None:
+                state.successes += 1
+                state.consecutive_throttles = 0
+                return
+            state.last_error = str(error)[:200]
+            status = _status(error)
+            if status == 429:
+                state.throttled += 1
+                state.consecutive_throttles += 1
+                backoff = min(self.cooldown * 2 ** (state.consecutive_throttles - 1), self.max_cooldown)
+                state.cooldown_until = time.monotonic() + backoff
+                logging.warning(f"Gemini key {state.label} throttled; cooling down for {backoff:.0f}s")
+            elif status in (401, 403):
+                state.errors += 1
+                state.disabled = True
+                logging.warning(f"Gemini key {state.label} rejected ({status}); removed from the pool")
+            else:
+                state.errors += 1
+
+    def call(self, fn: Callable[[Any], T]) -> T:
+        """
+        Run ``fn(client)`` on the next available key. Throttled or rejected
+        keys are retried on another key, up to once per key in the pool.
+        """
+        for attempt in range(len(self.keys)):
+            state = self.acquire()
+            try:
+                result = fn(state.client)
+            except Exception as e:
+                self.report(state, e)
+                if _status(e) in (401, 403, 429) and attempt < len(self.keys) - 1:
+                    continue
+                raise
+            self.report(state)
+            return result
+        raise NoCredentialError("No Gemini API key available.")
+
+    async def acall(self, fn: Callable[[Any], T]) -> T:
+        """``call`` for coroutines; the request itself runs in the default executor."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(len(self.keys)):
+            state = await self.acquire_async()
+            try:
+                result = await loop.run_in_executor(None, fn, state.client)
+            except Exception as e:
+                self.report(state, e)
+                if _status(e) in (401, 403, 429) and attempt < len(self.keys) - 1:
+                    continue
+                raise
+            self.report(state)
+            return result
+        raise NoCredentialError("No Gemini API key available.")
+
+    def usage(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [state.usage() for state in self.keys]
+
+    def export_usage(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.usage(), f, indent=2)
+
+
+_pool: Optional[CredentialPool] = None
+_pool_lock = threading.Lock()
+
+
+def gemini_pool() -> CredentialPool:
+    """The process-wide pool every Gemini client draws its keys from."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CredentialPool(load_keys())
+            usage_path = os.environ.get("GEMINI_USAGE_PATH")
+            if usage_path:
+                atexit.register(_pool.export_usage, usage_path)
+        return _pool
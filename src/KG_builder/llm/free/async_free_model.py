@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from KG_builder.llm.base.async_base_mode import AsyncBaseLLM
+from KG_builder.llm.free.constrained import json_schema
+from KG_builder.llm.free.free_model import Messages, QwenModel
+from KG_builder.utils.batching import MicroBatcher
+
+
+class AsyncQwenModel(AsyncBaseLLM):
+    """
+    Async front end for a local ``QwenModel``: concurrent ``generate_response``
+    calls are coalesced by a ``MicroBatcher`` into one ``generate_batch``
+    per ``response_format``.
+    """
+
+    def __init__(self, *, model: Optional[QwenModel] = None, max_wait_ms: float = 20.0, **args):
+        super().__init__(**args)
+        self.model = model or QwenModel(**args)
+        self.batcher: MicroBatcher[Tuple[Messages, Optional[Dict[str, Any]]], str] = MicroBatcher(
+            self._generate,
+            max_batch_size=self.model.max_batch_size,
+            max_wait_ms=max_wait_ms,
+        )
+
+    async def generate_response(self, context, **args) -> str:
+        """``context`` is a list of chat messages, or user text with ``args["system"]``."""
+        if isinstance(context, str):
+            context = [
+                {"role": "system", "content": args.get("system") or ""},
+                {"role": "user", "content": context},
+            ]
+        return (await self.batcher.submit([(context, args.get("response_format"))]))[0]
+
+    async def generate_batch(self, batch: List[Messages], **args) -> List[str]:
+        response_format = args.get("response_format")
+        return list(await self.batcher.submit([(messages, response_format) for messages in batch]))
+
+    def _generate(self, items: List[Tuple[Messages, Optional[Dict[str, Any]]]]) -> List[str]:
+        groups: Dict[str, List[int]] = {}
+        for i, (_, response_format) in enumerate(items):
+            key = json.dumps(json_schema(response_format), sort_keys=True)
+            groups.setdefault(key, []).append(i)
+
+        responses: List[str] = [""] * len(items)
+        for members in groups.values():
+            texts = self.model.generate_batch(
+                [items[i][0] for i in members], response_format=items[members[0]][1]
+            )
+            for i, text in zip(members, texts):
+                responses[i] = text
+        return responses
+
+    def stats(self) -> Dict[str, Any]:
+        return self.batcher.stats()
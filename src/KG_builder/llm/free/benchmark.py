@@ -0,0 +1,106 @@
+"""
+Generation throughput of local models under each loading profile.
+
+Every profile runs the same extraction prompts (the working-info system prompt
+over the first ``--chars`` characters of each document) one at a time, after
+a warm-up call, and reports new tokens per second relative to the first.
+With ``--draft`` each profile also runs with that draft model (greedy, so the
+outputs must match) and reports its acceptance rate and speedup.
+
+    python -m KG_builder.llm.free.benchmark data/*.txt --profiles gpu cpu
+    python -m KG_builder.llm.free.benchmark data/*.txt --profiles cpu --no-quantize --compile
+    python -m KG_builder.llm.free.benchmark data/*.txt --model Qwen/Qwen2.5-7B-Instruct \
+        --draft Qwen/Qwen2.5-0.5B-Instruct --profiles gpu
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from KG_builder.config import CPU_THREADS
+from KG_builder.llm.free.free_model import Messages, QwenModel
+from KG_builder.llm.free.speculative import SpeculativeStats
+from KG_builder.prompts.prompts import EXTRACT_TRIPLE_USER_PROMPT, EXTRACT_TRIPLE_WORKING_INFO_PROMPT
+
+MODEL_NAME = "Qwen/Qwen2.5-0.5B-Instruct"
+
+
+def build_prompts(paths: List[Path], chars: int) -> List[Messages]:
+    return [
+        [
+            {"role": "system", "content": EXTRACT_TRIPLE_WORKING_INFO_PROMPT},
+            {"role": "user", "content": EXTRACT_TRIPLE_USER_PROMPT.format(
+                main_subject="", predicates="", text=path.read_text(encoding="utf-8")[:chars]
+            )},
+        ]
+        for path in paths
+    ]
+
+
+def bench_profile(prompts: List[Messages],
+                  profile: str,
+                  args: argparse.Namespace,
+                  draft: Optional[str] = None) -> Tuple[Dict[str, float], List[str]]:
+    start = perf_counter()
+    model = QwenModel(
+        model_name=args.model,
+        draft_model_name=draft,
+        do_sample=False if args.draft else None,
+        profile=profile,
+        quantize=args.quantize,
+        compile=args.compile,
+        threads=args.threads,
+        max_new_tokens=args.max_new_tokens,
+        constrained_decoding=False,
+    )
+    load_seconds = perf_counter() - start
+
+    model.generate_batch(prompts[:1])  # warm-up: kernels, compilation, prefix cache
+    model.generated_tokens, model.generation_seconds = 0, 0.0
+    model.speculative = SpeculativeStats()
+    outputs = [model.generate_batch([messages])[0] for messages in prompts]
+    report = model.throughput()
+    report["load_seconds"] = load_seconds
+    return report, outputs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare local generation throughput across loading profiles.")
+    parser.add_argument("documents", type=Path, nargs="+", help="Text files to take prompts from.")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--profiles", nargs="+", choices=["gpu", "cpu"], default=["gpu", "cpu"])
+    parser.add_argument("--chars", type=int, default=1500, help="Characters of each document per prompt.")
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    parser.add_argument("--no-quantize", dest="quantize", action="store_false", help="CPU profile without int8.")
+    parser.add_argument("--compile", action="store_true", help="torch.compile the CPU model.")
+    parser.add_argument("--threads", type=int, default=CPU_THREADS)
+    parser.add_argument("--draft", help="Draft model to compare speculative decoding against (greedy).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    prompts = build_prompts(args.documents, args.chars)
+    baseline = None
+    for profile in args.profiles:
+        report, outputs = bench_profile(prompts, profile, args)
+        baseline = baseline or report["tokens_per_sec"]
+        speedup = report["tokens_per_sec"] / baseline if baseline else 0.0
+        print(
+            f"{profile}: {report['tokens']} tokens in {report['seconds']:.1f}s "
+            f"({report['tokens_per_sec']:.1f} tokens/sec, {speedup:.2f}x), loaded in {report['load_seconds']:.1f}s"
+        )
+        if args.draft:
+            spec, spec_outputs = bench_profile(prompts, profile, args, draft=args.draft)
+            speedup = spec["tokens_per_sec"] / report["tokens_per_sec"] if report["tokens_per_sec"] else 0.0
+            print(
+                f"{profile} + {args.draft}: {spec['tokens_per_sec']:.1f} tokens/sec ({speedup:.2f}x), "
+                f"acceptance {spec['acceptance_rate']:.1%}, {spec['tokens_per_round']:.2f} tokens/round, "
+                f"outputs {'identical' if spec_outputs == outputs else 'DIFFER'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+JSON-constrained decoding for local models.
+
+``json_schema`` turns a ``response_format`` (``{"type": "json_object",
+"response_schema": TripleList}``, as the Gemini clients take it) into a JSON
+schema. ``JsonConstraint`` builds the ``generate`` arguments for it: a
+``prefix_allowed_tokens_fn`` from lm-format-enforcer when it is installed, so
+every row is valid JSON of the schema and ends with EOS, plus a
+``JsonClosedCriteria`` that stops a row as soon as its top-level JSON value
+closes. Without lm-format-enforcer only the stopping criterion applies.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import torch
+from pydantic import BaseModel
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+try:
+    from lmformatenforcer import JsonSchemaParser
+    from lmformatenforcer.integrations.transformers import (
+        build_token_enforcer_tokenizer_data,
+        build_transformers_prefix_allowed_tokens_fn,
+    )
+except ImportError:  # optional: fall back to stopping on the closing bracket
+    JsonSchemaParser = None
+
+
+def json_schema(response_format: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The JSON schema ``response_format`` asks for; ``{}`` for JSON without a
+    schema and ``None`` when the response is free text.
+    """
+    if not response_format or response_format.get("type") != "json_object":
+        return None
+    schema = response_format.get("response_schema")
+    if schema is None:
+        return {}
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return schema.model_json_schema()
+    return dict(schema)
+
+
+class JsonScanner:
+    """Tracks bracket depth of streamed text, ignoring brackets inside strings."""
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.closed = False
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> bool:
+        """Consume ``text``; True once the first top-level object or array has closed."""
+        for char in text:
+            if self.closed:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = self.started
+            elif char in "{[":
+                self.started = True
+                self.depth += 1
+            elif char in "}]" and self.started:
+                self.depth -= 1
+                self.closed = self.depth == 0
+        return self.closed
+
+
+class JsonClosedCriteria(StoppingCriteria):
+    """Stops each row once the JSON value it generates is closed."""
+
+    def __init__(self, tokenizer, prompt_length: int):
+        self.tokenizer = tokenizer
+        self._scanners: List[JsonScanner] = []
+        self._seen = prompt_length
+        self._pieces: Dict[int, str] = {}
+
+    def _piece(self, token_id: int) -> str:
+        if token_id not in self._pieces:
+            self._pieces[token_id] = self.tokenizer.decode([token_id], skip_special_tokens=True)
+        return self._pieces[token_id]
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if not self._scanners:
+            self._scanners = [JsonScanner() for _ in range(input_ids.shape[0])]
+        for row, scanner in zip(input_ids[:, self._seen:].tolist(), self._scanners):
+            for token_id in row:
+                scanner.feed(self._piece(token_id))
+        self._seen = input_ids.shape[1]
+        return torch.tensor([scanner.closed for scanner in self._scanners], dtype=torch.bool, device=input_ids.device)
+
+
+class JsonConstraint:
+    """``generate`` arguments that keep a model's output to JSON of a schema."""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self._tokenizer_data = None
+        if JsonSchemaParser is None:
+            logging.warning("lm-format-enforcer is not installed; JSON output is only cut at its closing bracket.")
+
+    def generate_kwargs(self, schema: Optional[Dict[str, Any]], prompt_length: int) -> Dict[str, Any]:
+        if schema is None:
+            return {}
+        kwargs: Dict[str, Any] = {
+            "stopping_criteria": StoppingCriteriaList([JsonClosedCriteria(self.tokenizer, prompt_length)]),
+        }
+        if JsonSchemaParser is not None:
+            if self._tokenizer_data is None:
+                # Walks the whole vocabulary; done once per model.
+                self._tokenizer_data = build_token_enforcer_tokenizer_data(self.tokenizer)
+            kwargs["prefix_allowed_tokens_fn"] = build_transformers_prefix_allowed_tokens_fn(
+                self._tokenizer_data, JsonSchemaParser(schema or None)
+            )
+        return kwargs
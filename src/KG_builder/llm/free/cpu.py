@@ -0,0 +1,75 @@
+"""
+Loading local causal LMs for CPU inference.
+
+float16 matmuls have no fast CPU kernels, so the CPU profile loads bfloat16
+where the CPU supports it natively (AVX512-BF16/AMX) and float32 otherwise.
+Dynamic int8 quantization replaces every ``nn.Linear`` with a kernel that
+quantizes activations on the fly; it needs float32 weights and is usually the
+biggest win on CPU. ``torch.compile`` is optional, because its warm-up only pays
+off for long runs.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+import psutil
+import torch
+from torch import nn
+from transformers import AutoModelForCausalLM, PreTrainedModel
+
+
+def resolve_profile(profile: str) -> str:
+    """``"gpu"`` or ``"cpu"``; ``"auto"`` picks cpu when CUDA is unavailable."""
+    if profile == "auto":
+        return "gpu" if torch.cuda.is_available() else "cpu"
+    if profile not in ("gpu", "cpu"):
+        raise ValueError(f"Unknown local model profile: {profile!r}")
+    return profile
+
+
+def bf16_supported() -> bool:
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def cpu_dtype(quantize: bool) -> torch.dtype:
+    return torch.bfloat16 if not quantize and bf16_supported() else torch.float32
+
+
+def configure_threads(threads: int = 0) -> int:
+    """Intra-op threads: ``threads``, or one per physical core when 0."""
+    threads = threads or psutil.cpu_count(logical=False) or psutil.cpu_count() or 1
+    torch.set_num_threads(threads)
+    return threads
+
+
+def load_cpu_model(name: str,
+                   *,
+                   quantize: bool,
+                   compile: bool = False,
+                   threads: int = 0,
+                   dtype: Optional[torch.dtype] = None) -> PreTrainedModel:
+    threads = configure_threads(threads)
+    dtype = dtype or cpu_dtype(quantize)
+    model = AutoModelForCausalLM.from_pretrained(name, dtype=dtype).eval()
+    if quantize:
+        model = quantize_linear(model)
+    if compile:
+        model.forward = torch.compile(model.forward, dynamic=True)
+    logging.info(f"Loaded {name} for CPU: {dtype}, int8={quantize}, compile={compile}, {threads} threads")
+    return model
+
+
+def quantize_linear(model: PreTrainedModel) -> PreTrainedModel:
+    """
+    int8 dynamic quantization of every ``nn.Linear`` (weights must be float32).
+
+    ``torch.ao.quantization`` is deprecated in favour of torchao and warns on
+    use; it is kept because it needs no extra dependency and still ships with
+    torch 2.9. Move to ``torchao.quantization.Int8DynamicActivationInt8WeightConfig``
+    once torchao is a dependency.
+    """
+    return torch.ao.quantization.quantize_dynamic(model.float(), {nn.Linear}, dtype=torch.qint8)
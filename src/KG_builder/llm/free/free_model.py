@@ -1,8 +1,94 @@
+import copy
+import hashlib
+import threading
+from time import perf_counter
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
 from KG_builder.llm.base.base_model import BaseLLM
-from KG_builder.config import DEVICE_MAP, TEMPERATURE, MAX_NEW_TOKENS, REPETITION_PENALTY
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from KG_builder.config import (
+    DEVICE_MAP,
+    TEMPERATURE,
+    MAX_NEW_TOKENS,
+    DRAFT_MODEL_NAME,
+    REPETITION_PENALTY,
+    GENERATION_BATCH_SIZE,
+    GENERATION_BATCH_TOKENS,
+    PREFIX_CACHE_SIZE,
+    CONSTRAINED_DECODING,
+    LOCAL_PROFILE,
+    CPU_QUANTIZE,
+    CPU_COMPILE,
+    CPU_THREADS,
+)
+from KG_builder.llm.free.constrained import JsonConstraint, json_schema
+from KG_builder.llm.free.cpu import load_cpu_model, resolve_profile
+from KG_builder.llm.free.speculative import CandidateCounter, SpeculativeStats
+from transformers import AutoModelForCausalLM, AutoTokenizer, DynamicCache, PreTrainedModel
 import torch
 
+Messages = List[Dict[str, str]]
+V = TypeVar("V")
+
+
+def plan_generation_batches(lengths: Sequence[int], max_batch_size: int, max_batch_tokens: int) -> List[List[int]]:
+    """
+    Group prompt indices into ``generate`` calls. Prompts are sorted by length
+    so each call pads little; a call holds at most ``max_batch_size`` prompts
+    and ``max_batch_tokens`` padded prompt tokens.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # Sorted ascending, so the newest prompt is the longest of the batch.
+        if current and (len(current) >= max_batch_size or (len(current) + 1) * lengths[i] > max_batch_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class PrefixCache(Generic[V]):
+    """
+    LRU of computed prompt prefixes, keyed by a hash of the prefix text.
+    ``compute`` runs under the lock, so concurrent misses on one prefix
+    prefill it once.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: "OrderedDict[str, V]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, text: str, compute: Callable[[str], V]) -> V:
+        key = self.key(text)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            value = compute(text)
+            if self.size > 0:
+                self._entries[key] = value
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+            return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
 class FreeModel(BaseLLM):
     """Free models (Qwen,...)"""
     def __init__(self, **args):
@@ -12,46 +98,172 @@ class FreeModel(BaseLLM):
 class QwenModel(FreeModel):
     def __init__(self, **args):
         super().__init__(**args)
-        self.instance = AutoModelForCausalLM.from_pretrained(
-            self.name, 
-            dtype=torch.float16,
-            device_map=DEVICE_MAP
-        )
+        # "gpu": float16 on DEVICE_MAP; "cpu": see KG_builder.llm.free.cpu.
+        self.profile = resolve_profile(args.get("profile", LOCAL_PROFILE))
+        self.instance = self._load_model(self.name, **args)
+        # Small model of the same family (same tokenizer) for speculative decoding.
+        draft_name = args.get("draft_model_name", DRAFT_MODEL_NAME)
+        self.draft = self._load_model(draft_name, **args) if draft_name else None
+        self.speculative = SpeculativeStats()
+        self.do_sample = args.get("do_sample")
         self.tokenizer = AutoTokenizer.from_pretrained(self.name)
         if self.tokenizer.pad_token_id is None:
             self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
-    
-    def generate_response(self, context: str, **args):
-        messages=[
-            {"role": "system", "content" : args["system"]},
-            {"role": "user", "content" : context}
-        ]
-        
-        # Apply chat template
-        text = self.tokenizer.apply_chat_template(
-            messages,
-            tokenize=False,
-            add_generation_prompt=True
+        self.max_batch_size = args.get("max_batch_size", GENERATION_BATCH_SIZE)
+        self.max_batch_tokens = args.get("max_batch_tokens", GENERATION_BATCH_TOKENS)
+        self.max_new_tokens = args.get("max_new_tokens", MAX_NEW_TOKENS)
+        # Past key/values of system prompts, shared by every section and document.
+        self.prefix_cache: PrefixCache[Tuple[torch.Tensor, DynamicCache]] = PrefixCache(
+            args.get("prefix_cache_size", PREFIX_CACHE_SIZE)
         )
-        
-        # Tokenize input
-        model_inputs = self.tokenizer([text], return_tensors="pt").to(self.instance.device)
-        generated_ids = self.instance.generate(
-            **model_inputs,
-            max_new_tokens=MAX_NEW_TOKENS,
-            temperature=TEMPERATURE,
-            repetition_penalty=REPETITION_PENALTY,
-            pad_token_id=self.tokenizer.pad_token_id
+        self.generated_tokens = 0
+        self.generation_seconds = 0.0
+        self.constraint = JsonConstraint(self.tokenizer) if args.get("constrained_decoding", CONSTRAINED_DECODING) else None
+    
+    def _load_model(self, name: str, **args) -> PreTrainedModel:
+        if self.profile == "cpu":
+            return load_cpu_model(
+                name,
+                quantize=args.get("quantize", CPU_QUANTIZE),
+                compile=args.get("compile", CPU_COMPILE),
+                threads=args.get("threads", CPU_THREADS),
+            )
+        return AutoModelForCausalLM.from_pretrained(
+            name, 
+            dtype=torch.float16,
+            device_map=DEVICE_MAP
         )
-        
+
+    def generate_response(self, context, **args):
+        """``context`` is a list of chat messages, or user text with ``args["system"]``."""
+        if isinstance(context, str):
+            context = [
+                {"role": "system", "content" : args["system"]},
+                {"role": "user", "content" : context}
+            ]
+        return self.generate_batch([context], **args)[0]
+
+    def split_prompt(self, messages: Messages) -> Tuple[str, str]:
+        """
+        Chat-template text of ``messages`` as ``(prefix, rest)``, where the
+        prefix is the leading system turn(s) and is empty when there are none.
+        """
+        prompt = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+        system = []
+        for message in messages:
+            if message["role"] != "system":
+                break
+            system.append(message)
+        if not system or len(system) == len(messages):
+            return "", prompt
+        prefix = self.tokenizer.apply_chat_template(system, tokenize=False)
+        if not prompt.startswith(prefix):
+            return "", prompt
+        return prefix, prompt[len(prefix):]
+
+    def _prefill(self, prefix: str) -> Tuple[torch.Tensor, DynamicCache]:
+        prefix_ids = self.tokenizer(prefix, return_tensors="pt").input_ids.to(self.instance.device)
+        with torch.inference_mode():
+            outputs = self.instance(input_ids=prefix_ids, past_key_values=DynamicCache(), use_cache=True)
+        return prefix_ids, outputs.past_key_values
+
+    def generate_batch(self, batch: Sequence[Messages], **args) -> List[str]:
+        """
+        Generate one response per conversation in ``batch``, in order. With a
+        JSON ``response_format`` (see ``constrained.json_schema``) decoding is
+        constrained to the schema and each row stops when its JSON closes.
+
+        Conversations are grouped by system prompt, whose key/values come from
+        ``prefix_cache`` so only the rest of each prompt is prefilled. The rest
+        is left-padded, between the prefix and the text, so every row ends at
+        the same position and the new tokens start at one column; ``generate``
+        stops each row at its own EOS and the call ends once every row has
+        stopped.
+        """
+        if not batch:
+            return []
+        schema = json_schema(args.get("response_format")) if self.constraint else None
+        # Assisted generation verifies one sequence at a time.
+        max_batch_size = 1 if self.draft is not None else self.max_batch_size
+        splits = [self.split_prompt(messages) for messages in batch]
+        groups: Dict[str, List[int]] = {}
+        for i, (prefix, _) in enumerate(splits):
+            groups.setdefault(prefix, []).append(i)
+
+        responses: List[str] = [""] * len(batch)
+        for prefix, members in groups.items():
+            rests = [splits[i][1] for i in members]
+            prefix_length = len(self.tokenizer(prefix).input_ids) if prefix else 0
+            lengths = [prefix_length + len(ids) for ids in self.tokenizer(rests, add_special_tokens=not prefix).input_ids]
+            for indices in plan_generation_batches(lengths, max_batch_size, self.max_batch_tokens):
+                texts = self._generate(prefix, [rests[j] for j in indices], schema)
+                for j, text in zip(indices, texts):
+                    responses[members[j]] = text.strip()
+
+        return responses
+
+    def _generate(self, prefix: str, rests: List[str], schema: Optional[Dict[str, Any]] = None) -> List[str]:
+        model_inputs = self.tokenizer(
+            rests,
+            return_tensors="pt",
+            padding=True,
+            padding_side="left",
+            add_special_tokens=not prefix,
+        ).to(self.instance.device)
+        input_ids, attention_mask = model_inputs.input_ids, model_inputs.attention_mask
+
+        with torch.inference_mode():
+            cache = None
+            if prefix:
+                prefix_ids, prefix_cache = self.prefix_cache.get(prefix, self._prefill)
+                rows = len(rests)
+                input_ids = torch.cat([prefix_ids.expand(rows, -1), input_ids], dim=1)
+                attention_mask = torch.cat([torch.ones_like(prefix_ids).expand(rows, -1), attention_mask], dim=1)
+                # generate() extends the cache in place; the cached prefix must stay as is.
+                cache = copy.deepcopy(prefix_cache)
+                if rows > 1:
+                    cache.batch_repeat_interleave(rows)
+
+            kwargs = self.constraint.generate_kwargs(schema, input_ids.shape[1]) if self.constraint else {}
+            if self.do_sample is not None:
+                kwargs["do_sample"] = self.do_sample
+            if self.draft is not None:
+                kwargs["assistant_model"] = self.draft
+            start = perf_counter()
+            with CandidateCounter(self.instance if self.draft is not None else None) as candidates:
+                generated_ids = self.instance.generate(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    past_key_values=cache,
+                    max_new_tokens=self.max_new_tokens,
+                    temperature=TEMPERATURE,
+                    repetition_penalty=REPETITION_PENALTY,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    **kwargs
+                )
+
         # Extract only new tokens
-        generated_ids = [
-            output_ids[len(input_ids):] for input_ids, output_ids in zip(model_inputs.input_ids, generated_ids)
-        ]
-        
-        response = self.tokenizer.batch_decode(generated_ids, skip_special_tokens=True)[0].strip()
-        
-        return response
+        generated_ids = generated_ids[:, input_ids.shape[1]:]
+        tokens = int((generated_ids != self.tokenizer.pad_token_id).sum())
+        self.generation_seconds += perf_counter() - start
+        self.generated_tokens += tokens
+        if self.draft is not None:
+            self.speculative.record(
+                rounds=candidates.rounds, proposed=candidates.proposed, accepted=candidates.accepted, tokens=tokens
+            )
+        return self.tokenizer.batch_decode(generated_ids, skip_special_tokens=True)
+
+    def throughput(self) -> Dict[str, float]:
+        """New (non-padding) tokens generated so far and their rate, with draft acceptance."""
+        seconds = self.generation_seconds
+        report = {
+            "tokens": self.generated_tokens,
+            "seconds": seconds,
+            "tokens_per_sec": self.generated_tokens / seconds if seconds else 0.0,
+        }
+        if self.draft is not None:
+            report.update(self.speculative.report())
+        return report
     
 
 if __name__ == "__main__":
@@ -64,6 +276,7 @@ if __name__ == "__main__":
         "system": "You are my assistance. Just return JSON format by my context I give you",
         "context_template": "{context}"
     }
-    print(qwen.chat(
-        "My name is Dang. My hobby is playing games.", json_return=True, **prompt
-    ))
\ No newline at end of file
+    print(qwen.generate_batch([
+        [{"role": "system", "content": prompt["system"]}, {"role": "user", "content": text}]
+        for text in ["My name is Dang. My hobby is playing games.", "I was born in Hanoi in 1990."]
+    ]))
@@ -0,0 +1,78 @@
+"""
+Bookkeeping for assisted (speculative) generation.
+
+With ``assistant_model`` set, ``generate`` lets the draft model propose a few
+tokens per round and verifies them with one forward pass of the target, which
+keeps the accepted prefix plus one token of its own. Greedy output is the same
+as without a draft. ``transformers`` does not report how many proposals were
+accepted, so ``CandidateCounter`` reads them off the candidate generator that
+``generate`` builds for the draft: the length of every proposal it returns and
+the number of matches the target reports back each round.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from transformers import PreTrainedModel
+
+
+class CandidateCounter:
+    """Counts draft proposals and accepted tokens of ``model.generate`` calls in the block (nothing if None)."""
+
+    def __init__(self, model: Optional[PreTrainedModel]):
+        self.model = model
+        self.rounds = 0
+        self.proposed = 0
+        self.accepted = 0
+
+    def _tap(self, generator):
+        get_candidates = generator.get_candidates
+        update_candidate_strategy = generator.update_candidate_strategy
+
+        def counted_get_candidates(input_ids, *args, **kwargs):
+            candidate_ids, candidate_logits = get_candidates(input_ids, *args, **kwargs)
+            self.proposed += candidate_ids.shape[1] - input_ids.shape[1]
+            return candidate_ids, candidate_logits
+
+        def counted_update(input_ids, scores, num_matches, *args, **kwargs):
+            self.rounds += 1
+            self.accepted += int(num_matches)
+            return update_candidate_strategy(input_ids, scores, num_matches, *args, **kwargs)
+
+        generator.get_candidates = counted_get_candidates
+        generator.update_candidate_strategy = counted_update
+        return generator
+
+    def __enter__(self) -> "CandidateCounter":
+        if self.model is not None:
+            build = self.model._get_candidate_generator
+            self.model._get_candidate_generator = lambda *args, **kwargs: self._tap(build(*args, **kwargs))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.model is not None:
+            del self.model._get_candidate_generator
+
+
+@dataclass
+class SpeculativeStats:
+    rounds: int = 0
+    proposed: int = 0
+    accepted: int = 0
+    tokens: int = 0
+
+    def record(self, *, rounds: int, proposed: int, accepted: int, tokens: int) -> None:
+        self.rounds += rounds
+        self.proposed += proposed
+        self.accepted += accepted
+        self.tokens += tokens
+
+    def report(self) -> Dict[str, float]:
+        return {
+            "rounds": self.rounds,
+            "proposed": self.proposed,
+            "accepted": self.accepted,
+            "acceptance_rate": self.accepted / self.proposed if self.proposed else 0.0,
+            "tokens_per_round": self.tokens / self.rounds if self.rounds else 0.0,
+        }
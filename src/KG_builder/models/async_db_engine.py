@@ -0,0 +1,72 @@
+import os
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Any, AsyncIterator, Dict
+
+import sqlalchemy as sa
+from dotenv import load_dotenv
+from pgvector.asyncpg import register_vector
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from KG_builder.utils.metrics import Histogram, LATENCY_BUCKETS
+
+load_dotenv()
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Per-connection LRU of asyncpg prepared statements kept by SQLAlchemy. The kNN
+# query text is constant (the vector and limit are bound parameters), so after
+# the first call on a connection it is served from this cache.
+PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", 256))
+
+
+def _async_url(uri: str) -> sa.URL:
+    url = sa.make_url(uri)
+    return url.set(drivername="postgresql+asyncpg").update_query_dict(
+        {"prepared_statement_cache_size": str(PREPARED_STATEMENT_CACHE_SIZE)}
+    )
+
+
+def _register_vector(dbapi_connection, connection_record):
+    dbapi_connection.run_async(register_vector)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DB_URI") or os.getenv("DB_URI", "")
+# Like ``db_engine.engine``: without a URI the async services are unavailable,
+# but the module (and ``async_ops``) still imports.
+async_engine = create_async_engine(
+    _async_url(ASYNC_DATABASE_URL),
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=True,
+) if ASYNC_DATABASE_URL else None
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+if async_engine is not None:
+    event.listen(async_engine.sync_engine, "connect", _register_vector)
+
+POOL_WAIT = Histogram(LATENCY_BUCKETS)
+
+
+@asynccontextmanager
+async def pooled_session() -> AsyncIterator[AsyncSession]:
+    """Open a session and record how long it waited for a pooled connection."""
+    async with AsyncSessionLocal() as session:
+        start = perf_counter()
+        await session.connection()
+        POOL_WAIT.observe(perf_counter() - start)
+        yield session
+
+
+def pool_stats() -> Dict[str, Any]:
+    if async_engine is None:
+        raise RuntimeError("Set ASYNC_DB_URI or DB_URI to use the async engine.")
+    pool = async_engine.pool
+    return {
+        "wait_seconds": POOL_WAIT.snapshot(),
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
@@ -0,0 +1,94 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from KG_builder.models.async_db_engine import pooled_session
+from KG_builder.models.db_engine import Entity, RelationType
+from KG_builder.models.ops import (
+    INSERT_CHUNK,
+    dedupe_rows,
+    existing_ids_statement,
+    knn_statement,
+    search_settings,
+    to_cosine_distance,
+    upsert_statement,
+)
+
+
+async def _nearest(model,
+                   embed: NDArray[np.float64],
+                   top_k: int,
+                   ef_search: int | None = None,
+                   exact: bool = False) -> List[Tuple[object, float]]:
+    async with pooled_session() as session:
+        for setting in search_settings(model, ef_search, exact):
+            await session.execute(setting)
+        statement = knn_statement(model, embed, top_k, mode="full" if exact else None)
+        result = (await session.execute(statement)).all()
+    return to_cosine_distance(result)
+
+
+async def _upsert_many(model, key: str, rows: List[Dict[str, object]]) -> Dict[str, int]:
+    rows = dedupe_rows(rows, key)
+    if not rows:
+        return {}
+
+    ids: Dict[str, int] = {}
+    async with pooled_session() as session:
+        for start in range(0, len(rows), INSERT_CHUNK):
+            statement = upsert_statement(model, key, rows[start : start + INSERT_CHUNK])
+            ids.update({name: row_id for name, row_id in (await session.execute(statement)).all()})
+
+        missing = [row[key] for row in rows if row[key] not in ids]
+        for start in range(0, len(missing), INSERT_CHUNK):
+            existing = existing_ids_statement(model, key, missing[start : start + INSERT_CHUNK])
+            ids.update({name: row_id for name, row_id in (await session.execute(existing)).all()})
+
+        await session.commit()
+    return ids
+
+
+class AsyncEntityService:
+
+    @staticmethod
+    async def add_many(*,
+                       names: Sequence[str],
+                       embeddings: NDArray[np.float64],
+    ) -> Dict[str, int]:
+        rows = [
+            {"name": name, "embedding": embedding}
+            for name, embedding in zip(names, embeddings)
+        ]
+        return await _upsert_many(Entity, "name", rows)
+
+    @staticmethod
+    async def query(*,
+                    embed: NDArray[np.float64],
+                    top_k: int,
+                    ef_search: int | None = None,
+                    exact: bool = False) -> List[Tuple[Entity, float]]:
+        return await _nearest(Entity, embed, top_k, ef_search, exact)
+
+
+class AsyncRelationTypeService:
+
+    @staticmethod
+    async def add_many(*,
+                       types: Sequence[str],
+                       definitions: Sequence[str],
+                       embeddings: NDArray[np.float64],
+    ) -> Dict[str, int]:
+        rows = [
+            {"type": type, "definition": definition, "embedding": embedding}
+            for type, definition, embedding in zip(types, definitions, embeddings)
+        ]
+        return await _upsert_many(RelationType, "type", rows)
+
+    @staticmethod
+    async def query(*,
+                    embed: NDArray[np.float64],
+                    top_k: int,
+                    ef_search: int | None = None,
+                    exact: bool = False) -> List[Tuple[RelationType, float]]:
+        return await _nearest(RelationType, embed, top_k, ef_search, exact)
@@ -0,0 +1,307 @@
+"""
+Latency benchmarks for the pgvector search path.
+
+Runs against a scratch table in the configured database (``DB_URI``) filled with
+synthetic unit vectors, so production tables are never touched.
+
+    python -m KG_builder.models.benchmark metric --rows 20000 --queries 200
+    python -m KG_builder.models.benchmark storage --rows 20000 --candidates 10 40 100
+    python -m KG_builder.models.benchmark hnsw --source entity --m 16 32 --ef-search 40 100 200
+
+The ``hnsw`` command can also replay recorded embeddings: ``--source entity`` or
+``--source relation_types`` copies the production vectors into the scratch table,
+and ``--source path/to/vectors.npy`` loads a saved matrix.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+from time import perf_counter
+from typing import Dict, List
+
+import numpy as np
+import sqlalchemy as sa
+from numpy.typing import NDArray
+
+from KG_builder.embedding.load.base import l2_normalize
+from KG_builder.models.db_engine import VECTOR_DIM, engine
+from KG_builder.models.ops import to_pgvector
+
+SCRATCH_TABLE = "bench_vectors"
+INSERT_BATCH = 1000
+# Norm of the perturbation applied to held-out probes from recorded data.
+PROBE_NOISE = 0.05
+
+
+def random_unit_vectors(n: int, d: int = VECTOR_DIM, seed: int = 0) -> NDArray[np.float32]:
+    rng = np.random.default_rng(seed)
+    return l2_normalize(rng.normal(size=(n, d)).astype(np.float32))
+
+
+def load_scratch_table(conn: sa.Connection, vectors: NDArray[np.float32]) -> None:
+    conn.execute(sa.text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+    conn.execute(sa.text(
+        f"CREATE TABLE {SCRATCH_TABLE} (id BIGINT PRIMARY KEY, embedding VECTOR({vectors.shape[1]}) NOT NULL)"
+    ))
+    insert = sa.text(f"INSERT INTO {SCRATCH_TABLE} (id, embedding) VALUES (:id, CAST(:embedding AS vector))")
+    for start in range(0, len(vectors), INSERT_BATCH):
+        conn.execute(insert, [
+            {"id": start + i, "embedding": to_pgvector(vector)}
+            for i, vector in enumerate(vectors[start : start + INSERT_BATCH])
+        ])
+
+
+def build_index(
+    conn: sa.Connection,
+    opclass: str,
+    *,
+    expression: str = "embedding",
+    m: int = 16,
+    ef_construction: int = 64,
+) -> None:
+    conn.execute(sa.text(f"DROP INDEX IF EXISTS {SCRATCH_TABLE}_embedding_idx"))
+    conn.execute(sa.text(
+        f"CREATE INDEX {SCRATCH_TABLE}_embedding_idx ON {SCRATCH_TABLE} "
+        f"USING hnsw ({expression} {opclass}) WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+    ))
+    conn.execute(sa.text(f"ANALYZE {SCRATCH_TABLE}"))
+
+
+def time_queries(conn: sa.Connection, sql: str, queries: NDArray[np.float32], top_k: int, **params):
+    statement = sa.text(sql)
+    latencies: List[float] = []
+    results: List[List[int]] = []
+    for query in queries:
+        start = perf_counter()
+        rows = conn.execute(statement, {"q": to_pgvector(query), "k": top_k, **params}).all()
+        latencies.append(perf_counter() - start)
+        results.append([row[0] for row in rows])
+    return np.asarray(latencies), results
+
+
+def exact_top_k(vectors: NDArray[np.float32], probes: NDArray[np.float32], top_k: int) -> NDArray[np.int64]:
+    """Brute-force ground truth: ids of the ``top_k`` largest inner products per probe."""
+    scores = probes @ vectors.T
+    return np.argsort(-scores, axis=1)[:, :top_k]
+
+
+def recall_at_k(results: List[List[int]], truth: NDArray[np.int64]) -> float:
+    hits = sum(len(set(found) & set(expected.tolist())) for found, expected in zip(results, truth))
+    return hits / truth.size
+
+
+def summarize(latencies: NDArray[np.float64]) -> Dict[str, float]:
+    return {
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "mean_ms": float(latencies.mean() * 1000),
+    }
+
+
+def bench_metric(*, rows: int, queries: int, top_k: int, seed: int) -> None:
+    """Compare cosine-distance search against inner-product search on unit vectors."""
+    vectors = random_unit_vectors(rows, seed=seed)
+    probes = random_unit_vectors(queries, seed=seed + 1)
+
+    cases = {
+        "cosine (vector_cosine_ops, <=>)": ("vector_cosine_ops", "<=>"),
+        "inner product (vector_ip_ops, <#>)": ("vector_ip_ops", "<#>"),
+    }
+
+    with engine.begin() as conn:
+        load_scratch_table(conn, vectors)
+        for name, (opclass, operator) in cases.items():
+            build_index(conn, opclass)
+            sql = (
+                f"SELECT id FROM {SCRATCH_TABLE} "
+                f"ORDER BY embedding {operator} CAST(:q AS vector) LIMIT :k"
+            )
+            time_queries(conn, sql, probes[: min(20, queries)], top_k)  # warm-up
+            latencies, _ = time_queries(conn, sql, probes, top_k)
+            print(f"{name}: {summarize(latencies)}")
+        conn.execute(sa.text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+
+
+STORAGE_MODES = {
+    "full": (
+        "vector_ip_ops",
+        "embedding",
+        "SELECT id FROM {table} ORDER BY embedding <#> CAST(:q AS vector) LIMIT :k",
+    ),
+    "halfvec": (
+        "halfvec_ip_ops",
+        "(embedding::halfvec({dim}))",
+        "SELECT id FROM (SELECT id, embedding FROM {table} "
+        "ORDER BY embedding::halfvec({dim}) <#> CAST(:q AS halfvec({dim})) LIMIT :c) AS candidates "
+        "ORDER BY embedding <#> CAST(:q AS vector) LIMIT :k",
+    ),
+    "binary": (
+        "bit_hamming_ops",
+        "(binary_quantize(embedding)::bit({dim}))",
+        "SELECT id FROM (SELECT id, embedding FROM {table} "
+        "ORDER BY binary_quantize(embedding)::bit({dim}) <~> binary_quantize(CAST(:q AS vector))::bit({dim}) "
+        "LIMIT :c) AS candidates "
+        "ORDER BY embedding <#> CAST(:q AS vector) LIMIT :k",
+    ),
+}
+
+
+def bench_storage(*, rows: int, queries: int, top_k: int, candidates: List[int], seed: int) -> None:
+    """Recall@k and latency of full, halfvec and binary-quantized search with re-ranking."""
+    vectors = random_unit_vectors(rows, seed=seed)
+    probes = random_unit_vectors(queries, seed=seed + 1)
+    truth = exact_top_k(vectors, probes, top_k)
+    dim = vectors.shape[1]
+
+    with engine.begin() as conn:
+        load_scratch_table(conn, vectors)
+        for mode, (opclass, expression, sql) in STORAGE_MODES.items():
+            build_index(conn, opclass, expression=expression.format(dim=dim))
+            size = conn.execute(sa.text(
+                f"SELECT pg_size_pretty(pg_relation_size('{SCRATCH_TABLE}_embedding_idx'))"
+            )).scalar_one()
+            statement = sql.format(table=SCRATCH_TABLE, dim=dim)
+
+            for candidate_count in (candidates if mode != "full" else [top_k]):
+                # The index returns at most ef_search rows, which would cap LIMIT :c.
+                conn.execute(sa.text(f"SET LOCAL hnsw.ef_search = {max(int(candidate_count), 40)}"))
+                latencies, results = time_queries(conn, statement, probes, top_k, c=candidate_count)
+                print(
+                    f"{mode:8s} index={size:>8s} candidates={candidate_count:<4d} "
+                    f"recall@{top_k}={recall_at_k(results, truth):.3f} {summarize(latencies)}"
+                )
+        conn.execute(sa.text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+
+
+def load_source(source: str, rows: int, seed: int) -> NDArray[np.float32]:
+    """Synthetic unit vectors, a production table's embeddings, or a ``.npy`` file."""
+    if source == "synthetic":
+        return random_unit_vectors(rows, seed=seed)
+    if source.endswith(".npy"):
+        vectors = np.load(source).astype(np.float32)
+    elif source in ("entity", "relation_types"):
+        with engine.connect() as conn:
+            stored = conn.execute(
+                sa.text(f"SELECT embedding::real[] FROM {source} LIMIT :n"), {"n": rows}
+            ).scalars().all()
+        vectors = np.asarray(stored, dtype=np.float32)
+    else:
+        raise ValueError(f"Unknown source {source!r}.")
+    if len(vectors) == 0:
+        raise ValueError(f"No embeddings found in {source}.")
+    return l2_normalize(vectors[:rows])
+
+
+def bench_hnsw(
+    *,
+    source: str,
+    rows: int,
+    queries: int,
+    top_k: int,
+    m: List[int],
+    ef_construction: List[int],
+    ef_search: List[int],
+    seed: int,
+) -> None:
+    """Recall@k and latency of the HNSW index across build and search parameters."""
+    vectors = load_source(source, rows, seed)
+    if source == "synthetic":
+        probes = random_unit_vectors(queries, seed=seed + 1)
+    else:
+        # Recorded data: probe with held-out rows (removed from the table)
+        # perturbed slightly. The noise is scaled by 1/sqrt(d) so its norm is
+        # about PROBE_NOISE, small next to the unit-length signal.
+        if len(vectors) <= queries:
+            raise ValueError(f"Need more than {queries} recorded rows to hold out {queries} probes.")
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(len(vectors))
+        picked = vectors[order[:queries]]
+        vectors = vectors[np.sort(order[queries:])]
+        noise = rng.normal(scale=PROBE_NOISE / np.sqrt(picked.shape[1]), size=picked.shape)
+        probes = l2_normalize(picked + noise.astype(np.float32))
+    truth = exact_top_k(vectors, probes, top_k)
+    sql = f"SELECT id FROM {SCRATCH_TABLE} ORDER BY embedding <#> CAST(:q AS vector) LIMIT :k"
+
+    with engine.begin() as conn:
+        load_scratch_table(conn, vectors)
+
+        conn.execute(sa.text("SET LOCAL enable_indexscan = off"))
+        latencies, results = time_queries(conn, sql, probes, top_k)
+        print(f"exact            recall@{top_k}={recall_at_k(results, truth):.3f} {summarize(latencies)}")
+        conn.execute(sa.text("SET LOCAL enable_indexscan = on"))
+
+        for m_value, ef_c in itertools.product(m, ef_construction):
+            start = perf_counter()
+            build_index(conn, "vector_ip_ops", m=m_value, ef_construction=ef_c)
+            build_seconds = perf_counter() - start
+            print(f"m={m_value} ef_construction={ef_c} build={build_seconds:.2f}s")
+
+            for ef in ef_search:
+                conn.execute(sa.text(f"SET LOCAL hnsw.ef_search = {int(ef)}"))
+                time_queries(conn, sql, probes[: min(20, len(probes))], top_k)  # warm-up
+                latencies, results = time_queries(conn, sql, probes, top_k)
+                print(
+                    f"  ef_search={ef:<5d} recall@{top_k}={recall_at_k(results, truth):.3f} "
+                    f"{summarize(latencies)}"
+                )
+        conn.execute(sa.text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark pgvector query latency.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    metric = subparsers.add_parser("metric", help="Cosine vs inner-product search on normalized vectors.")
+    metric.add_argument("--rows", type=int, default=20000)
+    metric.add_argument("--queries", type=int, default=200)
+    metric.add_argument("--top-k", type=int, default=1)
+    metric.add_argument("--seed", type=int, default=0)
+
+    storage = subparsers.add_parser("storage", help="Recall vs latency of quantized storage modes.")
+    storage.add_argument("--rows", type=int, default=20000)
+    storage.add_argument("--queries", type=int, default=200)
+    storage.add_argument("--top-k", type=int, default=10)
+    storage.add_argument("--candidates", type=int, nargs="+", default=[10, 40, 100])
+    storage.add_argument("--seed", type=int, default=0)
+
+    hnsw = subparsers.add_parser("hnsw", help="Recall vs latency across HNSW m / ef_construction / ef_search.")
+    hnsw.add_argument("--source", default="synthetic",
+                      help="'synthetic', 'entity', 'relation_types' or a path to a .npy matrix.")
+    hnsw.add_argument("--rows", type=int, default=20000)
+    hnsw.add_argument("--queries", type=int, default=200)
+    hnsw.add_argument("--top-k", type=int, default=10)
+    hnsw.add_argument("--m", type=int, nargs="+", default=[16])
+    hnsw.add_argument("--ef-construction", type=int, nargs="+", default=[64])
+    hnsw.add_argument("--ef-search", type=int, nargs="+", default=[10, 40, 100, 200])
+    hnsw.add_argument("--seed", type=int, default=0)
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "metric":
+        bench_metric(rows=args.rows, queries=args.queries, top_k=args.top_k, seed=args.seed)
+    elif args.command == "storage":
+        bench_storage(
+            rows=args.rows,
+            queries=args.queries,
+            top_k=args.top_k,
+            candidates=args.candidates,
+            seed=args.seed,
+        )
+    elif args.command == "hnsw":
+        bench_hnsw(
+            source=args.source,
+            rows=args.rows,
+            queries=args.queries,
+            top_k=args.top_k,
+            m=args.m,
+            ef_construction=args.ef_construction,
+            ef_search=args.ef_search,
+            seed=args.seed,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Offline consolidation of duplicate entities and relation types.
+
+Online resolution compares each new name only against what is already stored,
+so duplicates that arrive in a different order or in separate runs survive.
+This job builds a k-nearest-neighbour graph over every stored embedding,
+unions neighbours within ``--threshold`` cosine distance, keeps the oldest row
+(lowest id) of each component and rewrites ``triples``, ``triple_provenance``
+and ``entity_alias`` to point at it in a single transaction. The ``documents`` manifest is re-keyed
+with them, so a later re-run can still delete a document's dropped triples.
+
+    python -m KG_builder.models.consolidate --threshold 0.1 --dry-run
+    python -m KG_builder.models.consolidate --threshold 0.1 --k 10 --chunk-size 4096
+
+FAISS mirrors (``--entity-index-path`` of the builder) keep the merged-away ids
+until they are rebuilt with ``sync_from_db``; hits on them fall back to pgvector.
+"""
+from __future__ import annotations
+
+import argparse
+from time import perf_counter
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import sqlalchemy as sa
+from numpy.typing import NDArray
+from sqlalchemy.orm import Session
+
+from KG_builder.embedding.storages import EntityStorage, PredicateStorage
+from KG_builder.embedding.storages.base import FaissStorage
+from KG_builder.models.db_engine import (
+    SessionLocal,
+    Document,
+    Entity,
+    EntityAlias,
+    RelationType,
+    Triple,
+    VECTOR_DIM,
+)
+from KG_builder.models.ops import INSERT_CHUNK, _insert_ignore, dedupe_rows
+from KG_builder.utils.clustering import UnionFind
+from KG_builder.utils.literals import ENTITY, Literal, triple_id
+from KG_builder.utils.normalize import alias_keys
+
+CHUNK_SIZE = 4096
+
+
+def merge_map(ids: NDArray[np.int64],
+              storage: FaissStorage,
+              chunks: Iterable[Tuple[NDArray[np.int64], NDArray[np.float32]]],
+              *,
+              k: int,
+              threshold: float) -> Dict[int, int]:
+    """
+    ``{merged_id: surviving_id}`` for rows whose kNN graph component has more
+    than one member. ``ids`` must be sorted; ``chunks`` yields the stored
+    vectors again, one bounded batch at a time, to query ``storage`` with.
+    Ids outside ``ids`` (on either side of an edge) are ignored.
+    """
+    if len(ids) == 0:
+        return {}
+    uf = UnionFind(len(ids))
+    for chunk_ids, vectors in chunks:
+        D, I = storage.search(vectors, k + 1)
+        near = (I >= 0) & (D <= threshold) & (I != chunk_ids[:, None])
+        rows, cols = np.nonzero(near)
+        sources, source_known = _positions(ids, chunk_ids[rows])
+        targets, target_known = _positions(ids, I[rows, cols])
+        known = source_known & target_known
+        for a, b in zip(sources[known], targets[known]):
+            uf.union(int(a), int(b))
+
+    roots = uf.roots()
+    merged = np.nonzero(roots != np.arange(len(ids)))[0]
+    return {int(ids[i]): int(ids[roots[i]]) for i in merged}
+
+
+def _positions(ids: NDArray[np.int64], values: NDArray[np.int64]) -> Tuple[NDArray[np.int64], NDArray[np.bool_]]:
+    """Index of each value in sorted ``ids``, and whether it is actually there."""
+    positions = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+    return positions, ids[positions] == values
+
+
+def _stream_embeddings(session: Session, model, chunk_size: int):
+    rows = session.execute(
+        sa.select(model.id, model.embedding).where(model.embedding.is_not(None))
+        .order_by(model.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for chunk in rows.partitions():
+        yield (
+            np.asarray([row[0] for row in chunk], dtype=np.int64),
+            np.asarray([row[1] for row in chunk], dtype=np.float32),
+        )
+
+
+def find_duplicates(storage_cls, model, *, k: int, threshold: float, chunk_size: int) -> Dict[int, int]:
+    """
+    Build the index, the id list and the query vectors from one REPEATABLE READ
+    snapshot, so rows written by workers meanwhile cannot skew the id mapping.
+    """
+    storage = storage_cls(d=VECTOR_DIM)
+    chunks_ids: List[NDArray[np.int64]] = []
+    with SessionLocal() as session:
+        session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        for chunk_ids, vectors in _stream_embeddings(session, model, chunk_size):
+            storage.add(vectors, chunk_ids)
+            chunks_ids.append(chunk_ids)
+        ids = np.concatenate(chunks_ids) if chunks_ids else np.empty(0, dtype=np.int64)
+        return merge_map(ids, storage, _stream_embeddings(session, model, chunk_size), k=k, threshold=threshold)
+
+
+def _load_map(session: Session, table: str, mapping: Dict[int, int]) -> None:
+    session.execute(sa.text(
+        f"CREATE TEMP TABLE {table} (old_id BIGINT PRIMARY KEY, new_id BIGINT NOT NULL) ON COMMIT DROP"
+    ))
+    rows = [{"old_id": old, "new_id": new} for old, new in mapping.items()]
+    for start in range(0, len(rows), INSERT_CHUNK):
+        session.execute(
+            sa.text(f"INSERT INTO {table} (old_id, new_id) VALUES (:old_id, :new_id)"),
+            rows[start : start + INSERT_CHUNK],
+        )
+
+
+_AFFECTED_TRIPLES = """
+SELECT t.id,
+       COALESCE(ms.new_id, t.subject_id),
+       COALESCE(mp.new_id, t.predicate_id),
+       COALESCE(mo.new_id, t.object_id),
+       t.object_type, t.object_value, t.object_date, t.object_int
+FROM triples t
+LEFT JOIN merge_entity ms ON ms.old_id = t.subject_id
+LEFT JOIN merge_entity mo ON mo.old_id = t.object_id
+LEFT JOIN merge_predicate mp ON mp.old_id = t.predicate_id
+WHERE ms.old_id IS NOT NULL OR mo.old_id IS NOT NULL OR mp.old_id IS NOT NULL
+"""
+
+
+def remap_triple_ids(triple_ids: Iterable[str], remap: Dict[str, str]) -> List[str]:
+    """Manifest ids after re-keying; triples merged into one id collapse."""
+    return list(dict.fromkeys(remap.get(row_id, row_id) for row_id in triple_ids))
+
+
+def _rewrite_manifest(session: Session, remap: Dict[str, str]) -> None:
+    rows = session.execute(
+        sa.select(Document.path, Document.triple_ids).where(Document.triple_ids.overlap(list(remap)))
+    ).all()
+    for path, triple_ids in rows:
+        session.execute(
+            sa.update(Document).where(Document.path == path)
+            .values(triple_ids=remap_triple_ids(triple_ids, remap))
+        )
+
+
+def _rewrite_triples(session: Session) -> Tuple[int, int]:
+    """Re-key triples that reference merged rows; returns ``(rewritten, remaining)``."""
+    remap: List[Dict[str, str]] = []
+    rows: List[Dict[str, object]] = []
+    for old_id, s, p, o, object_type, object_value, object_date, object_int in session.execute(
+        sa.text(_AFFECTED_TRIPLES)
+    ):
+        obj = o if object_type == ENTITY else Literal(object_type, object_value)
+        new_id = triple_id(s, p, obj)
+        remap.append({"old_id": old_id, "new_id": new_id})
+        rows.append({
+            "id": new_id,
+            "subject_id": s,
+            "predicate_id": p,
+            "object_id": o,
+            "object_type": object_type,
+            "object_value": object_value,
+            "object_date": object_date,
+            "object_int": object_int,
+        })
+    if not remap:
+        return 0, 0
+
+    rows = dedupe_rows(rows, "id")
+    _insert_ignore(session, Triple, rows)
+    session.execute(sa.text(
+        "CREATE TEMP TABLE triple_remap (old_id TEXT PRIMARY KEY, new_id TEXT NOT NULL) ON COMMIT DROP"
+    ))
+    for start in range(0, len(remap), INSERT_CHUNK):
+        session.execute(
+            sa.text("INSERT INTO triple_remap (old_id, new_id) VALUES (:old_id, :new_id)"),
+            remap[start : start + INSERT_CHUNK],
+        )
+    session.execute(sa.text("""
+        INSERT INTO triple_provenance (triple_id, document, evidence, created_at)
+        SELECT r.new_id, p.document, p.evidence, p.created_at
+        FROM triple_provenance p JOIN triple_remap r ON r.old_id = p.triple_id
+        ON CONFLICT DO NOTHING
+    """))
+    _rewrite_manifest(session, {row["old_id"]: row["new_id"] for row in remap})
+    # Provenance of the old ids goes with them (ON DELETE CASCADE).
+    session.execute(sa.text("DELETE FROM triples WHERE id IN (SELECT old_id FROM triple_remap)"))
+    return len(remap), len(rows)
+
+
+def _rewrite_aliases(session: Session, entity_map: Dict[int, int]) -> None:
+    """Move aliases to the survivors and keep the merged names resolvable."""
+    session.execute(sa.text("""
+        INSERT INTO entity_alias (kind, key, entity_id)
+        SELECT a.kind, a.key, m.new_id FROM entity_alias a JOIN merge_entity m ON m.old_id = a.entity_id
+        ON CONFLICT DO NOTHING
+    """))
+    names = session.execute(
+        sa.select(Entity.id, Entity.name).where(Entity.id.in_(list(entity_map)))
+    ).all()
+    _insert_ignore(session, EntityAlias, [
+        {"kind": kind, "key": key, "entity_id": entity_map[old_id]}
+        for old_id, name in names
+        for kind, key in alias_keys(name)
+    ])
+
+
+def consolidate(entity_map: Dict[int, int], predicate_map: Dict[int, int]) -> Dict[str, int]:
+    """Apply both merge maps in one transaction."""
+    with SessionLocal() as session:
+        _load_map(session, "merge_entity", entity_map)
+        _load_map(session, "merge_predicate", predicate_map)
+        rewritten, remaining = _rewrite_triples(session)
+        _rewrite_aliases(session, entity_map)
+        session.execute(sa.text("DELETE FROM entity WHERE id IN (SELECT old_id FROM merge_entity)"))
+        session.execute(sa.text("DELETE FROM relation_types WHERE id IN (SELECT old_id FROM merge_predicate)"))
+        session.commit()
+    return {"triples_rewritten": rewritten, "triples_after_rewrite": remaining}
+
+
+def _count(model) -> int:
+    with SessionLocal() as session:
+        return session.execute(sa.select(sa.func.count()).select_from(model)).scalar_one()
+
+
+def _show_clusters(model, key: str, mapping: Dict[int, int], limit: int) -> None:
+    groups: Dict[int, List[int]] = {}
+    for old, new in mapping.items():
+        groups.setdefault(new, [new]).append(old)
+    largest = sorted(groups.values(), key=len, reverse=True)[:limit]
+    ids = [row_id for group in largest for row_id in group]
+    column = getattr(model, key)
+    with SessionLocal() as session:
+        labels = dict(session.execute(sa.select(model.id, column).where(model.id.in_(ids))).all())
+    for group in largest:
+        print(f"  {labels.get(group[0])!r} <- {[labels.get(row_id) for row_id in group[1:]]}")
+
+
+def run(*, k: int, threshold: float, chunk_size: int, dry_run: bool, show: int) -> Dict[str, float]:
+    start = perf_counter()
+    before = {"entity": _count(Entity), "relation_types": _count(RelationType)}
+
+    entity_map = find_duplicates(EntityStorage, Entity, k=k, threshold=threshold, chunk_size=chunk_size)
+    predicate_map = find_duplicates(PredicateStorage, RelationType, k=k, threshold=threshold, chunk_size=chunk_size)
+    knn_seconds = perf_counter() - start
+
+    if show:
+        print(f"Largest entity clusters ({len(set(entity_map.values()))} total):")
+        _show_clusters(Entity, "name", entity_map, show)
+        print(f"Largest relation-type clusters ({len(set(predicate_map.values()))} total):")
+        _show_clusters(RelationType, "type", predicate_map, show)
+
+    report: Dict[str, float] = {
+        "entities_before": before["entity"],
+        "entities_merged": len(entity_map),
+        "relation_types_before": before["relation_types"],
+        "relation_types_merged": len(predicate_map),
+        "knn_seconds": knn_seconds,
+    }
+    if not dry_run and (entity_map or predicate_map):
+        rewrite_start = perf_counter()
+        report.update(consolidate(entity_map, predicate_map))
+        report["rewrite_seconds"] = perf_counter() - rewrite_start
+    report["entities_after"] = _count(Entity)
+    report["relation_types_after"] = _count(RelationType)
+    report["seconds"] = perf_counter() - start
+
+    for table in ("entities", "relation_types"):
+        old, new = report[f"{table}_before"], report[f"{table}_after"]
+        shrink = (old - new) / old if old else 0.0
+        print(f"{table}: {old} -> {new} rows ({shrink:.1%} smaller)")
+    print(f"kNN graph {knn_seconds:.1f}s, total {report['seconds']:.1f}s" + (" (dry run)" if dry_run else ""))
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Merge near-duplicate entities and relation types.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Max cosine distance between merged rows.")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per row in the kNN graph.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows fetched and searched per batch.")
+    parser.add_argument("--dry-run", action="store_true", help="Report clusters without rewriting anything.")
+    parser.add_argument("--show", type=int, default=0, help="Print the N largest clusters of each table.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    print(run(
+        k=args.k,
+        threshold=args.threshold,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run,
+        show=args.show,
+    ))
+
+
+if __name__ == "__main__":
+    main()
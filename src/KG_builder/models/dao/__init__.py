@@ -0,0 +1,4 @@
+from KG_builder.models.dao.documents import DocumentRecord, DocumentsDAO
+from KG_builder.models.dao.entities import EntitiesDAO
+from KG_builder.models.dao.predicates import PredicatesDAO
+from KG_builder.models.dao.triples import TriplesDAO
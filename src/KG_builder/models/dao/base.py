@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Iterator, List, Optional, Sequence, TypeVar
+
+import numpy as np
+from numpy.typing import NDArray
+
+from KG_builder.models.db import DB, MAX_PARAMS
+
+T = TypeVar("T")
+
+
+def to_blob(embedding: Optional[NDArray[np.float32]]) -> Optional[bytes]:
+    if embedding is None:
+        return None
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def from_blob(blob: Optional[bytes]) -> Optional[NDArray[np.float32]]:
+    if blob is None:
+        return None
+    return np.frombuffer(blob, dtype=np.float32).copy()
+
+
+def chunked(items: Sequence[T], size: int = MAX_PARAMS) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def placeholders(count: int) -> str:
+    return ",".join("?" * count)
+
+
+class BaseDAO:
+    """Owns the DDL for its tables; writes are batched inside ``DB.transaction``."""
+
+    SCHEMA: List[str] = []
+
+    def __init__(self, db: DB):
+        self.db = db
+
+    def create_table(self) -> None:
+        with self.db.transaction():
+            for statement in self.SCHEMA:
+                self.db.execute(statement)
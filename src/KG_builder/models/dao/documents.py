@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from KG_builder.models.dao.base import BaseDAO
+
+
+@dataclass
+class DocumentRecord:
+    path: str
+    content_hash: str
+    pipeline_version: str
+    config_hash: str
+    triple_ids: List[str] = field(default_factory=list)
+
+    def is_current(self, content_hash: str, pipeline_version: str, config_hash: str) -> bool:
+        return (self.content_hash, self.pipeline_version, self.config_hash) == (
+            content_hash, pipeline_version, config_hash
+        )
+
+
+class DocumentsDAO(BaseDAO):
+    """Build manifest: what each ingested document hashed to and produced."""
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS documents (
+            path TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            pipeline_version TEXT NOT NULL,
+            config_hash TEXT NOT NULL,
+            triple_ids TEXT NOT NULL DEFAULT '[]',
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]
+
+    def get(self, path: str) -> Optional[DocumentRecord]:
+        rows = self.db.query("SELECT * FROM documents WHERE path = ?", (path,))
+        if not rows:
+            return None
+        row = rows[0]
+        return DocumentRecord(
+            path=row["path"],
+            content_hash=row["content_hash"],
+            pipeline_version=row["pipeline_version"],
+            config_hash=row["config_hash"],
+            triple_ids=json.loads(row["triple_ids"]),
+        )
+
+    def upsert(self, record: DocumentRecord) -> None:
+        with self.db.transaction():
+            self.db.execute(
+                """
+                INSERT INTO documents (path, content_hash, pipeline_version, config_hash, triple_ids)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    pipeline_version = excluded.pipeline_version,
+                    config_hash = excluded.config_hash,
+                    triple_ids = excluded.triple_ids,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (record.path, record.content_hash, record.pipeline_version, record.config_hash,
+                 json.dumps(record.triple_ids)),
+            )
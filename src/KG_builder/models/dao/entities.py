@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from KG_builder.models.dao.base import BaseDAO, chunked, from_blob, placeholders, to_blob
+from KG_builder.utils.utils import hash_id
+
+
+@dataclass
+class EntityRecord:
+    id: str
+    name: str
+    description: Optional[str] = None
+    source: Optional[str] = None
+    embedding: Optional[NDArray[np.float32]] = None
+
+
+class EntitiesDAO(BaseDAO):
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS entities (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            description TEXT,
+            source TEXT,
+            embedding BLOB
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS entity_faiss_map (
+            faiss_id TEXT PRIMARY KEY,
+            entity_id TEXT NOT NULL REFERENCES entities(id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS entity_faiss_map_entity_idx ON entity_faiss_map (entity_id)",
+        """
+        CREATE TABLE IF NOT EXISTS entity_aliases (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            entity_id TEXT NOT NULL REFERENCES entities(id) ON DELETE CASCADE,
+            PRIMARY KEY (kind, key, entity_id)
+        )
+        """,
+    ]
+
+    _UPSERT = """
+        INSERT INTO entities (id, name, description, source, embedding) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            name = excluded.name,
+            description = COALESCE(excluded.description, entities.description),
+            source = COALESCE(excluded.source, entities.source),
+            embedding = COALESCE(excluded.embedding, entities.embedding)
+    """
+
+    def upsert(self, *,
+               id: Optional[str] = None,
+               name: str,
+               description: Optional[str] = None,
+               source: Optional[str] = None,
+               embedding: Optional[NDArray[np.float32]] = None) -> str:
+        entity_id = id or hash_id("E", name)
+        with self.db.transaction():
+            self.db.execute(self._UPSERT, (entity_id, name, description, source, to_blob(embedding)))
+        return entity_id
+
+    def upsert_many(self, *,
+                    names: Sequence[str],
+                    embeddings: Optional[NDArray[np.float32]] = None,
+                    source: Optional[str] = None) -> Dict[str, str]:
+        """Upsert all rows in one transaction and return ``{name: entity_id}``."""
+        ids = {name: hash_id("E", name) for name in names}
+        rows = [
+            (ids[name], name, None, source, to_blob(embeddings[i]) if embeddings is not None else None)
+            for i, name in enumerate(names)
+        ]
+        self.db.executemany(self._UPSERT, rows)
+        return ids
+
+    @staticmethod
+    def _from_row(row) -> EntityRecord:
+        return EntityRecord(
+            id=row["id"],
+            name=row["name"],
+            description=row["description"],
+            source=row["source"],
+            embedding=from_blob(row["embedding"]),
+        )
+
+    def get(self, entity_id: str) -> Optional[EntityRecord]:
+        rows = self.db.query("SELECT * FROM entities WHERE id = ?", (entity_id,))
+        return self._from_row(rows[0]) if rows else None
+
+    def get_by_name(self, name: str) -> Optional[EntityRecord]:
+        rows = self.db.query("SELECT * FROM entities WHERE name = ?", (name,))
+        return self._from_row(rows[0]) if rows else None
+
+    def all_embeddings(self) -> List[Tuple[str, NDArray[np.float32]]]:
+        rows = self.db.query("SELECT id, embedding FROM entities WHERE embedding IS NOT NULL")
+        return [(row["id"], from_blob(row["embedding"])) for row in rows]
+
+    def aliases(self) -> List[Tuple[str, str, str]]:
+        """All stored ``(kind, key, canonical name)`` alias rows."""
+        rows = self.db.query(
+            "SELECT a.kind, a.key, e.name FROM entity_aliases a JOIN entities e ON e.id = a.entity_id"
+        )
+        return [(row["kind"], row["key"], row["name"]) for row in rows]
+
+    def add_aliases(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        """Insert ``(kind, key, entity_id)`` rows, ignoring ones already stored."""
+        self.db.executemany(
+            "INSERT OR IGNORE INTO entity_aliases (kind, key, entity_id) VALUES (?, ?, ?)",
+            list(rows),
+        )
+
+    def map_faiss_ids(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Point each FAISS id at an entity, replacing any previous mapping."""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO entity_faiss_map (faiss_id, entity_id) VALUES (?, ?)",
+            [(str(faiss_id), entity_id) for faiss_id, entity_id in pairs],
+        )
+
+    def get_entity_id(self, faiss_id: str) -> Optional[str]:
+        rows = self.db.query(
+            "SELECT entity_id FROM entity_faiss_map WHERE faiss_id = ?", (str(faiss_id),)
+        )
+        return rows[0]["entity_id"] if rows else None
+
+    def names_for_faiss_ids(self, faiss_ids: Sequence[str]) -> Dict[str, str]:
+        names: Dict[str, str] = {}
+        for chunk in chunked([str(faiss_id) for faiss_id in faiss_ids]):
+            rows = self.db.query(
+                "SELECT m.faiss_id, e.name FROM entity_faiss_map m "
+                f"JOIN entities e ON e.id = m.entity_id WHERE m.faiss_id IN ({placeholders(len(chunk))})",
+                tuple(chunk),
+            )
+            names.update({row["faiss_id"]: row["name"] for row in rows})
+        return names
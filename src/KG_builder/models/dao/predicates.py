@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from KG_builder.models.dao.base import BaseDAO, chunked, from_blob, placeholders, to_blob
+from KG_builder.utils.utils import hash_id
+
+
+@dataclass
+class Predicate:
+    id: str
+    name: str
+    definition: str
+    embedding: Optional[NDArray[np.float32]] = None
+
+
+class PredicatesDAO(BaseDAO):
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS predicates (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            definition TEXT NOT NULL,
+            embedding BLOB
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS predicate_faiss_map (
+            faiss_id TEXT PRIMARY KEY,
+            predicate_id TEXT NOT NULL REFERENCES predicates(id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS predicate_faiss_map_predicate_idx ON predicate_faiss_map (predicate_id)",
+    ]
+
+    _UPSERT = """
+        INSERT INTO predicates (id, name, definition, embedding) VALUES (?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            name = excluded.name,
+            definition = excluded.definition,
+            embedding = COALESCE(excluded.embedding, predicates.embedding)
+    """
+
+    def upsert(self, *,
+               id: Optional[str] = None,
+               name: str,
+               definition: str,
+               embedding: Optional[NDArray[np.float32]] = None) -> str:
+        predicate_id = id or hash_id("P", name)
+        with self.db.transaction():
+            self.db.execute(self._UPSERT, (predicate_id, name, definition, to_blob(embedding)))
+        return predicate_id
+
+    def upsert_many(self, *,
+                    names: Sequence[str],
+                    definitions: Sequence[str],
+                    embeddings: Optional[NDArray[np.float32]] = None) -> Dict[str, str]:
+        """Upsert all rows in one transaction and return ``{name: predicate_id}``."""
+        ids = {name: hash_id("P", name) for name in names}
+        rows = [
+            (ids[name], name, definition, to_blob(embeddings[i]) if embeddings is not None else None)
+            for i, (name, definition) in enumerate(zip(names, definitions))
+        ]
+        self.db.executemany(self._UPSERT, rows)
+        return ids
+
+    @staticmethod
+    def _from_row(row) -> Predicate:
+        return Predicate(
+            id=row["id"],
+            name=row["name"],
+            definition=row["definition"],
+            embedding=from_blob(row["embedding"]),
+        )
+
+    def get(self, predicate_id: str) -> Optional[Predicate]:
+        rows = self.db.query("SELECT * FROM predicates WHERE id = ?", (predicate_id,))
+        return self._from_row(rows[0]) if rows else None
+
+    def get_by_name(self, name: str) -> Optional[Predicate]:
+        rows = self.db.query("SELECT * FROM predicates WHERE name = ?", (name,))
+        return self._from_row(rows[0]) if rows else None
+
+    def all_embeddings(self) -> List[Tuple[str, NDArray[np.float32]]]:
+        rows = self.db.query("SELECT id, embedding FROM predicates WHERE embedding IS NOT NULL")
+        return [(row["id"], from_blob(row["embedding"])) for row in rows]
+
+    def map_faiss_ids(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Point each FAISS id at a predicate, replacing any previous mapping."""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO predicate_faiss_map (faiss_id, predicate_id) VALUES (?, ?)",
+            [(str(faiss_id), predicate_id) for faiss_id, predicate_id in pairs],
+        )
+
+    def get_predicate_id(self, faiss_id: str) -> Optional[str]:
+        rows = self.db.query(
+            "SELECT predicate_id FROM predicate_faiss_map WHERE faiss_id = ?", (str(faiss_id),)
+        )
+        return rows[0]["predicate_id"] if rows else None
+
+    def names_for_faiss_ids(self, faiss_ids: Sequence[str]) -> Dict[str, str]:
+        names: Dict[str, str] = {}
+        for chunk in chunked([str(faiss_id) for faiss_id in faiss_ids]):
+            rows = self.db.query(
+                "SELECT m.faiss_id, p.name FROM predicate_faiss_map m "
+                f"JOIN predicates p ON p.id = m.predicate_id WHERE m.faiss_id IN ({placeholders(len(chunk))})",
+                tuple(chunk),
+            )
+            names.update({row["faiss_id"]: row["name"] for row in rows})
+        return names
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from KG_builder.models.dao.base import BaseDAO, chunked, placeholders
+from KG_builder.utils.literals import Literal, entity_columns, triple_id
+
+
+@dataclass
+class TripleRecord:
+    id: str
+    subject_id: str
+    predicate_id: str
+    object_id: Optional[str]
+    object_type: str = "entity"
+    object_value: Optional[str] = None
+    object_date: Optional[str] = None
+    object_int: Optional[int] = None
+
+
+class TriplesDAO(BaseDAO):
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS triples (
+            id TEXT PRIMARY KEY,
+            subject_id TEXT NOT NULL REFERENCES entities(id),
+            predicate_id TEXT NOT NULL REFERENCES predicates(id),
+            object_id TEXT REFERENCES entities(id),
+            object_type TEXT NOT NULL DEFAULT 'entity',
+            object_value TEXT,
+            object_date TEXT,
+            object_int INTEGER,
+            CHECK ((object_id IS NULL) = (object_type <> 'entity'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS triples_subject_predicate_idx ON triples (subject_id, predicate_id)",
+        "CREATE INDEX IF NOT EXISTS triples_object_idx ON triples (object_id)",
+        "CREATE INDEX IF NOT EXISTS triples_predicate_idx ON triples (predicate_id)",
+        "CREATE INDEX IF NOT EXISTS triples_literal_idx ON triples (object_type, object_value) WHERE object_id IS NULL",
+        """
+        CREATE TABLE IF NOT EXISTS triple_provenance (
+            triple_id TEXT NOT NULL REFERENCES triples(id) ON DELETE CASCADE,
+            document TEXT NOT NULL,
+            evidence TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (triple_id, document)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS triple_provenance_document_idx ON triple_provenance (document)",
+    ]
+
+    _UPSERT = """
+        INSERT INTO triples (id, subject_id, predicate_id, object_id, object_type, object_value, object_date, object_int)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO NOTHING
+    """
+
+    @staticmethod
+    def _row(subject_id: str, predicate_id: str, obj: "str | Literal") -> Tuple:
+        columns = obj.columns() if isinstance(obj, Literal) else entity_columns(obj)
+        if columns["object_date"] is not None:
+            columns["object_date"] = columns["object_date"].isoformat()
+        return (
+            triple_id(subject_id, predicate_id, obj), subject_id, predicate_id,
+            columns["object_id"], columns["object_type"], columns["object_value"],
+            columns["object_date"], columns["object_int"],
+        )
+
+    def upsert(self, *,
+               id: Optional[str] = None,
+               subject_id: str,
+               predicate_id: str,
+               object_id: "str | Literal") -> str:
+        row = self._row(subject_id, predicate_id, object_id)
+        if id is not None:
+            row = (id,) + row[1:]
+        with self.db.transaction():
+            self.db.execute(self._UPSERT, row)
+        return row[0]
+
+    def upsert_many(self,
+                    triples: Sequence[Tuple[str, str, "str | Literal"]],
+                    document: Optional[str] = None,
+                    evidence: Optional[Sequence[Optional[str]]] = None) -> List[str]:
+        """
+        Insert ``(subject_id, predicate_id, object)`` rows and, with
+        ``document``, their provenance in one transaction. ``object`` is an
+        entity id or a ``Literal``. Returns triple ids.
+        """
+        rows = [self._row(s, p, o) for s, p, o in triples]
+        with self.db.transaction():
+            self.db.executemany(self._UPSERT, rows)
+            if document is not None:
+                evidence = evidence or [None] * len(rows)
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO triple_provenance (triple_id, document, evidence) VALUES (?, ?, ?)",
+                    [(row[0], document, source) for row, source in zip(rows, evidence)],
+                )
+        return [row[0] for row in rows]
+
+    def remove(self, document: str, triple_ids: Sequence[str]) -> List[str]:
+        """
+        Drop ``document``'s provenance for ``triple_ids`` and delete the
+        triples no other document still supports. Returns the deleted ids.
+        """
+        deleted: List[str] = []
+        with self.db.transaction():
+            for chunk in chunked(list(dict.fromkeys(triple_ids))):
+                marks = placeholders(len(chunk))
+                self.db.execute(
+                    f"DELETE FROM triple_provenance WHERE document = ? AND triple_id IN ({marks})",
+                    (document, *chunk),
+                )
+                rows = self.db.execute(
+                    f"DELETE FROM triples WHERE id IN ({marks}) AND NOT EXISTS "
+                    "(SELECT 1 FROM triple_provenance p WHERE p.triple_id = triples.id) RETURNING id",
+                    tuple(chunk),
+                ).fetchall()
+                deleted.extend(row["id"] for row in rows)
+        return deleted
+
+    def by_document(self, document: str) -> List[TripleRecord]:
+        rows = self.db.query(
+            "SELECT t.* FROM triples t JOIN triple_provenance p ON p.triple_id = t.id WHERE p.document = ?",
+            (document,),
+        )
+        return [TripleRecord(**dict(row)) for row in rows]
+
+    def get(self, triple_id: str) -> Optional[TripleRecord]:
+        rows = self.db.query("SELECT * FROM triples WHERE id = ?", (triple_id,))
+        return TripleRecord(**dict(rows[0])) if rows else None
+
+    def by_subject(self, subject_id: str) -> List[TripleRecord]:
+        rows = self.db.query("SELECT * FROM triples WHERE subject_id = ?", (subject_id,))
+        return [TripleRecord(**dict(row)) for row in rows]
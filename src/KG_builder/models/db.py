@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Sequence
+
+# Keep IN (...) lists under SQLite's bound-parameter limit.
+MAX_PARAMS = 900
+
+
+class DB:
+    """
+    Embedded SQLite database used for single-host, Postgres-free runs.
+
+    The connection runs in WAL mode so readers never block the writer, and in
+    autocommit mode so that ``transaction()`` controls batching explicitly: every
+    DAO write inside one ``with db.transaction():`` block is committed once.
+    """
+
+    def __init__(self, path: str = "kg.db", *, timeout: float = 30.0):
+        self.path = path
+        self.conn = sqlite3.connect(
+            path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._depth = 0
+
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group writes into one transaction; nested blocks join the outer one."""
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                self.conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self.conn
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self.conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outermost:
+                self.conn.execute("COMMIT")
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self.conn.execute(sql, params)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> None:
+        with self.transaction():
+            self.conn.executemany(sql, rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
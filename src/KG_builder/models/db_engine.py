@@ -2,6 +2,7 @@ import os
 import sqlalchemy as sa
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
 from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,13 +10,24 @@ load_dotenv()
 Base = declarative_base()
 DATABASE_URL = os.getenv("DB_URI", "")
 VECTOR_DIM = int(os.getenv("VECTOR_DIM", 896))
-engine = sa.create_engine(DATABASE_URL)
+# Per-table search mode: "full" (vector), "halfvec" or "binary". Quantized modes
+# search an expression index first and re-rank RERANK_CANDIDATES rows at full precision.
+VECTOR_STORAGE = {
+    "entity": os.getenv("ENTITY_VECTOR_STORAGE", "full"),
+    "relation_types": os.getenv("RELATION_VECTOR_STORAGE", "full"),
+}
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 40))
+# hnsw.ef_search applied to every kNN query; unset keeps the server default (40).
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 0)) or None
+# Without DB_URI the pgvector backend is unavailable; SQLite-only runs
+# (``KG_builder.models.db``) can still import the ORM models.
+engine = sa.create_engine(DATABASE_URL) if DATABASE_URL else None
 
 class RelationType(Base):
     __tablename__ = "relation_types"
     
     id = sa.Column(sa.BigInteger, primary_key=True)
-    type = sa.Column(sa.String, nullable=False)
+    type = sa.Column(sa.String, nullable=False, unique=True)
     definition = sa.Column(sa.String, nullable=False)
     embedding = sa.Column(Vector(VECTOR_DIM))
     
@@ -23,8 +35,89 @@ class Entity(Base):
     __tablename__ = "entity"
     
     id = sa.Column(sa.BigInteger, primary_key=True)
-    name = sa.Column(sa.String, nullable=False)
+    name = sa.Column(sa.String, nullable=False, unique=True)
     embedding = sa.Column(Vector(VECTOR_DIM))
 
-Base.metadata.create_all(engine)
+class EntityAlias(Base):
+    __tablename__ = "entity_alias"
+
+    # "exact" or "ascii" normalization key (see utils/normalize.py)
+    kind = sa.Column(sa.String, primary_key=True)
+    key = sa.Column(sa.String, primary_key=True)
+    entity_id = sa.Column(sa.BigInteger, sa.ForeignKey("entity.id", ondelete="CASCADE"), primary_key=True)
+
+class Triple(Base):
+    __tablename__ = "triples"
+    __table_args__ = (
+        sa.Index("triples_subject_predicate_idx", "subject_id", "predicate_id"),
+        sa.Index("triples_object_idx", "object_id"),
+        sa.Index("triples_predicate_idx", "predicate_id"),
+        sa.Index(
+            "triples_literal_idx", "object_type", "object_value",
+            postgresql_where=sa.text("object_id IS NULL"),
+        ),
+        sa.CheckConstraint("(object_id IS NULL) = (object_type <> 'entity')", name="triples_object_kind"),
+    )
+
+    # hash_id("T", subject_id, predicate_id, object_id)
+    id = sa.Column(sa.String, primary_key=True)
+    subject_id = sa.Column(sa.BigInteger, sa.ForeignKey("entity.id"), nullable=False)
+    predicate_id = sa.Column(sa.BigInteger, sa.ForeignKey("relation_types.id"), nullable=False)
+    # Entity objects set object_id; literals (utils/literals.py) set the typed columns.
+    object_id = sa.Column(sa.BigInteger, sa.ForeignKey("entity.id"))
+    object_type = sa.Column(sa.String, nullable=False, server_default="entity")
+    object_value = sa.Column(sa.String)
+    object_date = sa.Column(sa.Date)
+    object_int = sa.Column(sa.BigInteger)
+
+class TripleProvenance(Base):
+    __tablename__ = "triple_provenance"
+    __table_args__ = (
+        sa.Index("triple_provenance_document_idx", "document"),
+    )
+
+    triple_id = sa.Column(sa.String, sa.ForeignKey("triples.id", ondelete="CASCADE"), primary_key=True)
+    document = sa.Column(sa.String, primary_key=True)
+    evidence = sa.Column(sa.String)
+    created_at = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now())
+
+class Document(Base):
+    __tablename__ = "documents"
+
+    # Build manifest: a re-run skips documents whose three hashes still match.
+    path = sa.Column(sa.String, primary_key=True)
+    content_hash = sa.Column(sa.String, nullable=False)
+    pipeline_version = sa.Column(sa.String, nullable=False)
+    config_hash = sa.Column(sa.String, nullable=False)
+    triple_ids = sa.Column(ARRAY(sa.String), nullable=False, server_default="{}")
+    updated_at = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now())
+
+class ExtractionJob(Base):
+    __tablename__ = "extraction_jobs"
+    __table_args__ = (
+        sa.Index("extraction_jobs_pending_idx", "id", postgresql_where=sa.text("status = 'pending'")),
+        sa.Index("extraction_jobs_lease_idx", "lease_expires_at", postgresql_where=sa.text("status = 'running'")),
+        # A document is queued at most once until its current job finishes.
+        sa.Index(
+            "extraction_jobs_active_document_idx", "document", unique=True,
+            postgresql_where=sa.text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    id = sa.Column(sa.BigInteger, primary_key=True)
+    document = sa.Column(sa.String, nullable=False)
+    # pending -> running -> done | failed; expired leases go back to pending.
+    status = sa.Column(sa.String, nullable=False, server_default="pending")
+    attempts = sa.Column(sa.Integer, nullable=False, server_default="0")
+    worker = sa.Column(sa.String)
+    lease_expires_at = sa.Column(sa.DateTime(timezone=True))
+    heartbeat_at = sa.Column(sa.DateTime(timezone=True))
+    enqueued_at = sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now())
+    started_at = sa.Column(sa.DateTime(timezone=True))
+    finished_at = sa.Column(sa.DateTime(timezone=True))
+    error = sa.Column(sa.String)
+    result = sa.Column(JSONB)
+
+if engine is not None:
+    Base.metadata.create_all(engine)
 SessionLocal = sessionmaker(bind=engine)
\ No newline at end of file
@@ -1,8 +1,249 @@
-from KG_builder.models.db_engine import SessionLocal, Entity, RelationType
+from KG_builder.models.db_engine import (
+    SessionLocal,
+    Document,
+    Entity,
+    ExtractionJob,
+    EntityAlias,
+    RelationType,
+    Triple,
+    TripleProvenance,
+    VECTOR_DIM,
+    VECTOR_STORAGE,
+    RERANK_CANDIDATES,
+    HNSW_EF_SEARCH,
+)
 from numpy.typing import NDArray
-from typing import List, Tuple
+from datetime import timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import io
 import numpy as np
+import sqlalchemy as sa
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
 from sqlalchemy import select 
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
+from KG_builder.utils.literals import Literal, entity_columns, triple_id
+
+# Batches at least this large are loaded with COPY into a staging table.
+COPY_THRESHOLD = 5000
+INSERT_CHUNK = 1000
+
+
+def to_pgvector(vector: NDArray[np.float32]) -> str:
+    return "[" + ",".join(f"{x:.7g}" for x in vector) + "]"
+
+
+def _copy_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def dedupe_rows(rows: List[Dict[str, object]], key: str) -> List[Dict[str, object]]:
+    seen: Dict[object, Dict[str, object]] = {}
+    for row in rows:
+        seen.setdefault(row[key], row)
+    return list(seen.values())
+
+
+def upsert_statement(model, key: str, rows: List[Dict[str, object]]):
+    return (
+        insert(model)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[key])
+        .returning(getattr(model, key), model.id)
+    )
+
+
+def existing_ids_statement(model, key: str, keys: Sequence[str]):
+    column = getattr(model, key)
+    return select(column, model.id).where(column.in_(keys))
+
+
+def _insert_returning(session: Session, model, key: str, rows: List[Dict[str, object]]) -> Dict[str, int]:
+    ids: Dict[str, int] = {}
+    for start in range(0, len(rows), INSERT_CHUNK):
+        statement = upsert_statement(model, key, rows[start : start + INSERT_CHUNK])
+        ids.update({name: row_id for name, row_id in session.execute(statement).all()})
+
+    # Rows that already existed (or were inserted concurrently) are not returned.
+    missing = [row[key] for row in rows if row[key] not in ids]
+    for start in range(0, len(missing), INSERT_CHUNK):
+        existing = existing_ids_statement(model, key, missing[start : start + INSERT_CHUNK])
+        ids.update({name: row_id for name, row_id in session.execute(existing).all()})
+    return ids
+
+
+def _copy_upsert(session: Session, model, key: str, rows: List[Dict[str, object]]) -> Dict[str, int]:
+    table = model.__tablename__
+    stage = f"{table}_stage"
+    columns = list(rows[0].keys())
+    column_defs = ", ".join(
+        f"{name} {model.__table__.c[name].type.compile(dialect=postgresql.dialect())}" for name in columns
+    )
+    column_list = ", ".join(columns)
+
+    session.execute(sa.text(f"CREATE TEMP TABLE {stage} ({column_defs}) ON COMMIT DROP"))
+
+    cursor = session.connection().connection.cursor()
+    copy_sql = f"COPY {stage} ({column_list}) FROM STDIN"
+    values = [
+        [
+            None if row[name] is None
+            else to_pgvector(row[name]) if name == "embedding"
+            else str(row[name])
+            for name in columns
+        ]
+        for row in rows
+    ]
+    if hasattr(cursor, "copy_expert"):  # psycopg2
+        buffer = io.StringIO()
+        for row in values:
+            buffer.write("\t".join("\\N" if value is None else _copy_escape(value) for value in row) + "\n")
+        buffer.seek(0)
+        cursor.copy_expert(copy_sql, buffer)
+    else:  # psycopg 3
+        with cursor.copy(copy_sql) as copy:
+            for row in values:
+                copy.write_row(row)
+
+    session.execute(sa.text(
+        f"INSERT INTO {table} ({column_list}) "
+        f"SELECT DISTINCT ON ({key}) {column_list} FROM {stage} "
+        f"ON CONFLICT ({key}) DO NOTHING"
+    ))
+    result = session.execute(sa.text(
+        f"SELECT t.{key}, t.id FROM {table} t JOIN {stage} s ON t.{key} = s.{key}"
+    )).all()
+    return {name: row_id for name, row_id in result}
+
+
+def _upsert_many(model, key: str, rows: List[Dict[str, object]]) -> Dict[str, int]:
+    """
+    Insert ``rows`` in one transaction, skipping existing keys, and return
+    ``{key: id}`` for both new and pre-existing rows.
+    """
+    rows = dedupe_rows(rows, key)
+    if not rows:
+        return {}
+    with SessionLocal() as session:
+        if len(rows) >= COPY_THRESHOLD:
+            ids = _copy_upsert(session, model, key, rows)
+        else:
+            ids = _insert_returning(session, model, key, rows)
+        session.commit()
+    return ids
+
+
+def _ids_by_key(model, key: str, keys: Sequence[str]) -> Dict[str, int]:
+    ids: Dict[str, int] = {}
+    keys = list(dict.fromkeys(keys))
+    with SessionLocal() as session:
+        for start in range(0, len(keys), INSERT_CHUNK):
+            statement = existing_ids_statement(model, key, keys[start : start + INSERT_CHUNK])
+            ids.update({name: row_id for name, row_id in session.execute(statement).all()})
+    return ids
+
+
+def _keys_by_id(model, key: str, ids: Sequence[int]) -> Dict[int, str]:
+    if not ids:
+        return {}
+    column = getattr(model, key)
+    with SessionLocal() as session:
+        rows = session.execute(select(model.id, column).where(model.id.in_(list(ids)))).all()
+    return {row_id: value for row_id, value in rows}
+
+
+def _insert_ignore(session: Session, model, rows: List[Dict[str, object]]) -> None:
+    for start in range(0, len(rows), INSERT_CHUNK):
+        session.execute(insert(model).values(rows[start : start + INSERT_CHUNK]).on_conflict_do_nothing())
+
+
+def _coarse_distance(model, query, mode: str):
+    """Distance expression matching the quantized expression index of ``mode``."""
+    if mode == "halfvec":
+        return sa.cast(model.embedding, HALFVEC(VECTOR_DIM)).max_inner_product(
+            sa.cast(query, HALFVEC(VECTOR_DIM))
+        )
+    if mode == "binary":
+        return sa.cast(sa.func.binary_quantize(model.embedding), BIT(VECTOR_DIM)).hamming_distance(
+            sa.cast(sa.func.binary_quantize(sa.cast(query, Vector(VECTOR_DIM))), BIT(VECTOR_DIM))
+        )
+    raise ValueError(f"Unknown vector storage mode: {mode}")
+
+
+def knn_statement(model, embed: NDArray[np.float64], top_k: int, mode: str | None = None):
+    """
+    Build the kNN select for ``model``: rows plus their negative inner product.
+
+    In ``full`` mode the HNSW index over ``embedding`` is searched directly. In
+    ``halfvec``/``binary`` mode a coarse search over the quantized index picks
+    ``RERANK_CANDIDATES`` rows, which are re-ranked with the full-precision vectors.
+    """
+    mode = mode or VECTOR_STORAGE.get(model.__tablename__, "full")
+    query = sa.bindparam("query_embedding", embed, type_=Vector(VECTOR_DIM))
+    if mode == "full":
+        # ORDER BY must be the bare operator expression for the HNSW index to be used.
+        neg_inner = model.embedding.max_inner_product(query)
+        return select(model, neg_inner.label("neg_inner")).order_by(neg_inner).limit(top_k)
+
+    # Re-rank over the subquery's own columns: an outer ORDER BY on
+    # ``model.embedding`` would let the planner pick the full-precision index
+    # and filter its results by candidate membership instead.
+    candidates = (
+        select(model)
+        .order_by(_coarse_distance(model, query, mode))
+        .limit(max(RERANK_CANDIDATES, top_k))
+        .subquery("candidates")
+    )
+    row = aliased(model, candidates)
+    neg_inner = row.embedding.max_inner_product(query)
+    return select(row, neg_inner.label("neg_inner")).order_by(neg_inner).limit(top_k)
+
+
+def to_cosine_distance(rows) -> List[Tuple[object, float]]:
+    """
+    Stored and query vectors are L2-normalized (see ``BaseEmbed``), so the
+    distance ``1 - <a, b>`` equals the cosine distance callers expect.
+    """
+    return [(row[0], 1.0 + float(row[1])) for row in rows]
+
+
+def search_settings(model, ef_search: int | None = None, exact: bool = False) -> List[sa.TextClause]:
+    """
+    Transaction-local planner settings for one kNN query.
+
+    ``exact`` disables index scans so Postgres sorts every row (ground truth);
+    otherwise ``ef_search`` sets the HNSW candidate list size. Quantized modes
+    need at least ``RERANK_CANDIDATES`` candidates from the coarse index.
+    """
+    if exact:
+        return [sa.text("SET LOCAL enable_indexscan = off")]
+    ef_search = ef_search or HNSW_EF_SEARCH
+    if VECTOR_STORAGE.get(model.__tablename__, "full") != "full":
+        ef_search = max(ef_search or 40, RERANK_CANDIDATES)
+    if not ef_search:
+        return []
+    return [sa.text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")]
+
+
+def _nearest(model,
+             embed: NDArray[np.float64],
+             top_k: int,
+             ef_search: int | None = None,
+             exact: bool = False) -> List[Tuple[object, float]]:
+    with SessionLocal() as session:
+        for setting in search_settings(model, ef_search, exact):
+            session.execute(setting)
+        statement = knn_statement(model, embed, top_k, mode="full" if exact else None)
+        result = session.execute(statement).all()
+        
+    return to_cosine_distance(result)
+
 
 class EntityService:
     
@@ -29,19 +270,54 @@ class EntityService:
             except Exception as e:
                 print(f"Exception in add Entity record: {e}")
     
+    @staticmethod
+    def add_many(*,
+                 names: Sequence[str],
+                 embeddings: NDArray[np.float64],
+    ) -> Dict[str, int]:
+        rows = [
+            {"name": name, "embedding": embedding}
+            for name, embedding in zip(names, embeddings)
+        ]
+        return _upsert_many(Entity, "name", rows)
+
+    @staticmethod
+    def aliases() -> List[Tuple[str, str, str]]:
+        """All stored ``(kind, key, canonical name)`` alias rows."""
+        with SessionLocal() as session:
+            statement = (
+                select(EntityAlias.kind, EntityAlias.key, Entity.name)
+                .join(Entity, Entity.id == EntityAlias.entity_id)
+                .execution_options(yield_per=10000)
+            )
+            return [tuple(row) for row in session.execute(statement)]
+
+    @staticmethod
+    def add_aliases(rows: Sequence[Tuple[str, str, int]]) -> None:
+        """Insert ``(kind, key, entity_id)`` rows, ignoring ones already stored."""
+        if not rows:
+            return
+        with SessionLocal() as session:
+            _insert_ignore(session, EntityAlias, [
+                {"kind": kind, "key": key, "entity_id": entity_id} for kind, key, entity_id in rows
+            ])
+            session.commit()
+
+    @staticmethod
+    def ids_by_name(names: Sequence[str]) -> Dict[str, int]:
+        return _ids_by_key(Entity, "name", names)
+
+    @staticmethod
+    def names_by_id(ids: Sequence[int]) -> Dict[int, str]:
+        return _keys_by_id(Entity, "name", ids)
+    
     @staticmethod
     def query(*,
               embed: NDArray[np.float64], 
-              top_k: int) -> List[Tuple[Entity, float]]:
-        with SessionLocal() as session:
-            distance_query = select(
-                Entity,
-                Entity.embedding.cosine_distance(embed).label("distance")
-            ).order_by("distance").limit(top_k)
-            
-            result = session.execute(distance_query).all()
-            
-            return result
+              top_k: int,
+              ef_search: int | None = None,
+              exact: bool = False) -> List[Tuple[Entity, float]]:
+        return _nearest(Entity, embed, top_k, ef_search, exact)
 
 
             
@@ -72,16 +348,277 @@ class RelationTypeService:
             except Exception as e:
                 print(f"Exception in add Entity record: {e}")
     
+    @staticmethod
+    def add_many(*,
+                 types: Sequence[str],
+                 definitions: Sequence[str],
+                 embeddings: NDArray[np.float64],
+    ) -> Dict[str, int]:
+        rows = [
+            {"type": type, "definition": definition, "embedding": embedding}
+            for type, definition, embedding in zip(types, definitions, embeddings)
+        ]
+        return _upsert_many(RelationType, "type", rows)
+
+    @staticmethod
+    def ids_by_type(types: Sequence[str]) -> Dict[str, int]:
+        return _ids_by_key(RelationType, "type", types)
+
+    @staticmethod
+    def types_by_id(ids: Sequence[int]) -> Dict[int, str]:
+        return _keys_by_id(RelationType, "type", ids)
+    
     @staticmethod
     def query(*,
               embed: NDArray[np.float64], 
-              top_k: int) -> List[Tuple[RelationType, float]]:
+              top_k: int,
+              ef_search: int | None = None,
+              exact: bool = False) -> List[Tuple[RelationType, float]]:
+        return _nearest(RelationType, embed, top_k, ef_search, exact)
+
+
+class TripleService:
+
+    @staticmethod
+    def add_many(*,
+                 triples: Sequence[Tuple[int, int, "int | Literal"]],
+                 document: Optional[str] = None,
+                 evidence: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[str]:
+        """
+        Idempotently insert ``(subject_id, predicate_id, object)`` rows and,
+        with ``document``, one provenance row per triple, in one transaction.
+        ``object`` is an entity id or a ``Literal``. Returns the content-hash
+        triple ids in input order.
+        """
+        ids = [triple_id(s, p, o) for s, p, o in triples]
+        rows = dedupe_rows([
+            {
+                "id": row_id,
+                "subject_id": s,
+                "predicate_id": p,
+                **(o.columns() if isinstance(o, Literal) else entity_columns(o)),
+            }
+            for row_id, (s, p, o) in zip(ids, triples)
+        ], "id")
+        if not rows:
+            return ids
+
         with SessionLocal() as session:
-            distance_query = select(
-                RelationType,
-                RelationType.embedding.cosine_distance(embed).label("distance")
-            ).order_by("distance").limit(top_k)
-            
-            result = session.execute(distance_query).all()
-            
-            return result
\ No newline at end of file
+            if len(rows) >= COPY_THRESHOLD:
+                _copy_upsert(session, Triple, "id", rows)
+            else:
+                _insert_ignore(session, Triple, rows)
+
+            if document is not None:
+                evidence = evidence or [None] * len(ids)
+                provenance = dedupe_rows([
+                    {"triple_id": row_id, "document": document, "evidence": source}
+                    for row_id, source in zip(ids, evidence)
+                ], "triple_id")
+                _insert_ignore(session, TripleProvenance, provenance)
+            session.commit()
+        return ids
+
+    @staticmethod
+    def remove(*, document: str, triple_ids: Sequence[str]) -> List[str]:
+        """
+        Drop ``document``'s provenance for ``triple_ids`` and delete the
+        triples no other document still supports. Returns the deleted ids.
+        """
+        ids = list(dict.fromkeys(triple_ids))
+        deleted: List[str] = []
+        with SessionLocal() as session:
+            for start in range(0, len(ids), INSERT_CHUNK):
+                chunk = ids[start : start + INSERT_CHUNK]
+                session.execute(sa.delete(TripleProvenance).where(
+                    TripleProvenance.document == document,
+                    TripleProvenance.triple_id.in_(chunk),
+                ))
+                orphaned = ~sa.exists().where(TripleProvenance.triple_id == Triple.id)
+                deleted.extend(session.execute(
+                    sa.delete(Triple).where(Triple.id.in_(chunk), orphaned).returning(Triple.id)
+                ).scalars())
+            session.commit()
+        return deleted
+
+
+class DocumentService:
+
+    @staticmethod
+    def get(path: str) -> Optional[Document]:
+        with SessionLocal() as session:
+            document = session.get(Document, path)
+            if document is not None:
+                session.expunge(document)
+            return document
+
+    @staticmethod
+    def upsert(*,
+               path: str,
+               content_hash: str,
+               pipeline_version: str,
+               config_hash: str,
+               triple_ids: Sequence[str]) -> None:
+        row = {
+            "path": path,
+            "content_hash": content_hash,
+            "pipeline_version": pipeline_version,
+            "config_hash": config_hash,
+            "triple_ids": list(triple_ids),
+        }
+        statement = insert(Document).values(row)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Document.path],
+            set_={**{key: statement.excluded[key] for key in row if key != "path"}, "updated_at": sa.func.now()},
+        )
+        with SessionLocal() as session:
+            session.execute(statement)
+            session.commit()
+
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+class ClaimedJob(NamedTuple):
+    id: int
+    document: str
+    attempts: int
+
+
+class JobService:
+    """
+    Work queue in ``extraction_jobs`` shared by workers on several hosts.
+
+    ``claim`` takes the oldest pending job with ``FOR UPDATE SKIP LOCKED`` so
+    concurrent workers never wait on each other, and leases it for
+    ``lease_seconds``. Workers extend the lease with ``heartbeat``; jobs whose
+    lease expired are put back by ``requeue_stale``. ``complete`` and ``fail``
+    only apply while the caller still holds the lease, so a job is recorded
+    done exactly once even if a slow worker finishes after being requeued.
+    """
+
+    @staticmethod
+    def enqueue(documents: Sequence[str]) -> int:
+        """Queue documents that have no pending or running job; returns how many were added."""
+        rows = [{"document": document} for document in dict.fromkeys(documents)]
+        added = 0
+        with SessionLocal() as session:
+            for start in range(0, len(rows), INSERT_CHUNK):
+                statement = (
+                    insert(ExtractionJob)
+                    .values(rows[start : start + INSERT_CHUNK])
+                    .on_conflict_do_nothing(
+                        index_elements=[ExtractionJob.document],
+                        # Literal predicate so Postgres can match the partial unique index.
+                        index_where=sa.text("status IN ('pending', 'running')"),
+                    )
+                    .returning(ExtractionJob.id)
+                )
+                added += len(session.execute(statement).all())
+            session.commit()
+        return added
+
+    @staticmethod
+    def claim(*, worker: str, lease_seconds: float) -> Optional[ClaimedJob]:
+        now = sa.func.now()
+        candidate = (
+            select(ExtractionJob.id)
+            .where(ExtractionJob.status == PENDING)
+            .order_by(ExtractionJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        statement = (
+            sa.update(ExtractionJob)
+            .where(ExtractionJob.id == candidate)
+            .values(
+                status=RUNNING,
+                worker=worker,
+                attempts=ExtractionJob.attempts + 1,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                started_at=now,
+                error=None,
+            )
+            .returning(ExtractionJob.id, ExtractionJob.document, ExtractionJob.attempts)
+        )
+        with SessionLocal() as session:
+            row = session.execute(statement).first()
+            session.commit()
+        return ClaimedJob(*row) if row is not None else None
+
+    @staticmethod
+    def _update_held(job_id: int, worker: str, **values) -> Optional[Tuple]:
+        statement = (
+            sa.update(ExtractionJob)
+            .where(
+                ExtractionJob.id == job_id,
+                ExtractionJob.worker == worker,
+                ExtractionJob.status == RUNNING,
+            )
+            .values(**values)
+            .returning(ExtractionJob.status)
+        )
+        with SessionLocal() as session:
+            row = session.execute(statement).first()
+            session.commit()
+        return row
+
+    @staticmethod
+    def heartbeat(*, job_id: int, worker: str, lease_seconds: float) -> bool:
+        """Extend the lease; False means it was lost and the job may run elsewhere."""
+        now = sa.func.now()
+        return JobService._update_held(
+            job_id, worker, heartbeat_at=now, lease_expires_at=now + timedelta(seconds=lease_seconds)
+        ) is not None
+
+    @staticmethod
+    def complete(*, job_id: int, worker: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        return JobService._update_held(
+            job_id, worker, status=DONE, finished_at=sa.func.now(), lease_expires_at=None, result=result
+        ) is not None
+
+    @staticmethod
+    def fail(*, job_id: int, worker: str, error: str, max_attempts: int) -> Optional[str]:
+        """Requeue the job, or mark it failed after ``max_attempts``; returns the new status."""
+        status = sa.case((ExtractionJob.attempts >= max_attempts, FAILED), else_=PENDING)
+        row = JobService._update_held(
+            job_id, worker,
+            status=status,
+            worker=None,
+            lease_expires_at=None,
+            finished_at=sa.case((status == FAILED, sa.func.now())),
+            error=error,
+        )
+        return row[0] if row is not None else None
+
+    @staticmethod
+    def requeue_stale(*, max_attempts: int) -> int:
+        """Return running jobs with an expired lease to the queue (or fail them)."""
+        status = sa.case((ExtractionJob.attempts >= max_attempts, FAILED), else_=PENDING)
+        statement = (
+            sa.update(ExtractionJob)
+            .where(ExtractionJob.status == RUNNING, ExtractionJob.lease_expires_at < sa.func.now())
+            .values(
+                status=status,
+                worker=None,
+                lease_expires_at=None,
+                finished_at=sa.case((status == FAILED, sa.func.now())),
+                error="lease expired",
+            )
+            .returning(ExtractionJob.id)
+        )
+        with SessionLocal() as session:
+            requeued = len(session.execute(statement).all())
+            session.commit()
+        return requeued
+
+    @staticmethod
+    def counts() -> Dict[str, int]:
+        with SessionLocal() as session:
+            rows = session.execute(
+                select(ExtractionJob.status, sa.func.count()).group_by(ExtractionJob.status)
+            ).all()
+        return {status: count for status, count in rows}
@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+from typing import AbstractSet, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from KG_builder.embedding.storages import EntityStorage, PredicateStorage
+from KG_builder.embedding.storages.base import FaissStorage
+from KG_builder.models.dao import DocumentRecord, DocumentsDAO, EntitiesDAO, PredicatesDAO, TriplesDAO
+from KG_builder.models.db import DB
+from KG_builder.models.db_engine import VECTOR_DIM
+from KG_builder.models.ops import DocumentService, EntityService, RelationTypeService, TripleService
+from KG_builder.utils.literals import Literal, triple_id
+from KG_builder.utils.normalize import AliasIndex
+from KG_builder.utils.utils import hash_id
+
+
+def nearest_hits(storage: Optional[FaissStorage],
+                 embeds: NDArray[np.float32],
+                 threshold: float) -> List[Optional[int]]:
+    """FAISS id of the nearest stored row within ``threshold``, per embedding."""
+    if storage is None or len(embeds) == 0:
+        return [None] * len(embeds)
+    D, I = storage.search(embeds, k=1)
+    return [
+        int(label) if label >= 0 and distance <= threshold else None
+        for distance, label in zip(D[:, 0], I[:, 0])
+    ]
+
+
+def _annotate(subject_ids: Sequence, predicate_ids: Sequence, object_ids: Sequence,
+              triple_ids: Sequence[str]) -> List[Dict[str, object]]:
+    return [
+        {"subject_id": s, "predicate_id": p, "object_id": o, "triple_id": t}
+        for s, p, o, t in zip(subject_ids, predicate_ids, object_ids, triple_ids)
+    ]
+
+
+def _unskipped(triple_ids: Sequence[str], skip: AbstractSet[str]) -> List[int]:
+    """Positions of the first occurrence of each triple id not in ``skip``."""
+    seen = set(skip)
+    keep: List[int] = []
+    for i, row_id in enumerate(triple_ids):
+        if row_id not in seen:
+            seen.add(row_id)
+            keep.append(i)
+    return keep
+
+
+def faiss_id(row_id: str) -> int:
+    """Stable int64 FAISS id derived from a ``hash_id`` digest (48 bits)."""
+    return int(row_id.split("_", 1)[1], 16)
+
+
+class _AliasLookup:
+    aliases: AliasIndex
+
+    def lookup_entities(self, names: Sequence[str]) -> Dict[str, str]:
+        """Names resolved by normalization key alone, without embedding."""
+        found = {name: self.aliases.lookup(name) for name in names}
+        return {name: canonical for name, canonical in found.items() if canonical is not None}
+
+
+class PgVectorStore(_AliasLookup):
+    """
+    Canonical entities and relation types in Postgres/pgvector.
+
+    With index paths, FAISS storages act as a read-through mirror: lookups hit
+    FAISS first and fall back to pgvector on a miss; DB hits and new rows are
+    written back to the mirror.
+    """
+
+    def __init__(self, *,
+                 entity_index_path: Optional[str] = None,
+                 predicate_index_path: Optional[str] = None,
+                 strip_diacritics: bool = False):
+        self.entity_storage = self._open_mirror(EntityStorage, entity_index_path)
+        self.predicate_storage = self._open_mirror(PredicateStorage, predicate_index_path)
+        self.aliases = AliasIndex(strip_diacritics=strip_diacritics)
+        self.aliases.load(EntityService.aliases())
+
+    @staticmethod
+    def _open_mirror(storage_cls, index_path: Optional[str]) -> Optional[FaissStorage]:
+        if index_path is None:
+            return None
+        storage = storage_cls(index_path, d=VECTOR_DIM)
+        if storage.count() == 0:
+            storage.sync_from_db()
+        return storage
+
+    @staticmethod
+    def _resolve(labels: Sequence[str],
+                 embeds: NDArray[np.float32],
+                 threshold: float,
+                 storage: Optional[FaissStorage],
+                 labels_by_id: Callable[[List[int]], Dict[int, str]],
+                 query: Callable,
+                 key: str,
+                 insert: Callable[[List[int]], Dict[str, int]]) -> Dict[str, str]:
+        hits = nearest_hits(storage, embeds, threshold)
+        mirrored = labels_by_id([hit for hit in hits if hit is not None])
+        backfill: Dict[int, NDArray[np.float32]] = {}
+
+        mapping: Dict[str, str] = {}
+        new_rows: List[int] = []
+        for i, (label, embed) in enumerate(zip(labels, embeds)):
+            if hits[i] in mirrored:
+                mapping[label] = mirrored[hits[i]]
+                continue
+
+            ans = query(embed=embed, top_k=1)
+            if len(ans) == 0 or ans[0][1] > threshold:
+                new_rows.append(i)
+                mapping[label] = label
+                continue
+
+            mapping[label] = getattr(ans[0][0], key)
+            backfill[ans[0][0].id] = ans[0][0].embedding
+
+        if new_rows:
+            ids = insert(new_rows)
+            for i in new_rows:
+                backfill[ids[labels[i]]] = embeds[i]
+
+        if storage is not None and backfill:
+            storage.add(np.vstack(list(backfill.values())), np.fromiter(backfill, dtype=np.int64))
+        return mapping
+
+    def remember_entities(self, mapping: Dict[str, str]) -> None:
+        rows = self.aliases.update(mapping)
+        if rows:
+            ids = EntityService.ids_by_name([canonical for _, _, canonical in rows])
+            EntityService.add_aliases([
+                (kind, key, ids[canonical]) for kind, key, canonical in rows if canonical in ids
+            ])
+
+    def resolve_entities(self,
+                         names: Sequence[str],
+                         embeds: NDArray[np.float32],
+                         threshold: float) -> Dict[str, str]:
+        mapping = self._resolve(
+            names, embeds, threshold, self.entity_storage,
+            EntityService.names_by_id, EntityService.query, "name",
+            lambda rows: EntityService.add_many(
+                names=[names[i] for i in rows],
+                embeddings=embeds[rows],
+            ),
+        )
+        self.remember_entities(mapping)
+        return mapping
+
+    def resolve_predicates(self,
+                           names: Sequence[str],
+                           definitions: Sequence[str],
+                           embeds: NDArray[np.float32],
+                           threshold: float) -> Dict[str, str]:
+        return self._resolve(
+            names, embeds, threshold, self.predicate_storage,
+            RelationTypeService.types_by_id, RelationTypeService.query, "type",
+            lambda rows: RelationTypeService.add_many(
+                types=[names[i] for i in rows],
+                definitions=[definitions[i] for i in rows],
+                embeddings=embeds[rows],
+            ),
+        )
+
+    def add_triples(self,
+                    triples: Sequence[Tuple[str, str, "str | Literal"]],
+                    document: Optional[str] = None,
+                    evidence: Optional[Sequence[Optional[str]]] = None,
+                    skip: AbstractSet[str] = frozenset()) -> List[Dict[str, object]]:
+        """
+        Persist canonical ``(subject, predicate, object)`` names; ``object`` may
+        be a ``Literal``, stored in the typed columns. Triples whose id is in
+        ``skip`` are not written. Returns the ids of every triple.
+        """
+        entity_ids = EntityService.ids_by_name(
+            [t[0] for t in triples] + [t[2] for t in triples if not isinstance(t[2], Literal)]
+        )
+        predicate_ids = RelationTypeService.ids_by_type([t[1] for t in triples])
+        subject_ids = [entity_ids[s] for s, _, _ in triples]
+        relation_ids = [predicate_ids[p] for _, p, _ in triples]
+        objects = [o if isinstance(o, Literal) else entity_ids[o] for _, _, o in triples]
+        object_ids = [None if isinstance(o, Literal) else o for o in objects]
+        triple_ids = [triple_id(*triple) for triple in zip(subject_ids, relation_ids, objects)]
+        keep = _unskipped(triple_ids, skip)
+        TripleService.add_many(
+            triples=[(subject_ids[i], relation_ids[i], objects[i]) for i in keep],
+            document=document,
+            evidence=[evidence[i] for i in keep] if evidence is not None else None,
+        )
+        return _annotate(subject_ids, relation_ids, object_ids, triple_ids)
+
+    def remove_triples(self, document: str, triple_ids: Sequence[str]) -> List[str]:
+        return TripleService.remove(document=document, triple_ids=triple_ids)
+
+    def get_document(self, path: str) -> Optional[DocumentRecord]:
+        document = DocumentService.get(path)
+        if document is None:
+            return None
+        return DocumentRecord(
+            path=document.path,
+            content_hash=document.content_hash,
+            pipeline_version=document.pipeline_version,
+            config_hash=document.config_hash,
+            triple_ids=list(document.triple_ids),
+        )
+
+    def save_document(self, record: DocumentRecord) -> None:
+        DocumentService.upsert(
+            path=record.path,
+            content_hash=record.content_hash,
+            pipeline_version=record.pipeline_version,
+            config_hash=record.config_hash,
+            triple_ids=record.triple_ids,
+        )
+        self.flush()
+
+    def flush(self) -> None:
+        """Persist the FAISS mirrors; called once per document."""
+        for storage in (self.entity_storage, self.predicate_storage):
+            if storage is not None:
+                storage.flush()
+
+
+class SQLiteStore(_AliasLookup):
+    """
+    Canonical entities and predicates in an embedded SQLite database.
+
+    Nearest-neighbour search runs on FAISS storages (in memory when no index
+    path is given); FAISS ids are derived from the row ids and recorded in the
+    ``*_faiss_map`` tables. Indexes missing rows are rebuilt from the stored
+    embeddings on start.
+    """
+
+    def __init__(self, db_path: str, *,
+                 entity_index_path: Optional[str] = None,
+                 predicate_index_path: Optional[str] = None,
+                 dim: int = VECTOR_DIM,
+                 strip_diacritics: bool = False):
+        self.db = DB(db_path)
+        self.entities = EntitiesDAO(self.db)
+        self.predicates = PredicatesDAO(self.db)
+        self.triples = TriplesDAO(self.db)
+        self.documents = DocumentsDAO(self.db)
+        for dao in (self.entities, self.predicates, self.triples, self.documents):
+            dao.create_table()
+
+        self.entity_storage = EntityStorage(entity_index_path, d=dim)
+        self.predicate_storage = PredicateStorage(predicate_index_path, d=dim)
+        self._sync(self.entity_storage, self.entities)
+        self._sync(self.predicate_storage, self.predicates)
+        self.aliases = AliasIndex(strip_diacritics=strip_diacritics)
+        self.aliases.load(self.entities.aliases())
+
+    @staticmethod
+    def _sync(storage: FaissStorage, dao) -> None:
+        rows = dao.all_embeddings()
+        if storage.count() == len(rows):
+            return
+        storage.reset()
+        if rows:
+            ids = [row_id for row_id, _ in rows]
+            storage.add(np.vstack([embedding for _, embedding in rows]),
+                        np.asarray([faiss_id(row_id) for row_id in ids], dtype=np.int64))
+            dao.map_faiss_ids([(faiss_id(row_id), row_id) for row_id in ids])
+        storage.save()
+
+    @staticmethod
+    def _resolve(labels: Sequence[str],
+                 embeds: NDArray[np.float32],
+                 threshold: float,
+                 storage: FaissStorage,
+                 dao,
+                 insert: Callable[[List[int]], Dict[str, str]]) -> Dict[str, str]:
+        hits = nearest_hits(storage, embeds, threshold)
+        found = dao.names_for_faiss_ids([str(hit) for hit in hits if hit is not None])
+
+        mapping: Dict[str, str] = {}
+        new_rows: List[int] = []
+        for i, label in enumerate(labels):
+            if hits[i] is not None and str(hits[i]) in found:
+                mapping[label] = found[str(hits[i])]
+                continue
+            new_rows.append(i)
+            mapping[label] = label
+
+        if new_rows:
+            ids = insert(new_rows)
+            row_ids = [ids[labels[i]] for i in new_rows]
+            storage.add(embeds[new_rows], np.asarray([faiss_id(row_id) for row_id in row_ids], dtype=np.int64))
+            dao.map_faiss_ids([(faiss_id(row_id), row_id) for row_id in row_ids])
+        return mapping
+
+    def remember_entities(self, mapping: Dict[str, str]) -> None:
+        rows = self.aliases.update(mapping)
+        self.entities.add_aliases([(kind, key, hash_id("E", canonical)) for kind, key, canonical in rows])
+
+    def resolve_entities(self,
+                         names: Sequence[str],
+                         embeds: NDArray[np.float32],
+                         threshold: float) -> Dict[str, str]:
+        mapping = self._resolve(
+            names, embeds, threshold, self.entity_storage, self.entities,
+            lambda rows: self.entities.upsert_many(
+                names=[names[i] for i in rows],
+                embeddings=embeds[rows],
+                source="extracted",
+            ),
+        )
+        self.remember_entities(mapping)
+        return mapping
+
+    def resolve_predicates(self,
+                           names: Sequence[str],
+                           definitions: Sequence[str],
+                           embeds: NDArray[np.float32],
+                           threshold: float) -> Dict[str, str]:
+        return self._resolve(
+            names, embeds, threshold, self.predicate_storage, self.predicates,
+            lambda rows: self.predicates.upsert_many(
+                names=[names[i] for i in rows],
+                definitions=[definitions[i] for i in rows],
+                embeddings=embeds[rows],
+            ),
+        )
+
+    def add_triples(self,
+                    triples: Sequence[Tuple[str, str, "str | Literal"]],
+                    document: Optional[str] = None,
+                    evidence: Optional[Sequence[Optional[str]]] = None,
+                    skip: AbstractSet[str] = frozenset()) -> List[Dict[str, object]]:
+        """
+        Persist canonical ``(subject, predicate, object)`` names; ``object`` may
+        be a ``Literal``, stored in the typed columns. Triples whose id is in
+        ``skip`` are not written. Returns the ids of every triple.
+        """
+        subject_ids = [hash_id("E", s) for s, _, _ in triples]
+        predicate_ids = [hash_id("P", p) for _, p, _ in triples]
+        objects = [o if isinstance(o, Literal) else hash_id("E", o) for _, _, o in triples]
+        object_ids = [None if isinstance(o, Literal) else o for o in objects]
+        triple_ids = [triple_id(*triple) for triple in zip(subject_ids, predicate_ids, objects)]
+        keep = _unskipped(triple_ids, skip)
+        self.triples.upsert_many(
+            [(subject_ids[i], predicate_ids[i], objects[i]) for i in keep],
+            document=document,
+            evidence=[evidence[i] for i in keep] if evidence is not None else None,
+        )
+        return _annotate(subject_ids, predicate_ids, object_ids, triple_ids)
+
+    def remove_triples(self, document: str, triple_ids: Sequence[str]) -> List[str]:
+        return self.triples.remove(document, triple_ids)
+
+    def get_document(self, path: str) -> Optional[DocumentRecord]:
+        return self.documents.get(path)
+
+    def save_document(self, record: DocumentRecord) -> None:
+        self.documents.upsert(record)
+        self.flush()
+
+    def flush(self) -> None:
+        """Persist the FAISS indexes; called once per document."""
+        self.entity_storage.flush()
+        self.predicate_storage.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.db.close()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+from KG_builder.utils.metrics import Histogram, LATENCY_BUCKETS, SIZE_BUCKETS
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class _Request(Generic[T]):
+    items: List[T]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=perf_counter)
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Coalesce concurrent ``submit`` calls into batched invocations of ``fn``.
+
+    Requests are collected until ``max_batch_size`` items are queued or
+    ``max_wait_ms`` has passed since the first one arrived. ``fn`` runs in the
+    default executor and must return one result per input item, in order;
+    each caller receives the slice that belongs to its own items.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[T]], Sequence[R]],
+        *,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive.")
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.queue_wait = Histogram(LATENCY_BUCKETS)
+        self.batch_size = Histogram(SIZE_BUCKETS)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._carry: Optional[_Request] = None
+
+    async def submit(self, items: List[T]) -> Sequence[R]:
+        if not items:
+            return []
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put(_Request(list(items), future))
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+        # Fail requests the worker never dispatched so their callers do not hang.
+        pending = [self._carry] if self._carry is not None else []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending, RuntimeError("MicroBatcher was closed."))
+        self._queue = None
+        self._loop = None
+        self._carry = None
+
+    @staticmethod
+    def _fail(requests: List[_Request], error: BaseException) -> None:
+        for request in requests:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        # First use, or a previous ``asyncio.run`` closed the loop we were bound to.
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._carry = None
+        self._task = loop.create_task(self._run())
+
+    async def _collect(self, batch: List[_Request]) -> None:
+        """Fill ``batch`` in place, so requests taken so far survive a cancellation."""
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = await self._queue.get()
+
+        batch.append(first)
+        size = len(first.items)
+        deadline = self._loop.time() + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                request = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if size + len(request.items) > self.max_batch_size:
+                self._carry = request
+                break
+            batch.append(request)
+            size += len(request.items)
+
+    async def _run(self) -> None:
+        while True:
+            batch: List[_Request] = []
+            try:
+                await self._collect(batch)
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("MicroBatcher was closed."))
+                raise
+            batch = [request for request in batch if not request.future.done()]
+            if not batch:
+                continue
+
+            dispatched_at = perf_counter()
+            items: List[T] = []
+            for request in batch:
+                self.queue_wait.observe(dispatched_at - request.enqueued_at)
+                items.extend(request.items)
+            self.batch_size.observe(len(items))
+
+            try:
+                results = await self._loop.run_in_executor(None, self.fn, items)
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("MicroBatcher was closed."))
+                raise
+            except Exception as e:
+                self._fail(batch, e)
+                continue
+
+            start = 0
+            for request in batch:
+                end = start + len(request.items)
+                if not request.future.done():
+                    request.future.set_result(results[start:end])
+                start = end
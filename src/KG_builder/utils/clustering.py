@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+import numpy as np
+from numpy.typing import NDArray
+
+BLOCK_SIZE = 1024
+
+
+class UnionFind:
+    """Disjoint sets over ``0..n-1``; the smallest index of a set is its root."""
+
+    def __init__(self, n: int):
+        self.parent = np.arange(n, dtype=np.int64)
+
+    def find(self, i: int) -> int:
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return int(root)
+
+    def union(self, a: int, b: int) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if rb < ra:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        return True
+
+    def roots(self) -> NDArray[np.int64]:
+        return np.fromiter((self.find(i) for i in range(len(self.parent))), dtype=np.int64, count=len(self.parent))
+
+    def groups(self) -> Dict[int, List[int]]:
+        groups: Dict[int, List[int]] = {}
+        for i, root in enumerate(self.roots()):
+            groups.setdefault(int(root), []).append(i)
+        return groups
+
+
+def cluster_embeddings(embeds: NDArray[np.float32],
+                       threshold: float,
+                       block_size: int = BLOCK_SIZE) -> NDArray[np.int64]:
+    """
+    Root row of each embedding after unioning every pair within cosine
+    distance ``threshold`` (rows are expected to be L2-normalized, as
+    ``encode_sync`` returns them).
+
+    Similarities are computed one ``block_size x n`` block at a time, upper
+    triangle only, so memory stays at ``block_size * n`` floats.
+    """
+    n = len(embeds)
+    uf = UnionFind(n)
+    if n < 2:
+        return uf.roots()
+    embeds = np.ascontiguousarray(embeds, dtype=np.float32)
+    min_sim = 1.0 - threshold
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        sims = embeds[start:stop] @ embeds[start:].T
+        rows, cols = np.nonzero(np.triu(sims >= min_sim, k=1))
+        for a, b in zip(rows + start, cols + start):
+            uf.union(int(a), int(b))
+    return uf.roots()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+
+from KG_builder.utils.utils import hash_id
+
+ENTITY = "entity"
+DATE = "date"
+PHONE = "phone"
+EMAIL = "email"
+INTEGER = "integer"
+
+_EMAIL = r"^\s*[\w.+-]+@[\w-]+(?:\.[\w-]+)+\s*$"
+# Day-month-year as written in the CVs: "18 - 11 - 1975", "01/01/1964", "17.11.1980".
+_DATE = r"^\s*(?P<day>\d{1,2})\s*[-/.]\s*(?P<month>\d{1,2})\s*[-/.]\s*(?P<year>\d{4})\s*$"
+_PHONE = r"^\s*\(?(?:\+84|0)[\d\s().-]+$"
+# Leading zeros mark codes ("000588"), not quantities. At most 18 digits so the
+# value fits the BIGINT/INTEGER ``object_int`` column; longer ids stay entities.
+_INTEGER = r"^\s*[+-]?(?:0|[1-9]\d{0,17})\s*$"
+
+
+class Literal(NamedTuple):
+    type: str
+    value: str
+
+    def columns(self) -> Dict[str, object]:
+        """Typed object columns of a triple row whose object is this literal."""
+        return {
+            "object_id": None,
+            "object_type": self.type,
+            "object_value": self.value,
+            "object_date": date.fromisoformat(self.value) if self.type == DATE else None,
+            "object_int": int(self.value) if self.type == INTEGER else None,
+        }
+
+
+def entity_columns(object_id) -> Dict[str, object]:
+    return {
+        "object_id": object_id,
+        "object_type": ENTITY,
+        "object_value": None,
+        "object_date": None,
+        "object_int": None,
+    }
+
+
+def triple_id(subject_id, predicate_id, obj) -> str:
+    """``hash_id("T", subject_id, predicate_id, object_id)``; literal objects hash as ``type:value``."""
+    if isinstance(obj, Literal):
+        return hash_id("T", str(subject_id), str(predicate_id), f"{obj.type}:{obj.value}")
+    return hash_id("T", str(subject_id), str(predicate_id), str(obj))
+
+
+def detect_literals(values: Sequence[str]) -> List[Optional[Literal]]:
+    """
+    Classify every value at once; ``None`` marks an entity mention.
+
+    Normalized forms: dates as ISO ``YYYY-MM-DD``, phones as digits only (like
+    ``_normalize_phone`` in the profile extractor), emails lowercased and
+    integers without sign padding. The first matching type wins, in the order
+    email, date, phone, integer.
+    """
+    series = pd.Series(list(values), dtype="object").fillna("").astype(str)
+    if series.empty:
+        return []
+    kinds = pd.Series(ENTITY, index=series.index, dtype="object")
+    normalized = pd.Series(None, index=series.index, dtype="object")
+
+    is_email = series.str.match(_EMAIL)
+    kinds[is_email] = EMAIL
+    normalized[is_email] = series[is_email].str.strip().str.lower()
+
+    parts = series.str.extract(_DATE)
+    parsed = pd.to_datetime(
+        {"year": parts["year"], "month": parts["month"], "day": parts["day"]},
+        errors="coerce",
+    )
+    is_date = (kinds == ENTITY) & parsed.notna()
+    kinds[is_date] = DATE
+    normalized[is_date] = parsed[is_date].dt.strftime("%Y-%m-%d")
+
+    digits = series.str.replace(r"\D", "", regex=True)
+    is_phone = (kinds == ENTITY) & series.str.match(_PHONE) & digits.str.len().between(9, 12)
+    kinds[is_phone] = PHONE
+    normalized[is_phone] = digits[is_phone]
+
+    is_integer = (kinds == ENTITY) & series.str.match(_INTEGER)
+    kinds[is_integer] = INTEGER
+    normalized[is_integer] = series[is_integer].str.strip().str.lstrip("+").map(lambda v: str(int(v)))
+
+    return [
+        None if kind == ENTITY else Literal(kind, value)
+        for kind, value in zip(kinds.to_numpy(), normalized.to_numpy())
+    ]
@@ -2,6 +2,7 @@ from dotenv import load_dotenv
 from KG_builder.llm.base.base_model import BaseLLM
 from KG_builder.llm.cost.cost_model import GeminiModel, GPTModel
 from KG_builder.llm.free.free_model import QwenModel
+from KG_builder.llm.free.async_free_model import AsyncQwenModel
 from KG_builder.llm.cost.async_cost_model import AsyncBaseLLM, AsyncGeminiModel, AsyncGPTModel
 
 FREE_MODELS = {
@@ -17,6 +18,10 @@ ASYNC_COST_MODELS = {
     "gemini": AsyncGeminiModel
 }
 
+ASYNC_FREE_MODELS = {
+    "qwen": AsyncQwenModel
+}
+
 def load_model(model_name: str) -> BaseLLM:
     lower_name = model_name.lower()
     for key, cls in COST_MODELS.items():
@@ -32,4 +37,7 @@ def load_async_model(model_name: str) -> AsyncBaseLLM:
     for key, cls in ASYNC_COST_MODELS.items():
         if key in lower_name:
             return cls(model_name=model_name)
+    for key, cls in ASYNC_FREE_MODELS.items():
+        if key in lower_name:
+            return cls(model_name=model_name)
     raise ValueError(f"Unknown model: {model_name}")    
\ No newline at end of file
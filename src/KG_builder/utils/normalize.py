@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+EXACT = "exact"
+ASCII = "ascii"
+
+
+def normalize_key(name: str) -> str:
+    """NFC-normalized, case-folded, whitespace-collapsed lookup key."""
+    text = unicodedata.normalize("NFC", name).casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def strip_diacritics(text: str) -> str:
+    """Drop combining marks ("Tuấn" -> "Tuan"); "đ" has no decomposition and maps to "d"."""
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return unicodedata.normalize("NFC", stripped).replace("đ", "d").replace("Đ", "D")
+
+
+def alias_keys(name: str) -> List[Tuple[str, str]]:
+    """``(kind, key)`` pairs stored for ``name``."""
+    key = normalize_key(name)
+    return [(EXACT, key), (ASCII, strip_diacritics(key))]
+
+
+class AliasIndex:
+    """
+    In-memory map from normalization keys to canonical entity names.
+
+    Exact keys always resolve. Diacritic-stripped keys lose information in
+    Vietnamese ("Tuấn" / "Tuân"), so they are consulted only with
+    ``strip_diacritics`` and only when a single canonical name owns the key.
+    """
+
+    def __init__(self, *, strip_diacritics: bool = False):
+        self.strip_diacritics = strip_diacritics
+        self._keys: Dict[str, Dict[str, Optional[str]]] = {EXACT: {}, ASCII: {}}
+
+    def __len__(self) -> int:
+        return len(self._keys[EXACT])
+
+    def add(self, kind: str, key: str, canonical: str) -> bool:
+        """Record ``key -> canonical``; returns False when the key is already known."""
+        keys = self._keys[kind]
+        if key not in keys:
+            keys[key] = canonical
+            return True
+        if keys[key] != canonical:
+            # Two canonical entities share this key: never resolve through it.
+            keys[key] = None
+            return True
+        return False
+
+    def lookup(self, name: str) -> Optional[str]:
+        (_, exact), (_, ascii_key) = alias_keys(name)
+        canonical = self._keys[EXACT].get(exact)
+        if canonical is None and self.strip_diacritics:
+            canonical = self._keys[ASCII].get(ascii_key)
+        return canonical
+
+    def update(self, mapping: Dict[str, str]) -> List[Tuple[str, str, str]]:
+        """
+        Register every ``alias -> canonical`` pair (and the canonical names
+        themselves); returns the new ``(kind, key, canonical)`` rows to persist.
+        """
+        rows: List[Tuple[str, str, str]] = []
+        for alias, canonical in mapping.items():
+            for name in (canonical, alias):
+                for kind, key in alias_keys(name):
+                    if self.add(kind, key, canonical):
+                        rows.append((kind, key, canonical))
+        return rows
+
+    def load(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        for kind, key, canonical in rows:
+            self.add(kind, key, canonical)
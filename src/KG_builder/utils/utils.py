@@ -1,5 +1,6 @@
 import hashlib
 import inspect
+import json
 from functools import wraps
 import time
 
@@ -8,6 +9,13 @@ def hash_id(prefix: str, *fields: str) -> str:
     digest = hashlib.sha1(data).hexdigest()[:12]
     return f"{prefix}_{digest}"
 
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def config_hash(settings) -> str:
+    """Stable hash of JSON-serializable settings (key order does not matter)."""
+    return content_hash(json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str))
+
 def perf(func):
     if inspect.iscoroutinefunction(func):
         @wraps(func)
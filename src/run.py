@@ -1,50 +1,95 @@
 from __future__ import annotations
 
 import argparse
-import json
+import logging
 from pathlib import Path
 from time import perf_counter
 
 from dotenv import load_dotenv
 
 from KG_builder.builder import KnowledgeGraphBuilder
-from KG_builder.utils.clean_data import clean_vn_text
+from KG_builder.extract.extract_stage import TripleExtraction
+from KG_builder.triple_models import TripleList
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(
-        description="Extract knowledge graph triples from a text file."
-    )
-    parser.add_argument("data", type=Path, help="Path to the input text file.")
+# Flags of the previous builder interface, still accepted so existing command
+# lines keep working; the current builder does not use them.
+DEPRECATED_FLAGS = {
+    "--entities-schema": (Path, "entity types are resolved against the store, not read from a CSV"),
+    "--relation-schema": (Path, "relation types are resolved against the store, not read from a CSV"),
+    "--output-schema": (Path, "relation types are persisted in the store"),
+    "--embedding-rpm": (int, "Gemini rate limits are set per key (GEMINI_KEY_RPM, GEMINI_API_KEYS)"),
+    "--max-chunk-chars": (int, "documents are split into CV sections"),
+    "--min-chunk-chars": (int, "documents are split into CV sections"),
+    "--sentence-overlap": (int, "documents are split into CV sections"),
+}
+
+
+def warn_deprecated(args: argparse.Namespace) -> None:
+    for flag, (_, reason) in DEPRECATED_FLAGS.items():
+        if getattr(args, flag[2:].replace("-", "_"), None) is not None:
+            logging.warning(f"{flag} is deprecated and ignored: {reason}.")
+
 
-    parser.add_argument("--entities-schema", type=Path, default=Path("entities.csv"))
-    parser.add_argument("--relation-schema", type=Path, default=Path("relationships.csv"))
+def add_builder_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--triples-model", default="gemini-2.0-flash")
     parser.add_argument("--definition-model", default="gemini-2.0-flash")
     parser.add_argument("--embedding-model", default="Qwen/Qwen2.5-0.5B-Instruct")
+    parser.add_argument("--embedding-backend", choices=["torch", "onnx"], default="torch")
+
     parser.add_argument(
-        "--embedding-rpm",
-        type=int,
-        default=None,
-        help="Maximum embedding requests per minute (optional rate limit).",
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Maximum cosine distance for reusing an existing entity or predicate.",
+    )
+    parser.add_argument(
+        "--store",
+        choices=["sqlite", "pgvector"],
+        default="sqlite",
+        help="Embedded SQLite database at --db-path, or Postgres/pgvector at DB_URI.",
     )
-
-    parser.add_argument("--threshold", type=float, default=0.7)
     parser.add_argument("--db-path", type=Path, default=Path("kg.db"))
     parser.add_argument("--entity-index", type=Path, default=Path("data/entity.index"))
     parser.add_argument("--predicate-index", type=Path, default=Path("data/predicate.index"))
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-process the input even if the build manifest says it is unchanged.",
+    )
+    for flag, (type_, _) in DEPRECATED_FLAGS.items():
+        parser.add_argument(flag, type=type_, default=None, help="Deprecated; ignored.")
 
-    parser.add_argument("--max-chunk-chars", type=int, default=4800)
-    parser.add_argument("--min-chunk-chars", type=int, default=1200)
-    parser.add_argument("--sentence-overlap", type=int, default=1)
 
-    parser.add_argument("--output-triples", type=Path, default=Path("triples.json"))
-    parser.add_argument(
-        "--output-schema",
-        type=Path,
-        default=None,
-        help="Optional path to persist the updated relation schema.",
+def make_builder(args: argparse.Namespace) -> KnowledgeGraphBuilder:
+    warn_deprecated(args)
+    response_format = {
+        "type": "json_object",
+        "response_mime_type": "application/json",
+        "response_schema": TripleList
+    }
+
+    return KnowledgeGraphBuilder(
+        triple_extraction=TripleExtraction(),
+        response_format=response_format,
+        threhold=args.threshold,
+        definition_model=args.definition_model,
+        llm_model=args.triples_model,
+        embedding_model=args.embedding_model,
+        embedding_backend=args.embedding_backend,
+        entity_index_path=str(args.entity_index) if args.entity_index else None,
+        predicate_index_path=str(args.predicate_index) if args.predicate_index else None,
+        db_path=str(args.db_path) if args.store == "sqlite" else None,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Extract knowledge graph triples from a text file."
     )
+    parser.add_argument("data", type=Path, help="Path to the input text file.")
+    add_builder_arguments(parser)
+    parser.add_argument("--output-triples", type=Path, default=Path("triples.json"))
 
     return parser.parse_args()
 
@@ -56,43 +101,13 @@ def main() -> None:
     if not args.data.exists():
         raise FileNotFoundError(f"Input file not found: {args.data}")
 
-    text = args.data.read_text(encoding="utf-8")
-    cleaned = clean_vn_text(text)
-
-    builder_config = {
-        "entities_schema": str(args.entities_schema),
-        "relation_schema": str(args.relation_schema),
-        "triples_model": args.triples_model,
-        "definition_model": args.definition_model,
-        "embedding_model": args.embedding_model,
-        "embedding_rpm": args.embedding_rpm,
-        "threshold": args.threshold,
-        "db_path": str(args.db_path),
-        "entity_index_path": str(args.entity_index),
-        "predicate_index_path": str(args.predicate_index),
-    }
-
-    chunk_config = {
-        "max_chunk_chars": args.max_chunk_chars,
-        "min_chunk_chars": args.min_chunk_chars,
-        "sentence_overlap": args.sentence_overlap,
-    }
-
-    builder = KnowledgeGraphBuilder(**builder_config)
+    builder = make_builder(args)
 
     start = perf_counter()
-    triples = builder.run(cleaned, chunk_config)
+    builder.run(input_path=str(args.data), output_path=str(args.output_triples), force=args.force)
     elapsed = perf_counter() - start
 
-    args.output_triples.parent.mkdir(parents=True, exist_ok=True)
-    with args.output_triples.open("a", encoding="utf-8") as fh:
-        json.dump(triples, fh, ensure_ascii=False, indent=2)
-
-    if args.output_schema:
-        args.output_schema.parent.mkdir(parents=True, exist_ok=True)
-        builder.write_schema(str(args.output_schema))
-
-    print(f"Extracted {len(triples)} triples in {elapsed:.2f}s; saved to {args.output_triples}")
+    print(f"Built knowledge graph in {elapsed:.2f}s; saved to {args.output_triples}")
 
 
 if __name__ == "__main__":
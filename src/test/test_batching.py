@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+from KG_builder.utils.batching import MicroBatcher
+
+
+def test_concurrent_submits_share_one_batch():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=16, max_wait_ms=50)
+
+    async def run():
+        results = await asyncio.gather(
+            batcher.submit([1, 2]),
+            batcher.submit([3]),
+            batcher.submit([4, 5, 6]),
+        )
+        await batcher.aclose()
+        return results
+
+    results = asyncio.run(run())
+
+    assert results == [[2, 4], [6], [8, 10, 12]]
+    assert calls == [[1, 2, 3, 4, 5, 6]]
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 1
+    assert stats["queue_wait_seconds"]["count"] == 3
+
+
+def test_oversized_request_starts_next_batch():
+    calls = []
+
+    def identity(items):
+        calls.append(list(items))
+        return list(items)
+
+    batcher = MicroBatcher(identity, max_batch_size=3, max_wait_ms=50)
+
+    async def run():
+        results = await asyncio.gather(batcher.submit([1, 2]), batcher.submit([3, 4]))
+        await batcher.aclose()
+        return results
+
+    assert asyncio.run(run()) == [[1, 2], [3, 4]]
+    assert calls == [[1, 2], [3, 4]]
+
+
+def test_errors_reach_every_caller():
+    def fail(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(fail, max_wait_ms=10)
+
+    async def run():
+        results = await asyncio.gather(
+            batcher.submit(["a"]), batcher.submit(["b"]), return_exceptions=True
+        )
+        await batcher.aclose()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_aclose_fails_requests_still_waiting():
+    release = threading.Event()
+
+    def blocking(items):
+        release.wait()
+        return list(items)
+
+    batcher = MicroBatcher(blocking, max_batch_size=2, max_wait_ms=10)
+
+    async def run():
+        # One batch is in flight, one request is carried and one is still queued.
+        futures = [asyncio.ensure_future(batcher.submit(items)) for items in ([1], [2, 3], [4])]
+        await asyncio.sleep(0.05)
+        await batcher.aclose()
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), timeout=1)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
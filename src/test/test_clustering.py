@@ -0,0 +1,37 @@
+import numpy as np
+
+from KG_builder.utils.clustering import cluster_embeddings
+
+
+def test_cluster_embeddings_unions_transitively_across_blocks():
+    base = np.eye(4, dtype=np.float32)
+    near = base[0] + 0.05 * base[1]
+    embeds = np.vstack([base[0], base[2], near / np.linalg.norm(near), base[3], base[0]])
+    roots = cluster_embeddings(embeds, threshold=0.2, block_size=2)
+    assert roots.tolist() == [0, 1, 0, 3, 0]
+
+
+def test_merge_map_keeps_lowest_id_of_each_knn_component():
+    from KG_builder.embedding.storages.entity_storage import EntityStorage
+    from KG_builder.models.consolidate import merge_map
+
+    base = np.eye(4, dtype=np.float32)
+    ids = np.array([3, 7, 9, 12], dtype=np.int64)
+    vectors = np.vstack([base[0], base[1], base[0], base[1]])
+    storage = EntityStorage(d=4)
+    storage.add(vectors, ids)
+    chunks = [(ids[:2], vectors[:2]), (ids[2:], vectors[2:])]
+    assert merge_map(ids, storage, chunks, k=3, threshold=0.1) == {9: 3, 12: 7}
+
+
+def test_merge_map_ignores_neighbours_missing_from_ids():
+    from KG_builder.embedding.storages.entity_storage import EntityStorage
+    from KG_builder.models.consolidate import merge_map
+
+    base = np.eye(4, dtype=np.float32)
+    ids = np.array([3, 7], dtype=np.int64)
+    storage = EntityStorage(d=4)
+    # Rows 5 and 20 were written after ``ids`` was read.
+    storage.add(np.vstack([base[0], base[1], base[0], base[1]]), np.array([3, 7, 5, 20]))
+    chunks = [(ids, np.vstack([base[0], base[1]]))]
+    assert merge_map(ids, storage, chunks, k=3, threshold=0.1) == {}
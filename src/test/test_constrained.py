@@ -0,0 +1,32 @@
+import torch
+
+from KG_builder.llm.free.constrained import JsonClosedCriteria, JsonScanner, json_schema
+from KG_builder.triple_models import TripleList
+
+
+def test_scanner_closes_on_outer_bracket_and_ignores_strings():
+    scanner = JsonScanner()
+    assert not scanner.feed('Sure: {"triples": [{"object": "a } ] \\" {"}')
+    assert scanner.depth == 2
+    assert scanner.feed('], "main_subject": "x"} trailing {')
+    assert scanner.depth == 0
+
+
+def test_criteria_stop_rows_independently():
+    pieces = {0: "<pad>", 1: "{", 2: '"a"', 3: ":", 4: "1", 5: "}", 6: "["}
+
+    class Tokenizer:
+        def decode(self, ids, skip_special_tokens=True):
+            return "" if ids == [0] else pieces[ids[0]]
+
+    criteria = JsonClosedCriteria(Tokenizer(), prompt_length=1)
+    assert criteria(torch.tensor([[0, 1, 2], [0, 6, 1]]), None).tolist() == [False, False]
+    assert criteria(torch.tensor([[0, 1, 2, 3, 4, 5], [0, 6, 1, 5, 2, 3]]), None).tolist() == [True, False]
+
+
+def test_json_schema_from_response_format():
+    assert json_schema(None) is None
+    assert json_schema({"type": "text"}) is None
+    assert json_schema({"type": "json_object"}) == {}
+    schema = json_schema({"type": "json_object", "response_schema": TripleList})
+    assert schema["required"] == ["main_subject", "triples"]
@@ -0,0 +1,36 @@
+import pytest
+import torch
+
+from KG_builder.llm.free import cpu
+
+
+@pytest.fixture(autouse=True)
+def restore_threads():
+    threads = torch.get_num_threads()
+    yield
+    torch.set_num_threads(threads)
+
+
+def test_cpu_dtype_prefers_bf16_only_without_quantization(monkeypatch):
+    monkeypatch.setattr(cpu, "bf16_supported", lambda: True)
+    assert cpu.cpu_dtype(quantize=False) == torch.bfloat16
+    assert cpu.cpu_dtype(quantize=True) == torch.float32
+    monkeypatch.setattr(cpu, "bf16_supported", lambda: False)
+    assert cpu.cpu_dtype(quantize=False) == torch.float32
+
+
+def test_configure_threads_defaults_to_physical_cores(monkeypatch):
+    assert cpu.configure_threads(2) == 2
+    assert torch.get_num_threads() == 2
+
+    monkeypatch.setattr(cpu.psutil, "cpu_count", lambda logical=True: 8 if logical else 3)
+    assert cpu.configure_threads() == 3
+    assert torch.get_num_threads() == 3
+
+
+def test_resolve_profile(monkeypatch):
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: False)
+    assert cpu.resolve_profile("auto") == "cpu"
+    assert cpu.resolve_profile("gpu") == "gpu"
+    with pytest.raises(ValueError):
+        cpu.resolve_profile("tpu")
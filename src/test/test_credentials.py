@@ -0,0 +1,32 @@
+import pytest
+
+from KG_builder.llm.credentials import CredentialPool, KeyState, load_keys
+
+
+class Throttled(Exception):
+    code = 429
+
+
+def test_load_keys_parses_projects_and_rpm():
+    keys = load_keys({"GEMINI_API_KEYS": "k1@proj-a:30, k2", "GEMINI_KEY_RPM": "10"})
+    assert [(k.key, k.project, k.rpm) for k in keys] == [("k1", "proj-a", 30), ("k2", None, 10)]
+
+
+def test_requests_rotate_and_skip_throttled_keys():
+    pool = CredentialPool([KeyState("k1"), KeyState("k2"), KeyState("bad")], cooldown=0.1,
+                          client_factory=lambda key: key)
+
+    def request(client):
+        if client == "bad":
+            raise Throttled()
+        return client
+
+    assert [pool.call(request) for _ in range(4)] == ["k1", "k2", "k1", "k2"]
+    usage = {row["key"]: row for row in pool.usage()}
+    assert usage["...bad"]["throttled"] == 1 and usage["...bad"]["cooldown_seconds"] > 0
+    assert usage["...k1"]["successes"] == usage["...k2"]["successes"] == 2
+
+    for state in pool.keys[:2]:
+        state.disabled = True
+    with pytest.raises(Throttled):
+        pool.call(request)
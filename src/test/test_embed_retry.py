@@ -0,0 +1,25 @@
+import httpx
+
+from KG_builder.embedding.load.cost import _is_payload_error, _is_retryable
+from KG_builder.llm.credentials import NoCredentialError
+
+
+class ApiError(Exception):
+    def __init__(self, code: int, message: str = ""):
+        super().__init__(message)
+        self.code = code
+
+
+def test_only_transient_errors_are_retried():
+    assert _is_retryable(ApiError(429)) and _is_retryable(ApiError(503))
+    assert _is_retryable(httpx.ConnectTimeout("timed out"))
+    assert not _is_retryable(ApiError(400, "API key not valid"))
+    assert not _is_retryable(NoCredentialError("no key"))
+    assert not _is_retryable(TypeError("bug"))
+
+
+def test_only_size_errors_split_the_batch():
+    assert _is_payload_error(ApiError(413))
+    assert _is_payload_error(ApiError(400, "Request payload size exceeds the limit"))
+    assert not _is_payload_error(ApiError(400, "INVALID_ARGUMENT: models/foo is not found"))
+    assert not _is_payload_error(ApiError(400, "API key not valid. Please pass a valid API key."))
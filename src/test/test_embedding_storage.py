@@ -36,3 +36,17 @@ def test_faiss_storage_roundtrip(tmp_path, storage_cls):
     # Removing again should be a no-op
     removed_again = storage.remove(np.array([faiss_ids[0]], dtype=np.int64))
     assert removed_again == 0
+
+
+def test_add_skips_stored_ids_and_revives_removed_ones():
+    storage = EntityStorage(d=8)
+    embeddings = np.eye(8, dtype=np.float32)[:4]
+    storage.add(embeddings, np.arange(4))
+    storage.remove(np.array([3]))
+
+    # A batch repeating stored and removed ids only adds the new one.
+    storage.add(np.vstack([embeddings, np.eye(8, dtype=np.float32)[4:5]]), np.arange(5))
+    assert storage.index.ntotal == 5
+    assert storage.count() == 5
+    D, I = storage.search(embeddings[3:4], k=1)
+    assert I[0, 0] == 3
@@ -0,0 +1,35 @@
+from KG_builder.llm.free.free_model import PrefixCache, plan_generation_batches
+from KG_builder.llm.free.speculative import SpeculativeStats
+
+
+def test_batches_group_similar_lengths_within_budgets():
+    lengths = [50, 10, 400, 12, 45, 11]
+    batches = plan_generation_batches(lengths, max_batch_size=3, max_batch_tokens=500)
+    assert batches == [[1, 5, 3], [4, 0], [2]]
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+
+
+def test_prefix_cache_computes_each_prefix_once_and_evicts_lru():
+    computed = []
+    cache = PrefixCache(2)
+    compute = lambda text: computed.append(text) or text.upper()
+
+    assert cache.get("a", compute) == "A"
+    assert cache.get("b", compute) == "B"
+    assert cache.get("a", compute) == "A"
+    cache.get("c", compute)  # evicts "b", the least recently used
+    cache.get("a", compute)
+    cache.get("b", compute)
+    assert computed == ["a", "b", "c", "b"]
+    assert cache.stats() == {"entries": 2, "hits": 2, "misses": 4}
+
+
+def test_speculative_stats_count_accepted_proposals():
+    stats = SpeculativeStats()
+    # 3 rounds verified 8 draft proposals, kept 6 of them and produced 9 tokens.
+    stats.record(rounds=2, proposed=5, accepted=4, tokens=6)
+    stats.record(rounds=1, proposed=3, accepted=2, tokens=3)
+    report = stats.report()
+    assert report["accepted"] == 6
+    assert report["acceptance_rate"] == 0.75
+    assert report["tokens_per_round"] == 3.0
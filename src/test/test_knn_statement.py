@@ -0,0 +1,20 @@
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from KG_builder.models.db_engine import Entity, VECTOR_DIM
+from KG_builder.models.ops import knn_statement
+
+
+def _sql(mode: str) -> str:
+    return str(knn_statement(Entity, np.zeros(VECTOR_DIM), 5, mode=mode).compile(dialect=postgresql.dialect()))
+
+
+def test_quantized_modes_rerank_over_candidate_columns():
+    for mode in ("halfvec", "binary"):
+        outer = _sql(mode).rsplit(") AS candidates", 1)[1]
+        assert "ORDER BY candidates.embedding <#>" in outer
+        assert "entity." not in outer
+
+
+def test_full_mode_orders_by_indexed_column():
+    assert "ORDER BY entity.embedding <#>" in _sql("full")
@@ -0,0 +1,17 @@
+from KG_builder.utils.literals import DATE, EMAIL, INTEGER, PHONE, Literal, detect_literals
+
+
+def test_detect_literals_normalizes_typed_values():
+    values = ["18 - 11 - 1975", "31/02/1990", "(024) 3869 2136", "Tuan.NV@hust.edu.vn", "42", "000588", "Hà Nội",
+              "123456789012345678", "12345678901234567890123"]
+    assert detect_literals(values) == [
+        Literal(DATE, "1975-11-18"),
+        None,
+        Literal(PHONE, "02438692136"),
+        Literal(EMAIL, "tuan.nv@hust.edu.vn"),
+        Literal(INTEGER, "42"),
+        None,
+        None,
+        Literal(INTEGER, "123456789012345678"),
+        None,
+    ]
@@ -0,0 +1,34 @@
+import csv
+
+from KG_builder.export.neo4j import iter_sqlite_triples, write_import_csv
+from KG_builder.models.dao import EntitiesDAO, PredicatesDAO, TriplesDAO
+from KG_builder.models.db import DB
+from KG_builder.utils.literals import DATE, Literal
+
+
+def _rows(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))[1:]
+
+
+def test_literal_objects_export_as_literal_nodes(tmp_path):
+    db_path = str(tmp_path / "kg.db")
+    db = DB(db_path)
+    for dao in (EntitiesDAO(db), PredicatesDAO(db), TriplesDAO(db)):
+        dao.create_table()
+    entities = EntitiesDAO(db).upsert_many(names=["Nguyễn Văn A", "Hà Nội"])
+    born = PredicatesDAO(db).upsert(name="sinh ngày", definition="Date of birth")
+    lives = PredicatesDAO(db).upsert(name="quê quán", definition="Place of origin")
+    TriplesDAO(db).upsert_many([
+        (entities["Nguyễn Văn A"], born, Literal(DATE, "1975-11-18")),
+        (entities["Nguyễn Văn A"], lives, entities["Hà Nội"]),
+    ], document="cv.txt")
+    db.close()
+
+    out = tmp_path / "import"
+    write_import_csv(iter_sqlite_triples(db_path), str(out))
+
+    assert sorted(row[0] for row in _rows(out / "entities.csv")) == ["Hà Nội", "Nguyễn Văn A"]
+    assert _rows(out / "literals.csv") == [["date:1975-11-18", "date", "1975-11-18", "Literal"]]
+    assert [row[:2] for row in _rows(out / "literal_relationships.csv")] == [["Nguyễn Văn A", "date:1975-11-18"]]
+    assert [row[:2] for row in _rows(out / "relationships.csv")] == [["Nguyễn Văn A", "Hà Nội"]]
@@ -0,0 +1,25 @@
+import unicodedata
+
+from KG_builder.utils.normalize import AliasIndex, normalize_key, strip_diacritics
+
+
+def test_normalize_key_folds_case_spacing_and_unicode_form():
+    decomposed = unicodedata.normalize("NFD", "Nguyễn  Văn\tTuấn")
+    assert normalize_key("NGUYỄN VĂN TUẤN") == normalize_key(decomposed) == "nguyễn văn tuấn"
+
+
+def test_strip_diacritics_maps_d_bar():
+    assert strip_diacritics("Đại học Bách khoa") == "Dai hoc Bach khoa"
+
+
+def test_alias_index_ascii_keys_are_opt_in_and_unambiguous():
+    index = AliasIndex()
+    index.update({"Nguyễn Văn Tuấn": "NGUYỄN VĂN TUẤN"})
+    assert index.lookup("nguyễn   văn tuấn") == "NGUYỄN VĂN TUẤN"
+    assert index.lookup("Nguyen Van Tuan") is None
+
+    index.strip_diacritics = True
+    assert index.lookup("Nguyen Van Tuan") == "NGUYỄN VĂN TUẤN"
+
+    index.update({"Nguyễn Văn Tuân": "Nguyễn Văn Tuân"})
+    assert index.lookup("Nguyen Van Tuan") is None
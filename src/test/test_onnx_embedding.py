@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from KG_builder.embedding.load.free import QwenEmbedding
+from KG_builder.embedding.load.onnx_model import OnnxQwenEmbedding, check_parity
+from KG_builder.llm.free import cpu
+
+WORDS = ["NGUYỄN", "VĂN", "TUẤN", "Trường", "Đại", "học", "Bách", "khoa", "Hà", "Nội", "export", "onnx", "encoder"]
+SAMPLES = ["NGUYỄN VĂN TUẤN", "Trường Đại học Bách khoa Hà Nội", "Hà Nội"]
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """A randomly initialised two-layer Qwen2 with a word-level tokenizer."""
+    path = tmp_path_factory.mktemp("tiny-qwen")
+    vocab = {token: i for i, token in enumerate(["[PAD]", "[UNK]", *WORDS])}
+    word_level = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+    word_level.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    transformers.PreTrainedTokenizerFast(
+        tokenizer_object=word_level, unk_token="[UNK]", pad_token="[PAD]", eos_token="[PAD]"
+    ).save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = transformers.Qwen2Config(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=64,
+        pad_token_id=0,
+    )
+    transformers.Qwen2ForCausalLM(config).save_pretrained(path)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def torch_embedding(tiny_model):
+    with pytest.MonkeyPatch.context() as mp:
+        # Compare against float32 weights, not bf16 on CPUs that support it.
+        mp.setattr(cpu, "bf16_supported", lambda: False)
+        return QwenEmbedding(model_name=tiny_model, profile="cpu", threads=torch.get_num_threads())
+
+
+@pytest.mark.parametrize("quantize, min_cosine", [(False, 0.9999), (True, 0.99)])
+def test_onnx_embeddings_match_torch(tmp_path, tiny_model, torch_embedding, quantize, min_cosine):
+    model = OnnxQwenEmbedding(
+        model_name=tiny_model, quantize=quantize, cache_dir=str(tmp_path), num_threads=1
+    )
+    assert model.model_path.name == ("model.int8.onnx" if quantize else "model.onnx")
+
+    embeddings = model.encode_sync(SAMPLES)
+    assert embeddings.shape == (len(SAMPLES), 32)
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+
+    parity = check_parity(model, torch_embedding, SAMPLES)
+    assert parity["min_cosine"] >= min_cosine
+    if not quantize:
+        assert parity["max_abs_diff"] < 1e-4
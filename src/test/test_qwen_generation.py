@@ -0,0 +1,125 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from KG_builder.llm.free import cpu
+from KG_builder.llm.free.free_model import QwenModel
+
+WORDS = ["system", "user", "assistant", "Extract", "triples", "as", "JSON", "NGUYỄN", "VĂN", "TUẤN",
+         "Trường", "Đại", "học", "Bách", "khoa", "Hà", "Nội", "sinh", "năm", "1975", "giảng", "viên"]
+CHAT_TEMPLATE = (
+    "{% for message in messages %}<|im_start|> {{ message['role'] }} {{ message['content'] }} <|im_end|> "
+    "{% endfor %}{% if add_generation_prompt %}<|im_start|> assistant {% endif %}"
+)
+SYSTEM = "Extract triples as JSON"
+TEXTS = ["NGUYỄN VĂN TUẤN sinh năm 1975", "Hà Nội", "giảng viên Trường Đại học Bách khoa Hà Nội"]
+
+
+def save_tiny_qwen(path, seed: int, layers: int) -> str:
+    """A randomly initialised Qwen2 with a whitespace tokenizer and a chat template."""
+    vocab = {token: i for i, token in enumerate(["[PAD]", "[UNK]", "<|im_start|>", "<|im_end|>", *WORDS])}
+    word_level = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+    word_level.pre_tokenizer = tokenizers.pre_tokenizers.WhitespaceSplit()
+    word_level.decoder = tokenizers.decoders.WordPiece()
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=word_level, unk_token="[UNK]", pad_token="[PAD]", eos_token="<|im_end|>"
+    )
+    tokenizer.chat_template = CHAT_TEMPLATE
+    tokenizer.save_pretrained(path)
+
+    torch.manual_seed(seed)
+    config = transformers.Qwen2Config(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=layers,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=128,
+        pad_token_id=vocab["[PAD]"],
+        eos_token_id=vocab["<|im_end|>"],
+    )
+    transformers.Qwen2ForCausalLM(config).save_pretrained(path)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def tiny_target(tmp_path_factory):
+    return save_tiny_qwen(tmp_path_factory.mktemp("tiny-qwen"), seed=0, layers=2)
+
+
+@pytest.fixture(autouse=True)
+def float32_weights(monkeypatch):
+    # Compare float32 runs, not bf16 on CPUs that support it.
+    monkeypatch.setattr(cpu, "bf16_supported", lambda: False)
+
+
+def load(model_name: str, **args) -> QwenModel:
+    return QwenModel(
+        model_name=model_name,
+        profile="cpu",
+        threads=torch.get_num_threads(),
+        quantize=False,
+        do_sample=False,
+        constrained_decoding=False,
+        max_new_tokens=12,
+        **args,
+    )
+
+
+def conversation(text: str):
+    return [{"role": "system", "content": SYSTEM}, {"role": "user", "content": text}]
+
+
+def uncached_greedy(model: QwenModel, text: str) -> str:
+    """One prompt through plain ``generate``, with no prefix cache and no padding."""
+    prompt = model.tokenizer.apply_chat_template(conversation(text), tokenize=False, add_generation_prompt=True)
+    input_ids = model.tokenizer(prompt, return_tensors="pt").input_ids
+    with torch.inference_mode():
+        output = model.instance.generate(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            do_sample=False,
+            max_new_tokens=model.max_new_tokens,
+            repetition_penalty=1.2,
+            pad_token_id=model.tokenizer.pad_token_id,
+        )
+    return model.tokenizer.decode(output[0, input_ids.shape[1]:], skip_special_tokens=True).strip()
+
+
+def test_cached_prefix_batch_matches_uncached_single_prompts(tiny_target):
+    model = load(tiny_target)
+    expected = [uncached_greedy(model, text) for text in TEXTS]
+
+    # Rows of different lengths share one generate call and the cached system prompt.
+    assert model.generate_batch([conversation(text) for text in TEXTS]) == expected
+    assert model.generate_batch([conversation(text) for text in TEXTS]) == expected
+    assert model.prefix_cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+    assert any(expected)
+
+
+def test_speculative_decoding_keeps_greedy_output(tmp_path, tiny_target):
+    # Same vocabulary, different weights: the draft agrees with the target only sometimes.
+    draft = save_tiny_qwen(tmp_path / "draft", seed=1, layers=1)
+    conversations = [conversation(text) for text in TEXTS]
+    expected = load(tiny_target).generate_batch(conversations)
+
+    model = load(tiny_target, draft_model_name=draft)
+    assert model.generate_batch(conversations) == expected
+
+    report = model.throughput()
+    assert report["rounds"] > 0
+    assert 0 <= report["accepted"] <= report["proposed"]
+    assert report["proposed"] > 0
+
+
+def test_speculative_decoding_with_its_own_draft_accepts_everything(tiny_target):
+    model = load(tiny_target, draft_model_name=tiny_target)
+    model.generate_batch([conversation(TEXTS[0])])
+    report = model.throughput()
+    # Every proposal the target can keep is kept; rejections only come from the length limit.
+    assert report["accepted"] > 0
+    assert report["accepted"] <= report["proposed"]
+    assert report["tokens"] == report["accepted"] + report["rounds"]
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from KG_builder.embedding.load.remote import RemoteEmbedding, create_shared_matrix
+from KG_builder.embedding.server import EmbeddingServer
+
+
+class SlowReplica:
+    """Stands in for the task queue: answers each request after ``delay`` seconds."""
+
+    def __init__(self, server: EmbeddingServer, delay: float):
+        self.server = server
+        self.delay = delay
+        self.blocks = []
+
+    def put(self, job) -> None:
+        request_id, texts = job
+        name = create_shared_matrix(np.ones((len(texts), 4), dtype=np.float32))
+        self.blocks.append(name)
+        item = (request_id, name, [len(texts), 4], None)
+        self.server._loop.call_later(self.delay, self.server._resolve, item)
+
+
+def _exists(name: str) -> bool:
+    return os.path.exists(f"/dev/shm/{name.lstrip('/')}")
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs POSIX shared memory")
+def test_blocks_are_freed_when_the_client_times_out(tmp_path):
+    async def run():
+        server = EmbeddingServer(socket_path=str(tmp_path / "embed.sock"))
+        server._loop = asyncio.get_running_loop()
+        server._tasks = replica = SlowReplica(server, delay=0.2)
+        unix_server = await asyncio.start_unix_server(server._handle, path=server.socket_path)
+        async with unix_server:
+            client = RemoteEmbedding(socket_path=server.socket_path, timeout=0.05)
+            with pytest.raises(asyncio.TimeoutError):
+                await client.encode(["late"])
+            client.timeout = 5
+            matrix = await client.encode(["a", "b"])
+            await asyncio.sleep(0.3)
+        return replica.blocks, matrix
+
+    blocks, matrix = asyncio.run(run())
+    assert matrix.shape == (2, 4)
+    assert len(blocks) == 2
+    assert not any(_exists(name) for name in blocks)
@@ -0,0 +1,64 @@
+from dataclasses import replace
+
+import pytest
+
+from KG_builder.models.dao import DocumentRecord, DocumentsDAO, EntitiesDAO, PredicatesDAO, TriplesDAO
+from KG_builder.models.consolidate import remap_triple_ids
+from KG_builder.models.db import DB
+
+
+@pytest.fixture
+def db():
+    db = DB(":memory:")
+    for dao in (EntitiesDAO(db), PredicatesDAO(db), TriplesDAO(db), DocumentsDAO(db)):
+        dao.create_table()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_remove_keeps_triples_supported_by_another_document(db):
+    entities = EntitiesDAO(db).upsert_many(names=["A", "B", "C"])
+    pid = PredicatesDAO(db).upsert(name="knows", definition="Is acquainted with")
+    triples = TriplesDAO(db)
+
+    shared, only_a = triples.upsert_many([(entities["A"], pid, entities["B"]), (entities["A"], pid, entities["C"])],
+                                         document="a.txt")
+    triples.upsert_many([(entities["A"], pid, entities["B"])], document="b.txt")
+
+    assert triples.remove("a.txt", [shared, only_a]) == [only_a]
+    assert triples.get(only_a) is None
+    assert [t.id for t in triples.by_document("b.txt")] == [shared]
+    assert triples.by_document("a.txt") == []
+
+
+def test_document_manifest_roundtrip(db):
+    documents = DocumentsDAO(db)
+    assert documents.get("cv.txt") is None
+
+    documents.upsert(DocumentRecord("cv.txt", "h1", "1", "c1", ["T_1"]))
+    documents.upsert(DocumentRecord("cv.txt", "h2", "1", "c1", ["T_1", "T_2"]))
+    record = documents.get("cv.txt")
+    assert record.triple_ids == ["T_1", "T_2"]
+    assert record.is_current("h2", "1", "c1") and not record.is_current("h1", "1", "c1")
+
+
+def test_rerun_after_consolidation_deletes_rekeyed_triple(db):
+    entities = EntitiesDAO(db).upsert_many(names=["A", "B", "B.", "C"])
+    pid = PredicatesDAO(db).upsert(name="knows", definition="Is acquainted with")
+    triples, documents = TriplesDAO(db), DocumentsDAO(db)
+    old, kept = triples.upsert_many([(entities["A"], pid, entities["B."]), (entities["A"], pid, entities["C"])],
+                                    document="a.txt")
+    documents.upsert(DocumentRecord("a.txt", "h1", "1", "c1", [old, kept]))
+
+    # Consolidation merges "B." into "B": the triple is re-keyed, and so is the manifest.
+    [new] = triples.upsert_many([(entities["A"], pid, entities["B"])], document="a.txt")
+    triples.remove("a.txt", [old])
+    record = documents.get("a.txt")
+    documents.upsert(replace(record, triple_ids=remap_triple_ids(record.triple_ids, {old: new})))
+
+    # The re-run no longer extracts it; the manifest names the id that exists now.
+    previous_ids = set(documents.get("a.txt").triple_ids)
+    assert triples.remove("a.txt", sorted(previous_ids - {kept})) == [new]
+    assert triples.get(new) is None
@@ -0,0 +1,167 @@
+"""
+Distributed extraction workers sharing the pgvector database.
+
+Queue documents once, then start any number of workers on any number of hosts
+(each needs DB_URI); every worker claims one job at a time from
+``extraction_jobs`` and runs the builder on it.
+
+    python worker.py enqueue data/
+    python worker.py work --output-dir output/ --drain
+    python worker.py status
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import socket
+import threading
+import time
+import traceback
+from pathlib import Path
+from time import perf_counter
+from typing import List
+
+from dotenv import load_dotenv
+
+from KG_builder.models.ops import JobService
+from run import add_builder_arguments, make_builder
+
+LEASE_SECONDS = 300.0
+POLL_SECONDS = 5.0
+MAX_ATTEMPTS = 3
+
+
+class Heartbeat:
+    """Extends a job's lease every ``lease_seconds / 3`` until the block exits."""
+
+    def __init__(self, job_id: int, worker: str, lease_seconds: float):
+        self.job_id = job_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not JobService.heartbeat(job_id=self.job_id, worker=self.worker, lease_seconds=self.lease_seconds):
+                    self.lost = True
+                    return
+            except Exception as e:  # a DB blip should not kill the job; the lease has slack
+                print(f"[{self.worker}] heartbeat for job {self.job_id} failed: {e}")
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def collect_documents(paths: List[Path]) -> List[str]:
+    documents: List[str] = []
+    for path in paths:
+        if path.is_dir():
+            documents.extend(str(p) for p in sorted(path.rglob("*.txt")))
+        else:
+            documents.append(str(path))
+    return documents
+
+
+def work(args: argparse.Namespace) -> None:
+    if args.store != "pgvector":
+        # SQLite databases and FAISS index files are local to one process.
+        raise SystemExit("Workers share entities and triples through Postgres; use --store pgvector.")
+    worker = args.worker_id
+    suffix = re.sub(r"[^\w.-]", "_", worker)
+    for attr in ("entity_index", "predicate_index"):
+        path = getattr(args, attr)
+        if path is not None:
+            setattr(args, attr, path.with_name(f"{path.name}.{suffix}"))
+    builder = make_builder(args)
+    done = 0
+    start = perf_counter()
+
+    while True:
+        requeued = JobService.requeue_stale(max_attempts=args.max_attempts)
+        if requeued:
+            print(f"[{worker}] requeued {requeued} jobs with expired leases")
+
+        job = JobService.claim(worker=worker, lease_seconds=args.lease)
+        if job is None:
+            if args.drain:
+                break
+            time.sleep(args.poll)
+            continue
+
+        # Same-named files from different directories must not share an output.
+        output_path = Path(args.output_dir) / f"{job.id}-{Path(job.document).stem}.json"
+        job_start = perf_counter()
+        with Heartbeat(job.id, worker, args.lease) as heartbeat:
+            try:
+                delta = builder.run(input_path=job.document, output_path=str(output_path), force=args.force)
+            except Exception:
+                status = JobService.fail(
+                    job_id=job.id, worker=worker, error=traceback.format_exc(), max_attempts=args.max_attempts
+                )
+                print(f"[{worker}] job {job.id} ({job.document}) failed on attempt {job.attempts}: {status}")
+                continue
+
+        result = {
+            "seconds": perf_counter() - job_start,
+            "skipped": delta is None,
+            "inserted": len(delta["inserted"]) if delta else 0,
+            "deleted": len(delta["deleted"]) if delta else 0,
+        }
+        if JobService.complete(job_id=job.id, worker=worker, result=result):
+            done += 1
+            print(f"[{worker}] job {job.id} ({job.document}) done: {result}")
+        else:
+            # Writes are idempotent; whoever holds the lease now records completion.
+            lost = " (heartbeat lost the lease)" if heartbeat.lost else ""
+            print(f"[{worker}] job {job.id} ({job.document}) was requeued before it finished{lost}")
+
+    elapsed = perf_counter() - start
+    print(f"[{worker}] completed {done} jobs in {elapsed:.1f}s ({done / elapsed if elapsed else 0.0:.3f} docs/sec)")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Queue-driven knowledge graph extraction workers.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = subparsers.add_parser("enqueue", help="Queue text files (directories are searched for *.txt).")
+    enqueue.add_argument("paths", type=Path, nargs="+")
+
+    worker = subparsers.add_parser("work", help="Claim and process jobs until stopped.")
+    add_builder_arguments(worker)
+    # FAISS mirrors are per-process files; workers search pgvector unless given
+    # paths, which are then suffixed with the worker id (see ``work``).
+    worker.set_defaults(store="pgvector", entity_index=None, predicate_index=None)
+    worker.add_argument("--output-dir", type=Path, default=Path("output"))
+    worker.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    worker.add_argument("--lease", type=float, default=LEASE_SECONDS, help="Lease length in seconds.")
+    worker.add_argument("--poll", type=float, default=POLL_SECONDS, help="Seconds between polls of an empty queue.")
+    worker.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    worker.add_argument("--drain", action="store_true", help="Exit once the queue is empty.")
+
+    subparsers.add_parser("status", help="Job counts by status.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    load_dotenv()
+    args = parse_args()
+    if args.command == "enqueue":
+        documents = collect_documents(args.paths)
+        print(f"Queued {JobService.enqueue(documents)} of {len(documents)} documents")
+    elif args.command == "work":
+        work(args)
+    else:
+        print(JobService.counts())
+
+
+if __name__ == "__main__":
+    main()